@@ -0,0 +1,45 @@
+"""
+Talks to a Running uvVisServer.py. Only Uses the Standard Library, so a Client Starts Without Loading the Analysis.
+"""
+
+# Basic Modules
+import json
+# Modules to Call the Local HTTP API
+import urllib.request
+import urllib.error
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Parameters a Request Can Set (Anything Left Out Uses These)
+defaultRequest = {
+    "dataFile": None,                # The .tsv File to Analyze (Absolute, or Relative to the Server's Folder)
+    "sampleNames": None,             # Only Analyze These Samples; None for All
+    "peakWavelengthBounds": None,    # [minWavelength, maxWavelength]; None Searches the Whole Spectrum
+    "isPeakPositive": True,
+    "cutoffFreq": 0.1,
+    "filterOrder": 3,
+    "savgolWindow": 15,
+    "savgolOrder": 2,
+    "applyCalibration": False,       # Apply Each Sample's '//WLCalib' Header to its Wavelengths
+    "gridStep": None,                # Resample the File Onto a Grid of This Step (nm); None Keeps the File's Grid (Ragged Files are Always Resampled)
+    "warmStart": False,              # Seed Each Sample's Baseline Search With the Previous Sample's (Time Series Files)
+    "makePlots": False,              # Save '<Sample Name>.png' to 'Analysis/<File>/'
+    "plotDPI": 300,
+    "thumbnails": False,
+    "store": False,                  # Append the Results and Spectra to 'Analysis/Results Store/' Next to the File
+    "excel": False,                  # Export 'Analysis/<File>/<File> Analysis.xlsx' From the Store (Needs store)
+}
+
+def callServer(serverURL, path, requestData = None, timeout = 600):
+    """
+    Sends One Request to a Running Server (POST if requestData is Given, Else GET). Returns (statusCode, responseData).
+    """
+    requestBytes = json.dumps(requestData).encode() if requestData != None else None
+    serverRequest = urllib.request.Request(serverURL.rstrip("/") + path, data = requestBytes, headers = {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(serverRequest, timeout = timeout) as serverResponse:
+            return serverResponse.status, json.loads(serverResponse.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read() or b"{}")
@@ -0,0 +1,301 @@
+
+# Basic Modules
+import os
+import json
+import time
+import queue
+import threading
+import traceback
+import collections
+import numpy as np
+# Modules for the Local HTTP API
+import http.server
+import concurrent.futures
+
+# Import Python Helper Files
+import analysisClient
+import excelProcessing
+import batchProcessing
+import batchRunner
+import resultCache
+import resultStore
+import plotResults
+import pipelineMetrics
+import sampleSet
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+class serverBusy(Exception):
+    pass
+
+
+class analysisService:
+    """
+    Keeps the Analysis Warm Between Requests: Each Worker Thread Keeps its Own Pipeline (Filter Coefficients) and
+    Plot, and the Parsed Files and Analyzed Samples are Kept in Memory Until the File Changes on Disk.
+    Requests Wait in a Bounded Queue; When it is Full, New Requests are Turned Away (serverBusy) Instead of Piling Up.
+    """
+
+    def __init__(self, numWorkers = 1, maxQueued = 8, maxCachedFiles = 32, cacheFolder = None):
+        self.maxCachedFiles = maxCachedFiles
+        self.analysisCache = resultCache.resultCache(cacheFolder) if cacheFolder != None else None
+
+        # Warm State Shared by the Workers: {fileKey: sampleSet}, {(fileKey, paramsKey): Analysis}
+        self.parsedFiles = collections.OrderedDict()
+        self.analyzedFiles = collections.OrderedDict()
+        self.cacheLock = threading.Lock()
+        # The Store's Chunks are Named by Time and Process, so Threads Take Turns Appending
+        self.storeLock = threading.Lock()
+        self.serviceStats = {"requests": 0, "rejected": 0, "failed": 0, "parsedFileHits": 0, "analyzedFileHits": 0}
+        self.startTime = time.time()
+
+        # Start the Workers
+        self.requestQueue = queue.Queue(maxQueued)
+        self.workerThreads = []
+        for workerNum in range(max(1, numWorkers)):
+            workerThread = threading.Thread(target = self.runWorker, name = "analysisWorker" + str(workerNum), daemon = True)
+            workerThread.start()
+            self.workerThreads.append(workerThread)
+
+    def submit(self, analysisRequest):
+        """
+        Queues a Request. Returns a Future of its Response (See analyzeRequest). Raises serverBusy if the Queue is Full.
+        """
+        requestFuture = concurrent.futures.Future()
+        try:
+            self.requestQueue.put_nowait((analysisRequest, requestFuture))
+        except queue.Full:
+            self.countStat("rejected")
+            raise serverBusy("The Server Already Has " + str(self.requestQueue.maxsize) + " Requests Waiting")
+        return requestFuture
+
+    def stop(self):
+        for _ in self.workerThreads:
+            self.requestQueue.put((None, None))
+        for workerThread in self.workerThreads:
+            workerThread.join()
+
+    def runWorker(self):
+        # Each Worker's Own Pipeline and Plot (Neither is Shared Between Threads)
+        samplePipeline = batchProcessing.batchProcessing()
+        sampleRenderer = None
+        while True:
+            analysisRequest, requestFuture = self.requestQueue.get()
+            if requestFuture == None:
+                return
+            if not requestFuture.set_running_or_notify_cancel():
+                continue
+            # A Bad Request (or a Missing Plotting Library) Must Not Stop the Worker: the Error Goes in its Response
+            try:
+                analysisRequest = dict(analysisClient.defaultRequest, **analysisRequest)
+                if analysisRequest["makePlots"] and (sampleRenderer == None or sampleRenderer.renderSettings != (analysisRequest["plotDPI"], analysisRequest["thumbnails"])):
+                    sampleRenderer = None
+                    sampleRenderer = plotResults.plotResults(analysisRequest["plotDPI"], analysisRequest["thumbnails"])
+                response = self.analyzeRequest(analysisRequest, samplePipeline, sampleRenderer if analysisRequest["makePlots"] else None)
+            except Exception:
+                self.countStat("requests")
+                self.countStat("failed")
+                response = {"dataFile": analysisRequest.get("dataFile") if isinstance(analysisRequest, dict) else None, "results": [], "numCached": 0, "numPlots": 0,
+                            "runTime": 0, "error": traceback.format_exc(limit = 3)}
+            requestFuture.set_result(response)
+
+    def countStat(self, statName):
+        with self.cacheLock:
+            self.serviceStats[statName] += 1
+
+    def getFileKey(self, dataFile):
+        # A File is Parsed Again Once it is Modified (or Replaced)
+        fileStats = os.stat(dataFile)
+        return (os.path.abspath(dataFile), fileStats.st_mtime_ns, fileStats.st_size)
+
+    def getCached(self, cachedItems, itemKey, statName):
+        with self.cacheLock:
+            if itemKey not in cachedItems:
+                return None
+            cachedItems.move_to_end(itemKey)
+            self.serviceStats[statName] += 1
+            return cachedItems[itemKey]
+
+    def addCached(self, cachedItems, itemKey, cachedItem):
+        # Drop the Least Recently Used Files First
+        with self.cacheLock:
+            cachedItems[itemKey] = cachedItem
+            cachedItems.move_to_end(itemKey)
+            while len(cachedItems) > self.maxCachedFiles:
+                cachedItems.popitem(last = False)
+
+    def loadFile(self, dataFile, applyCalibration = False, gridStep = None):
+        """
+        Returns (fileKey, sampleSet) of a File on One Grid, Parsing it Only if it Changed Since the Last Request.
+        The Samples are Calibrated and Resampled Like batchRunner.analyzeFile (Files With Ragged Grids are Always Resampled).
+        """
+        fileKey = (self.getFileKey(dataFile), applyCalibration, gridStep)
+        fileSamples = self.getCached(self.parsedFiles, fileKey, "parsedFileHits")
+        if fileSamples == None:
+            fileSamples = sampleSet.sampleSet.fromFile(dataFile)
+            if len(fileSamples) == 0:
+                raise ValueError("No Samples Found in the File")
+            if applyCalibration:
+                fileSamples = fileSamples.calibrate()
+            fileSamples = fileSamples.resample(gridStep = gridStep)
+            self.addCached(self.parsedFiles, fileKey, fileSamples)
+
+        return fileKey, fileSamples
+
+    def analyzeRequest(self, analysisRequest, samplePipeline, sampleRenderer = None):
+        """
+        Analyzes One Request (See analysisClient.defaultRequest). Errors are Returned, Not Raised.
+        Returns {"dataFile", "results": [One Dictionary Per Sample], "numCached", "numPlots", "runTime", "error"}.
+        """
+        startTime = time.time()
+        self.countStat("requests")
+        response = {"dataFile": analysisRequest["dataFile"], "results": [], "numCached": 0, "numPlots": 0, "error": None}
+        try:
+            dataFile = analysisRequest["dataFile"]
+            if dataFile == None or not os.path.isfile(dataFile):
+                raise FileNotFoundError("No Data File Found at: " + str(dataFile))
+            # Tag This Worker's Records (the Context is Per Thread)
+            pipelineMetrics.setContext(dataFile = dataFile)
+            for paramName in batchRunner.filterParamNames:
+                setattr(samplePipeline, paramName, analysisRequest[paramName])
+            samplePipeline.warmStart = analysisRequest["warmStart"]
+            samplePipeline.resetWarmStart()
+            analysisParams = samplePipeline.getAnalysisParams(analysisRequest["peakWavelengthBounds"], analysisRequest["isPeakPositive"])
+
+            with pipelineMetrics.timeStage("serviceRequest", 0, dataFile = dataFile) as stageRecord:
+                fileKey, fileSamples = self.loadFile(dataFile, analysisRequest["applyCalibration"], analysisRequest["gridStep"])
+                # Only Analyze the Requested Samples (in File Order)
+                if analysisRequest["sampleNames"] != None:
+                    missingSamples = [sampleName for sampleName in analysisRequest["sampleNames"] if sampleName not in fileSamples.sampleNames]
+                    if len(missingSamples) != 0:
+                        raise KeyError("Samples Not in the File: " + ", ".join(missingSamples))
+                    fileSamples = fileSamples.select([sampleName in analysisRequest["sampleNames"] for sampleName in fileSamples.sampleNames])
+                wavelength, absorbanceMatrix = fileSamples.getMatrix()
+                sampleNames = fileSamples.sampleNames
+                stageRecord["numSamples"] = len(sampleNames)
+
+                # Reuse the Last Analysis of the Same Samples With the Same Parameters
+                analysisKey = (fileKey, tuple(sampleNames), json.dumps(analysisParams, sort_keys = True))
+                fileAnalysis = self.getCached(self.analyzedFiles, analysisKey, "analyzedFileHits")
+                if fileAnalysis == None:
+                    if self.analysisCache != None:
+                        results, filteredMatrix, baselineMatrix, fromCache = samplePipeline.analyzeSamples_Cached(wavelength, absorbanceMatrix, sampleNames, self.analysisCache, analysisRequest["peakWavelengthBounds"], analysisRequest["isPeakPositive"])
+                        response["numCached"] = int(fromCache.sum())
+                    else:
+                        results, filteredMatrix, baselineMatrix = samplePipeline.analyzeSamples(wavelength, absorbanceMatrix, sampleNames, analysisRequest["peakWavelengthBounds"], analysisRequest["isPeakPositive"])
+                    fileAnalysis = (results, filteredMatrix, baselineMatrix)
+                    self.addCached(self.analyzedFiles, analysisKey, fileAnalysis)
+                else:
+                    response["numCached"] = len(sampleNames)
+                results, filteredMatrix, baselineMatrix = fileAnalysis
+
+            # Save Next to the File, Like uvVisWatchAnalysis.py
+            fileName = os.path.splitext(os.path.basename(dataFile))[0]
+            analysisFolder = os.path.join(os.path.dirname(os.path.abspath(dataFile)), "Analysis")
+            outputDirectory = os.path.join(analysisFolder, fileName) + "/"
+            if analysisRequest["store"]:
+                with self.storeLock:
+                    analysisStore = resultStore.resultStore(os.path.join(analysisFolder, "Results Store"))
+                    analysisStore.append(os.path.basename(dataFile), wavelength, results, filteredMatrix, baselineMatrix, resultStore.getParamsKey(analysisParams))
+                    if analysisRequest["excel"]:
+                        analysisStore.exportExcel(outputDirectory, fileName + " Analysis.xlsx", os.path.basename(dataFile))
+            if sampleRenderer != None:
+                response["numPlots"] = sampleRenderer.renderFile({"outputDirectory": outputDirectory, "wavelength": wavelength, "absorbanceMatrix": absorbanceMatrix if analysisRequest["isPeakPositive"] else -absorbanceMatrix,
+                                                                  "filteredMatrix": filteredMatrix, "baselineMatrix": baselineMatrix, "results": results})
+
+            # Send the Results as Plain JSON (null Where No Peak Was Found)
+            response["results"] = [{fieldName: None if sampleResult[fieldName] != sampleResult[fieldName] else sampleResult[fieldName].item() for fieldName in batchProcessing.resultsType.names}
+                                   for sampleResult in results]
+        except Exception:
+            self.countStat("failed")
+            response["error"] = traceback.format_exc(limit = 3)
+
+        response["runTime"] = time.time() - startTime
+        return response
+
+    def getStatus(self):
+        with self.cacheLock:
+            return dict(self.serviceStats, numWorkers = len(self.workerThreads), queued = self.requestQueue.qsize(), maxQueued = self.requestQueue.maxsize,
+                        cachedFiles = len(self.parsedFiles), cachedAnalyses = len(self.analyzedFiles), upTime = time.time() - self.startTime)
+
+    def clearCache(self):
+        with self.cacheLock:
+            self.parsedFiles.clear()
+            self.analyzedFiles.clear()
+
+
+class analysisRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    The Local API:
+        POST /analyze   JSON Request (See analysisClient.defaultRequest) -> JSON Response (See analysisService.analyzeRequest); 503 if Busy, 504 if it Times Out
+        GET  /status    The Service's Counters
+        POST /clear     Forget the Parsed Files and Analyses
+        POST /shutdown  Stop the Server
+    """
+    # Seconds a Request May Wait for its Analysis
+    requestTimeout = 600
+
+    def sendJSON(self, statusCode, responseData):
+        responseBytes = json.dumps(responseData).encode()
+        self.send_response(statusCode)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(responseBytes)))
+        self.end_headers()
+        self.wfile.write(responseBytes)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self.sendJSON(200, self.server.analysisService.getStatus())
+        else:
+            self.sendJSON(404, {"error": "Unknown Path: " + self.path})
+
+    def do_POST(self):
+        requestBytes = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/analyze":
+            try:
+                analysisRequest = json.loads(requestBytes or b"{}")
+                if not isinstance(analysisRequest, dict):
+                    raise ValueError("The Request Must be a JSON Object")
+                unknownParams = [paramName for paramName in analysisRequest if paramName not in analysisClient.defaultRequest]
+                if len(unknownParams) != 0:
+                    raise ValueError("Unknown Parameters: " + ", ".join(unknownParams))
+            except ValueError as error:
+                self.sendJSON(400, {"error": str(error)})
+                return
+            try:
+                requestFuture = self.server.analysisService.submit(analysisRequest)
+            except serverBusy as error:
+                self.sendJSON(503, {"error": str(error)})
+                return
+            try:
+                self.sendJSON(200, requestFuture.result(self.requestTimeout))
+            except concurrent.futures.TimeoutError:
+                # Drop it From the Queue if No Worker Has Started it Yet
+                requestFuture.cancel()
+                self.sendJSON(504, {"dataFile": analysisRequest.get("dataFile"), "error": "The Analysis Took Longer Than " + str(self.requestTimeout) + " Seconds"})
+        elif self.path == "/clear":
+            self.server.analysisService.clearCache()
+            self.sendJSON(200, self.server.analysisService.getStatus())
+        elif self.path == "/shutdown":
+            self.sendJSON(200, {"stopping": True})
+            threading.Thread(target = self.server.shutdown, daemon = True).start()
+        else:
+            self.sendJSON(404, {"error": "Unknown Path: " + self.path})
+
+    def log_message(self, messageFormat, *messageArgs):
+        if self.server.logRequests:
+            http.server.BaseHTTPRequestHandler.log_message(self, messageFormat, *messageArgs)
+
+
+def makeServer(service, host = "127.0.0.1", port = 8765, logRequests = False):
+    """
+    Returns the HTTP Server of a Service (Start it With serve_forever). Each Connection Gets a Thread, so Clients
+    Only Wait on the Service's Queue.
+    """
+    server = http.server.ThreadingHTTPServer((host, port), analysisRequestHandler)
+    server.daemon_threads = True
+    server.analysisService = service
+    server.logRequests = logRequests
+    return server
@@ -0,0 +1,324 @@
+
+# Basic Modules
+import zlib
+import numpy as np
+# Modules for Filtering
+from scipy.signal import savgol_filter
+
+# Import Python Helper Files
+import calculateBaseline
+import pipelineMetrics
+import sampleSet
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# One Row Per Sample. peakInd/leftCutInd/rightCutInd are -1 (and the Peak Values NaN) if No Peak/Baseline Was Found.
+# The _Low/_High Columns are the Bootstrap Confidence Interval (NaN Unless numReplicates is Set)
+resultsType = np.dtype([
+    ("sampleName", "U64"),
+    ("peakInd", np.int64),
+    ("leftCutInd", np.int64),
+    ("rightCutInd", np.int64),
+    ("peakWavelength", np.float64),
+    ("peakHeight", np.float64),
+    ("peakHeight_Baseline", np.float64),
+    ("peakWavelength_Low", np.float64),
+    ("peakWavelength_High", np.float64),
+    ("peakHeight_Baseline_Low", np.float64),
+    ("peakHeight_Baseline_High", np.float64),
+])
+uncertaintyFields = ["peakWavelength_Low", "peakWavelength_High", "peakHeight_Baseline_Low", "peakHeight_Baseline_High"]
+uncertaintyHeaders = ["Wavelength Low (nm)", "Wavelength High (nm)", "Baseline Subtracted Low (AU)", "Baseline Subtracted High (AU)"]
+# The Results of Several Files Merged: Each Row Tagged With the File it Came From
+summaryType = np.dtype([("fileName", "U256")] + resultsType.descr)
+
+
+class batchProcessing:
+    """
+    Analyzes All the Samples of a File at Once: the Spectra are Stacked into an (numSamples x numWavelengths)
+    Matrix and Filtered Along the Wavelength Axis in One Call.
+    """
+
+    def __init__(self, baselineObject = None):
+        # Shared Baseline Object (Holds the Butterworth Coefficient Cache)
+        self.baselineObject = baselineObject if baselineObject != None else calculateBaseline.bestLinearFit()
+
+        # Filtering Parameters
+        self.cutoffFreq = 0.1        # Butterworth Low Pass Cutoff
+        self.filterOrder = 3         # Butterworth Order
+        self.savgolWindow = 15       # Savitzky-Golay Window Length (Points)
+        self.savgolOrder = 2         # Savitzky-Golay Polynomial Order
+
+        # Warm-Started Baseline Search (Time Series): Seed Each Sample With the Last Sample's Tangent Pair
+        self.warmStart = False
+        self.verifyWarmStart = False     # Check Every Warm Pair Against the Full Search (Always the Cold Pair, but Slower)
+        self.resetWarmStart()
+
+        # Bootstrap Uncertainty (See estimateUncertainty): 0 Replicates Turns it Off
+        self.numReplicates = 0       # Noise Resampled Replicates Per Sample
+        self.confidenceLevel = 0.95  # Width of the Confidence Interval
+        self.replicateRadius = 6     # How Far (Points) a Replicate's Tangent Points Can Move From the Sample's
+        self.randomSeed = 0          # Replicates Only Depend on the Seed and the Sample's Data
+
+    def stackSamples(self, wavelengthList, absorbanceList):
+        """
+        Stacks the Samples into One Wavelength Axis and an (numSamples x numWavelengths) Absorbance Matrix.
+        All Samples Must Share the Same Wavelength Grid (Files Can be Read Straight Into a sampleSet Instead).
+        """
+        return sampleSet.sampleSet.fromArrays(wavelengthList, absorbanceList).getMatrix()
+
+    def filterSamples(self, wavelength, absorbanceMatrix):
+        """
+        Low Pass (Butterworth, Forward-Backward) then Savitzky-Golay Filter Every Sample Along the Wavelength Axis.
+        """
+        # Low Pass Filter
+        samplingFreq = len(wavelength)/(wavelength[-1] - wavelength[0])
+        filteredMatrix = self.baselineObject.butterFilter(absorbanceMatrix, self.cutoffFreq, samplingFreq, order = self.filterOrder, filterType = 'low', axis = 1)
+        # Apply a Savgol Filter
+        with pipelineMetrics.timeStage("savgolFilter", len(filteredMatrix)):
+            filteredMatrix = savgol_filter(filteredMatrix, self.savgolWindow, self.savgolOrder, mode='nearest', axis = 1)
+
+        return filteredMatrix
+
+    def findPeaks(self, wavelength, filteredMatrix, peakWavelengthBounds = None):
+        """
+        Returns the Peak Index of Each Sample (-1 if No Peak Found). None Bounds Search the Whole Spectrum
+        (Like multiPeak.findAllPeaks; bestLinearFit's Own Default Bounds Never Match).
+        """
+        if len(filteredMatrix) == 0:
+            return np.zeros(0, dtype=np.int64)
+        peakWavelengthBounds = peakWavelengthBounds if peakWavelengthBounds != None else [-np.inf, np.inf]
+        return self.baselineObject.findPeaks(wavelength, filteredMatrix, peakWavelengthBounds)
+
+    def resetWarmStart(self):
+        """
+        Forgets the Last Tangent Pair (Call Between Unrelated Sequences of Samples) and Zeros the Warm Start Counters.
+        """
+        self.previousTangentPair = None    # (numWavelengths, leftCutInd, rightCutInd) of the Last Sample With a Baseline
+        self.numWarmAttempted = 0
+        self.numWarmAccepted = 0
+
+    def findBaselines(self, wavelength, filteredMatrix, peakInds):
+        """
+        Returns the (leftCutInd, rightCutInd) Tangent Pair of Each Sample With a Peak (-1 if No Baseline Found).
+        With warmStart, the Samples are Taken as a Sequence (in Row Order) and Each Search Starts From the Last Pair Found.
+        """
+        leftCutInds = np.full(len(filteredMatrix), -1, dtype=np.int64)
+        rightCutInds = np.full(len(filteredMatrix), -1, dtype=np.int64)
+        for sampleNum in np.flatnonzero(peakInds >= 0):
+            if self.warmStart:
+                leftCutInd, rightCutInd = self.findBaseline_Warm(wavelength, filteredMatrix[sampleNum], peakInds[sampleNum])
+            else:
+                leftCutInd, rightCutInd = self.baselineObject.findLinearBaseline(wavelength, filteredMatrix[sampleNum], peakInds[sampleNum])
+            if None not in [leftCutInd, rightCutInd]:
+                leftCutInds[sampleNum] = leftCutInd
+                rightCutInds[sampleNum] = rightCutInd
+
+        return leftCutInds, rightCutInds
+
+    def findBaseline_Warm(self, wavelength, filteredData, peakInd):
+        """
+        One Sample's Tangent Pair, Seeded With the Last Pair Found on the Same Grid (See bestLinearFit.findLinearBaseline_Warm).
+        """
+        seedPair = None
+        if self.previousTangentPair != None and self.previousTangentPair[0] == len(wavelength):
+            seedPair = self.previousTangentPair[1:]
+            self.numWarmAttempted += 1
+        leftCutInd, rightCutInd, warmAccepted = self.baselineObject.findLinearBaseline_Warm(wavelength, filteredData, peakInd, seedPair, verifyWarm = self.verifyWarmStart)
+        self.numWarmAccepted += int(warmAccepted)
+        if None not in [leftCutInd, rightCutInd]:
+            self.previousTangentPair = (len(wavelength), leftCutInd, rightCutInd)
+
+        return leftCutInd, rightCutInd
+
+    def subtractBaselines(self, wavelength, filteredMatrix, leftCutInds, rightCutInds):
+        """
+        Replaces Each Sample's Data Between its Tangent Points With the Tangent Line and Subtracts it.
+        Samples Without a Baseline are Left as Zeros.
+        """
+        baselineMatrix = np.zeros_like(filteredMatrix)
+        foundBaseline = leftCutInds >= 0
+        leftInds = leftCutInds[foundBaseline, None]; rightInds = rightCutInds[foundBaseline, None]
+        filteredData = filteredMatrix[foundBaseline]
+
+        # Tangent Line Through the Two Cut Points
+        rowInds = np.arange(len(filteredData))[:, None]
+        lineSlope = (filteredData[rowInds, rightInds] - filteredData[rowInds, leftInds])/(wavelength[rightInds] - wavelength[leftInds])
+        linearFit = lineSlope*(wavelength - wavelength[leftInds]) + filteredData[rowInds, leftInds]
+        # Piece Together the Baseline and Subtract it
+        pointInds = np.arange(len(wavelength))
+        onTangent = (leftInds <= pointInds) & (pointInds <= rightInds)
+        baselineMatrix[foundBaseline] = np.where(onTangent, filteredData - linearFit, 0)
+
+        return baselineMatrix
+
+    def analyzeSamples(self, wavelength, absorbanceMatrix, sampleNames, peakWavelengthBounds = None, isPeakPositive = True):
+        """
+        --------------------------------------------------------------------------
+        Input Variable Definitions:
+            wavelength: The Shared Wavelength Axis (numWavelengths)
+            absorbanceMatrix: The Raw Spectra (numSamples x numWavelengths)
+            peakWavelengthBounds: [minWavelength, maxWavelength] to Look for Peaks In; None for the Whole Spectrum
+        Returns:
+            results: Structured Array of resultsType, One Row Per Sample
+            filteredMatrix: The Filtered Spectra (Sign Flipped if Not isPeakPositive)
+            baselineMatrix: The Filtered Spectra After Baseline Subtraction
+        --------------------------------------------------------------------------
+        """
+        wavelength = np.asarray(wavelength, dtype=float)
+        absorbanceMatrix = np.asarray(absorbanceMatrix, dtype=float)
+        if not isPeakPositive:
+            absorbanceMatrix = -absorbanceMatrix
+
+        # Filter, Find the Peaks, and Remove the Baselines
+        filteredMatrix = self.filterSamples(wavelength, absorbanceMatrix)
+        peakInds = self.findPeaks(wavelength, filteredMatrix, peakWavelengthBounds)
+        leftCutInds, rightCutInds = self.findBaselines(wavelength, filteredMatrix, peakInds)
+        baselineMatrix = self.subtractBaselines(wavelength, filteredMatrix, leftCutInds, rightCutInds)
+        results = self.getResults(wavelength, sampleNames, filteredMatrix, baselineMatrix, leftCutInds, rightCutInds)
+        # Add the Confidence Intervals
+        if self.numReplicates > 0:
+            self.estimateUncertainty(wavelength, absorbanceMatrix, filteredMatrix, results, peakWavelengthBounds)
+
+        return results, filteredMatrix, baselineMatrix
+
+    def getResults(self, wavelength, sampleNames, filteredMatrix, baselineMatrix, leftCutInds, rightCutInds):
+        """
+        Returns the Results Table: Each Sample's Tallest Baseline Subtracted Point in [leftCutInd, rightCutInd).
+        """
+        results = np.zeros(len(sampleNames), dtype=resultsType)
+        results["sampleName"] = sampleNames
+        results["peakInd"] = -1
+        results["leftCutInd"] = leftCutInds
+        results["rightCutInd"] = rightCutInds
+        for fieldName in ["peakWavelength", "peakHeight", "peakHeight_Baseline"] + uncertaintyFields:
+            results[fieldName] = np.nan
+        foundBaseline = leftCutInds >= 0
+        if foundBaseline.any():
+            pointInds = np.arange(len(wavelength))
+            inPeak = (leftCutInds[foundBaseline, None] <= pointInds) & (pointInds < rightCutInds[foundBaseline, None])
+            resultInds = np.argmax(np.where(inPeak, baselineMatrix[foundBaseline], -np.inf), axis=1)
+            results["peakInd"][foundBaseline] = resultInds
+            results["peakWavelength"][foundBaseline] = wavelength[resultInds]
+            results["peakHeight"][foundBaseline] = filteredMatrix[foundBaseline, resultInds]
+            results["peakHeight_Baseline"][foundBaseline] = baselineMatrix[foundBaseline, resultInds]
+
+        return results
+
+    def getReplicates(self, absorbanceMatrix, filteredMatrix):
+        """
+        Noise Resampled Copies of Each Sample: the Filtered Spectrum Plus the Sample's Own Residual Noise (Raw - Filtered)
+        With Random Signs (a Wild Bootstrap: the Noise Stays as Large as it is at Each Wavelength, Which Varies Across the
+        Spectrum). Returns a (numSamples*numReplicates x numWavelengths) Matrix, Each Sample's Replicates Together.
+        Each Sample's Draws are Seeded From its Data, so They Do Not Depend on the Rest of the Batch.
+        """
+        residualMatrix = absorbanceMatrix - filteredMatrix
+        numPoints = absorbanceMatrix.shape[1]
+        noiseSigns = np.empty((len(absorbanceMatrix), self.numReplicates, numPoints))
+        for sampleNum, absorbance in enumerate(absorbanceMatrix):
+            sampleSeed = np.random.default_rng([self.randomSeed, zlib.crc32(np.ascontiguousarray(absorbance).tobytes())])
+            noiseSigns[sampleNum] = 2*sampleSeed.integers(0, 2, size = (self.numReplicates, numPoints)) - 1
+        replicateMatrix = filteredMatrix[:, None, :] + noiseSigns*residualMatrix[:, None, :]
+
+        return replicateMatrix.reshape(-1, numPoints)
+
+    def estimateUncertainty(self, wavelength, absorbanceMatrix, filteredMatrix, results, peakWavelengthBounds = None, maxReplicateRows = 4096):
+        """
+        Bootstrap Confidence Intervals of Each Sample's Peak: numReplicates Noise Resampled Replicates (getReplicates) are
+        Filtered, Peak Picked, and Baseline Subtracted Together, as One Batched Pass (Each Replicate's Tangent Search Starts
+        From the Sample's Pair: bestLinearFit.findLinearBaselines_Local). Fills the _Low/_High Columns of results In Place;
+        Replicates Without a Peak or Baseline are Left Out of the Interval.
+        """
+        sampleInds = np.flatnonzero(results["leftCutInd"] >= 0)
+        tailPercent = 50*(1 - self.confidenceLevel)
+        samplesPerBatch = max(1, maxReplicateRows//self.numReplicates)
+        with pipelineMetrics.timeStage("estimateUncertainty", len(sampleInds)) as stageRecord:
+            numFailed = 0
+            for batchStart in range(0, len(sampleInds), samplesPerBatch):
+                batchSamples = sampleInds[batchStart:batchStart + samplesPerBatch]
+                # Filter, Find the Peaks, and Remove the Baselines of Every Replicate Together
+                replicateMatrix = self.getReplicates(absorbanceMatrix[batchSamples], filteredMatrix[batchSamples])
+                replicateFiltered = self.filterSamples(wavelength, replicateMatrix)
+                replicatePeaks = self.findPeaks(wavelength, replicateFiltered, peakWavelengthBounds)
+                leftCutInds, rightCutInds = self.baselineObject.findLinearBaselines_Local(wavelength, replicateFiltered, replicatePeaks, np.repeat(results["leftCutInd"][batchSamples], self.numReplicates),
+                                                                                          np.repeat(results["rightCutInd"][batchSamples], self.numReplicates), self.replicateRadius)
+                replicateBaseline = self.subtractBaselines(wavelength, replicateFiltered, leftCutInds, rightCutInds)
+                replicateResults = self.getResults(wavelength, np.zeros(len(replicateMatrix), dtype="U1"), replicateFiltered, replicateBaseline, leftCutInds, rightCutInds)
+                numFailed += int((leftCutInds < 0).sum())
+
+                # The Percentile Intervals
+                for fieldName in ["peakWavelength", "peakHeight_Baseline"]:
+                    replicateValues = replicateResults[fieldName].reshape(len(batchSamples), self.numReplicates)
+                    hasValues = np.isfinite(replicateValues).any(axis=1)
+                    if hasValues.any():
+                        valueLow, valueHigh = np.nanpercentile(replicateValues[hasValues], [tailPercent, 100 - tailPercent], axis=1)
+                        results[fieldName + "_Low"][batchSamples[hasValues]] = valueLow
+                        results[fieldName + "_High"][batchSamples[hasValues]] = valueHigh
+            stageRecord["numReplicates"] = int(len(sampleInds)*self.numReplicates)
+            stageRecord["failedReplicates"] = numFailed
+
+        return results
+
+    def getAnalysisParams(self, peakWavelengthBounds = None, isPeakPositive = True):
+        """
+        Every Setting That Changes a Sample's Result (Used to Key the Result Cache).
+        """
+        analysisParams = {
+            "peakWavelengthBounds": None if peakWavelengthBounds == None else [float(bound) for bound in peakWavelengthBounds],
+            "isPeakPositive": bool(isPeakPositive),
+            "cutoffFreq": self.cutoffFreq,
+            "filterOrder": self.filterOrder,
+            "savgolWindow": self.savgolWindow,
+            "savgolOrder": self.savgolOrder,
+            "minLeftBoundaryInd": self.baselineObject.minLeftBoundaryInd,
+            "minPeakDuration": self.baselineObject.minPeakDuration,
+        }
+        # Settings That are Off by Default are Only Keyed When On (Verified Warm Starts are Not Keyed: They Find the Full Search's Pair)
+        if self.warmStart and not self.verifyWarmStart:
+            analysisParams.update(warmStart = True)
+        if self.numReplicates > 0:
+            analysisParams.update(numReplicates = self.numReplicates, confidenceLevel = self.confidenceLevel, replicateRadius = self.replicateRadius, randomSeed = self.randomSeed)
+
+        return analysisParams
+
+    def analyzeSamples_Cached(self, wavelength, absorbanceMatrix, sampleNames, analysisCache, peakWavelengthBounds = None, isPeakPositive = True):
+        """
+        Same as analyzeSamples, but Samples Already in analysisCache (resultCache) are Loaded Instead of Analyzed,
+        and the Newly Analyzed Samples are Added to the Cache.
+        Also Returns fromCache: True for Each Sample Loaded from the Cache.
+        """
+        wavelength = np.asarray(wavelength, dtype=float)
+        absorbanceMatrix = np.asarray(absorbanceMatrix, dtype=float)
+        analysisParams = self.getAnalysisParams(peakWavelengthBounds, isPeakPositive)
+
+        results = np.zeros(len(sampleNames), dtype=resultsType)
+        filteredMatrix = np.zeros_like(absorbanceMatrix)
+        baselineMatrix = np.zeros_like(absorbanceMatrix)
+        fromCache = np.zeros(len(sampleNames), dtype=bool)
+        # Load the Samples Already Analyzed
+        sampleKeys = [analysisCache.getSampleKey(wavelength, absorbance, analysisParams) for absorbance in absorbanceMatrix]
+        for sampleNum, sampleKey in enumerate(sampleKeys):
+            cachedSample = analysisCache.load(sampleKey)
+            if cachedSample != None:
+                results[sampleNum], filteredMatrix[sampleNum], baselineMatrix[sampleNum] = cachedSample
+                fromCache[sampleNum] = True
+        results["sampleName"] = sampleNames
+
+        # Analyze the Rest Together
+        newSamples = np.flatnonzero(~fromCache)
+        if len(newSamples) != 0:
+            newResults, newFiltered, newBaseline = self.analyzeSamples(wavelength, absorbanceMatrix[newSamples], [sampleNames[sampleNum] for sampleNum in newSamples], peakWavelengthBounds, isPeakPositive)
+            results[newSamples] = newResults; filteredMatrix[newSamples] = newFiltered; baselineMatrix[newSamples] = newBaseline
+            for sampleNum in newSamples:
+                analysisCache.store(sampleKeys[sampleNum], results[sampleNum], filteredMatrix[sampleNum], baselineMatrix[sampleNum])
+            analysisCache.evict()
+
+        return results, filteredMatrix, baselineMatrix, fromCache
+
+    def getAnalyzedRows(self, results):
+        """
+        Returns [sampleName, peakWavelength, peakHeight, peakHeight_Baseline] for Each Sample With a Result (for saveData).
+        """
+        return [[str(row["sampleName"]), float(row["peakWavelength"]), float(row["peakHeight"]), float(row["peakHeight_Baseline"])] for row in results if row["peakInd"] >= 0]
@@ -0,0 +1,231 @@
+
+# Basic Modules
+import os
+import time
+import traceback
+import numpy as np
+# Module to Sort Files in Order
+from natsort import natsorted
+# Modules for Parallel Processing
+import concurrent.futures
+
+# Import Python Helper Files
+import excelProcessing
+import batchProcessing
+import multiPeak
+import resultCache
+import resultStore
+import pipelineMetrics
+import sampleSet
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Merged Results: One Row Per Sample, Tagged With the File it Came From
+summaryType = batchProcessing.summaryType
+
+# Filter Settings That Can be Passed in analysisParams (Attributes of batchProcessing)
+filterParamNames = ["cutoffFreq", "filterOrder", "savgolWindow", "savgolOrder"]
+
+# The Pipeline Kept by Each Worker Process (Reuses the Filter Coefficients Between Files)
+workerPipeline = None
+
+
+def getDefaultParams():
+    """
+    The Analysis Parameters Used by uvVisAnalysis.py.
+    """
+    return {
+        "peakWavelengthBounds": None,    # [minWavelength, maxWavelength]; None Searches the Whole Spectrum
+        "isPeakPositive": True,
+        "cutoffFreq": 0.1,
+        "filterOrder": 3,
+        "savgolWindow": 15,
+        "savgolOrder": 2,
+        "warmStart": False,              # Seed Each Sample's Baseline Search With the Previous Sample's (Time Series Files)
+        "verifyWarmStart": False,        # Check Each Warm Started Pair Against the Full Search (Always the Cold Baseline, but Slower)
+        "applyCalibration": False,       # Apply Each Sample's '//WLCalib' Header to its Wavelengths (wavelengthGrid)
+        "gridStep": None,                # Resample Every File Onto a Grid of This Step (nm); None Keeps the File's Grid
+        "numReplicates": 0,              # Bootstrap Replicates Per Sample for the Confidence Intervals; 0 for None
+        "confidenceLevel": 0.95,
+        "multiPeak": False,              # Also Find Every Peak of Each Sample (multiPeak): Each File Report's "peaks", and a 'Peaks' Sheet With saveFileReports
+        "peakShape": None,               # Deconvolve the Multi-Peak Results Into 'gaussian' or 'lorentzian' Components
+        "minRelativeProminence": 0.1,    # Multi-Peak Mode: Smallest Peak Kept, as a Fraction of the Sample's Most Prominent
+        "maxPeaks": 8,                   # Multi-Peak Mode: Most Peaks Kept Per Sample
+        "saveFileReports": False,        # Write 'Analysis/<File>/<File> Analysis.xlsx' Next to Each File
+        "cacheFolder": None,             # Result Cache Folder (resultCache); None to Analyze Every Sample
+        "storeFolder": None,             # Results Store Folder (resultStore) to Append Each File's Results and Spectra To
+        "storedKeys": {},                # {dataFile: (paramsKey, dataKey)} Already in the Store (resultStore.getStoredKeys(both = True)): Not Stored Again if the Same Spectra (or Samples All From the Cache) Were Stored With the Same Settings
+        "metricsFile": None,             # Record Each Stage's Timings Here (pipelineMetrics.jsonSink); None to Not Record
+        "makePlots": True,               # Return Each File's Spectra so its Plots Can be Rendered (plotResults)
+    }
+
+def findDataFiles(rootDirectory, fileExtensions = (".tsv",)):
+    """
+    Returns Every Data File Under rootDirectory (Recursively), Skipping the Analysis Output Folders.
+    """
+    dataFiles = []
+    for currentFolder, subFolders, fileNames in os.walk(rootDirectory):
+        subFolders[:] = [folderName for folderName in subFolders if folderName != "Analysis"]
+        for fileName in fileNames:
+            if fileName.endswith(tuple(fileExtensions)):
+                dataFiles.append(os.path.join(currentFolder, fileName))
+
+    return natsorted(dataFiles)
+
+def analyzeFile(dataFile, analysisParams):
+    """
+    Analyzes Every Sample in One File. Runs in a Worker Process, so Errors are Returned, Not Raised.
+    Returns a Dictionary With the File's Summary Rows, the Time Spent, the Worker's Process ID, and Any Error.
+    """
+    global workerPipeline
+    startTime = time.time()
+    fileReport = {"dataFile": dataFile, "workerID": os.getpid(), "numSamples": 0, "numCached": 0, "numWarmAttempted": 0, "numWarmAccepted": 0, "summary": np.zeros(0, dtype=summaryType), "peaks": np.zeros(0, dtype=multiPeak.filePeaksType), "error": None}
+    try:
+        # Set Up the Pipeline Once Per Worker
+        if workerPipeline == None:
+            workerPipeline = batchProcessing.batchProcessing()
+        if analysisParams["metricsFile"] != None and not pipelineMetrics.isEnabled():
+            pipelineMetrics.setSink(pipelineMetrics.jsonSink(analysisParams["metricsFile"]))
+        pipelineMetrics.setContext(dataFile = dataFile)
+        for paramName in filterParamNames:
+            setattr(workerPipeline, paramName, analysisParams[paramName])
+        # Each File is its Own Sequence
+        workerPipeline.warmStart = analysisParams["warmStart"]
+        workerPipeline.verifyWarmStart = analysisParams["verifyWarmStart"]
+        workerPipeline.resetWarmStart()
+        workerPipeline.numReplicates = analysisParams["numReplicates"]
+        workerPipeline.confidenceLevel = analysisParams["confidenceLevel"]
+
+        # Extract and Analyze the Data
+        fileSamples = sampleSet.sampleSet.fromFile(dataFile)
+        if len(fileSamples) == 0:
+            raise ValueError("No Samples Found in the File")
+        # Put the Samples on One Grid (Files With Ragged Grids are Always Resampled)
+        if analysisParams["applyCalibration"]:
+            fileSamples = fileSamples.calibrate()
+        fileSamples = fileSamples.resample(gridStep = analysisParams["gridStep"])
+        wavelength, absorbanceMatrix = fileSamples.getMatrix()
+        sampleNames = fileSamples.sampleNames
+        if analysisParams["cacheFolder"] != None:
+            analysisCache = resultCache.resultCache(analysisParams["cacheFolder"])
+            results, filteredMatrix, baselineMatrix, fromCache = workerPipeline.analyzeSamples_Cached(wavelength, absorbanceMatrix, sampleNames, analysisCache, analysisParams["peakWavelengthBounds"], analysisParams["isPeakPositive"])
+            fileReport["numCached"] = int(fromCache.sum())
+        else:
+            results, filteredMatrix, baselineMatrix = workerPipeline.analyzeSamples(wavelength, absorbanceMatrix, sampleNames, analysisParams["peakWavelengthBounds"], analysisParams["isPeakPositive"])
+            fromCache = np.zeros(len(sampleNames), dtype=bool)
+        # Find Every Peak in the Same Filtered Spectra
+        if analysisParams["multiPeak"]:
+            peakAnalysis = multiPeak.multiPeakAnalysis(workerPipeline.baselineObject)
+            peakAnalysis.peakShape = analysisParams["peakShape"]
+            peakAnalysis.minRelativeProminence = analysisParams["minRelativeProminence"]
+            peakAnalysis.maxPeaks = analysisParams["maxPeaks"]
+            peaks = peakAnalysis.analyzeSamples(wavelength, filteredMatrix, sampleNames, analysisParams["peakWavelengthBounds"])
+            fileReport["peaks"] = np.zeros(len(peaks), dtype=multiPeak.filePeaksType)
+            fileReport["peaks"]["fileName"] = dataFile
+            for fieldName in multiPeak.peaksType.names:
+                fileReport["peaks"][fieldName] = peaks[fieldName]
+        fileName = os.path.splitext(os.path.basename(dataFile))[0]
+        outputDirectory = os.path.join(os.path.dirname(dataFile), "Analysis", fileName) + "/"
+
+        # Hand the Spectra Back for Plotting (Cached Samples Were Already Plotted)
+        if analysisParams["makePlots"]:
+            renderSamples = np.array([not fromCache[sampleNum] or not os.path.isfile(outputDirectory + sampleName + ".png") for sampleNum, sampleName in enumerate(sampleNames)], dtype=bool)
+            fileReport["renderJob"] = {"outputDirectory": outputDirectory, "wavelength": wavelength, "absorbanceMatrix": absorbanceMatrix if analysisParams["isPeakPositive"] else -absorbanceMatrix,
+                                       "filteredMatrix": filteredMatrix, "baselineMatrix": baselineMatrix, "results": results, "renderSamples": renderSamples}
+
+        # Save This File's Results and Spectra
+        if analysisParams["storeFolder"] != None:
+            paramsKey = resultStore.getParamsKey(workerPipeline.getAnalysisParams(analysisParams["peakWavelengthBounds"], analysisParams["isPeakPositive"]))
+            dataKey = resultStore.getDataKey(wavelength, absorbanceMatrix)
+            analysisStore = resultStore.resultStore(analysisParams["storeFolder"])
+            if not (analysisStore.isStored(dataFile, paramsKey, dataKey, analysisParams["storedKeys"]) or (fromCache.all() and analysisParams["storedKeys"].get(dataFile, ("",))[0] == paramsKey)):
+                analysisStore.append(dataFile, wavelength, results, filteredMatrix, baselineMatrix, paramsKey, dataKey)
+        # Save This File's Report Like uvVisAnalysis.py
+        if analysisParams["saveFileReports"]:
+            excelProcessing.saveData().saveData(workerPipeline.getAnalyzedRows(results), outputDirectory, fileName + " Analysis.xlsx")
+            if analysisParams["multiPeak"]:
+                peakHeaders, peakRows = multiPeak.getTableRows(peaks)
+                excelProcessing.saveData().saveData(peakRows, outputDirectory, fileName + " Analysis.xlsx", sheetName = "Peaks", headers = peakHeaders)
+
+        # Tag the Results With the File
+        summary = np.zeros(len(results), dtype=summaryType)
+        summary["fileName"] = dataFile
+        for fieldName in batchProcessing.resultsType.names:
+            summary[fieldName] = results[fieldName]
+        fileReport["summary"] = summary
+        fileReport["numSamples"] = len(results)
+        fileReport["numWarmAttempted"] = workerPipeline.numWarmAttempted
+        fileReport["numWarmAccepted"] = workerPipeline.numWarmAccepted
+    except Exception:
+        fileReport["error"] = traceback.format_exc(limit = 3)
+
+    fileReport["runTime"] = time.time() - startTime
+    return fileReport
+
+def runFiles(dataFiles, analysisParams, numWorkers = None):
+    """
+    --------------------------------------------------------------------------
+    Input Variable Definitions:
+        dataFiles: The Files to Analyze
+        analysisParams: Dictionary Like getDefaultParams()
+        numWorkers: Number of Worker Processes (Default: One Per CPU); 1 Runs in This Process
+    Returns:
+        summary: Every File's Results Merged (summaryType), in dataFiles Order
+        fileReports: One Report Per File (See analyzeFile), in dataFiles Order
+    --------------------------------------------------------------------------
+    """
+    numWorkers = numWorkers if numWorkers != None else os.cpu_count()
+    numWorkers = max(1, min(numWorkers, len(dataFiles)))
+
+    # Fan the Files Out to the Workers
+    if numWorkers == 1:
+        fileReports = [analyzeFile(dataFile, analysisParams) for dataFile in dataFiles]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = numWorkers) as workerPool:
+            fileReports = list(workerPool.map(analyzeFile, dataFiles, [analysisParams]*len(dataFiles)))
+
+    # Merge the Results
+    summary = np.concatenate([fileReport["summary"] for fileReport in fileReports]) if len(fileReports) != 0 else np.zeros(0, dtype=summaryType)
+    return summary, fileReports
+
+def getWorkerStats(fileReports):
+    """
+    Returns {workerID: [numFiles, numSamples, runTime]} From the File Reports.
+    """
+    workerStats = {}
+    for fileReport in fileReports:
+        workerStat = workerStats.setdefault(fileReport["workerID"], [0, 0, 0.0])
+        workerStat[0] += 1
+        workerStat[1] += fileReport["numSamples"]
+        workerStat[2] += fileReport["runTime"]
+
+    return workerStats
+
+def printRunReport(fileReports, wallTime):
+    """
+    Prints the Failed Files and the Throughput of Each Worker.
+    """
+    # Report the Files That Failed
+    failedReports = [fileReport for fileReport in fileReports if fileReport["error"] != None]
+    for fileReport in failedReports:
+        print("Failed to Analyze", fileReport["dataFile"])
+        print(fileReport["error"])
+    # Warn About Files Without a Single Peak (Usually Peak Bounds Outside the Spectra)
+    for fileReport in fileReports:
+        if fileReport["error"] == None and fileReport["numSamples"] != 0 and not (fileReport["summary"]["peakInd"] >= 0).any():
+            print("Warning: No Peaks Found in Any of the " + str(fileReport["numSamples"]) + " Samples of " + fileReport["dataFile"] + "; Check the Peak Bounds")
+
+    # Report the Throughput of Each Worker
+    workerStats = getWorkerStats(fileReports)
+    for workerNum, (workerID, (numFiles, numSamples, runTime)) in enumerate(sorted(workerStats.items())):
+        samplesPerSecond = numSamples/runTime if runTime > 0 else 0
+        print("Worker " + str(workerNum) + " (PID " + str(workerID) + "): " + str(numFiles) + " Files, " + str(numSamples) + " Samples in " + str(np.round(runTime, 2)) + " s (" + str(np.round(samplesPerSecond, 1)) + " Samples/s)")
+    totalSamples = sum(fileReport["numSamples"] for fileReport in fileReports)
+    totalCached = sum(fileReport["numCached"] for fileReport in fileReports)
+    totalWarmAttempted = sum(fileReport["numWarmAttempted"] for fileReport in fileReports)
+    if totalWarmAttempted != 0:
+        totalWarmAccepted = sum(fileReport["numWarmAccepted"] for fileReport in fileReports)
+        print("Warm Started Baselines: " + str(totalWarmAccepted) + "/" + str(totalWarmAttempted) + " Accepted (" + str(np.round(100*totalWarmAccepted/totalWarmAttempted, 1)) + "%)")
+    print("Analyzed " + str(len(fileReports) - len(failedReports)) + "/" + str(len(fileReports)) + " Files (" + str(totalSamples) + " Samples, " + str(totalCached) + " From the Cache) in " + str(np.round(wallTime, 2)) + " s")
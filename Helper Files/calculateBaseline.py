@@ -6,13 +6,15 @@ Need to Install in the Python Enviroment Beforehand:
 
 # Import Basic Modules
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 # Import Modules for Filtering
 from scipy.signal import butter
 from scipy.signal import savgol_filter
 # Import Modules to Find Peak
 import scipy.signal
-# Modules to Plot
-import matplotlib.pyplot as plt
+
+# Import Python Helper Files
+import pipelineMetrics
 
 
 # ---------------------------------------------------------------------------#
@@ -23,48 +25,496 @@ class bestLinearFit:
     def __init__(self):
         self.minLeftBoundaryInd = 50
         self.minPeakDuration = 10
+        # Butterworth Coefficients Already Designed: {(cutoffFreq, samplingFreq, order, filterType): sos}
+        self.sosCache = {}
+        # Number of Tangent Pairs Counted Exactly (countWrongSideOfTangent)
+        self.numPairsChecked = 0
+        # Peak Index Ranges Already Found: {(Wavelength Grid, peakWavelengthBounds, minLeftBoundaryInd): (startInd, endInd)}
+        self.peakRangeCache = {}
         
     def butterParams(self, cutoffFreq = [0.1, 7], samplingFreq = 800, order=3, filterType = 'band'):
+        # Reuse the Coefficients if This Filter Was Already Designed
+        filterKey = (tuple(cutoffFreq) if filterType == "band" else cutoffFreq, samplingFreq, order, filterType)
+        if filterKey in self.sosCache:
+            return self.sosCache[filterKey]
+        
         nyq = 0.5 * samplingFreq
         if filterType == "band":
             normal_cutoff = [freq/nyq for freq in cutoffFreq]
         else:
             normal_cutoff = cutoffFreq / nyq
         sos = butter(order, normal_cutoff, btype = filterType, analog = False, output='sos')
+        self.sosCache[filterKey] = sos
         return sos
     
-    def butterFilter(self, data, cutoffFreq, samplingFreq, order = 3, filterType = 'band'):
-        sos = self.butterParams(cutoffFreq, samplingFreq, order, filterType)
-        return scipy.signal.sosfiltfilt(sos, data)
+    def butterFilter(self, data, cutoffFreq, samplingFreq, order = 3, filterType = 'band', axis = -1):
+        with pipelineMetrics.timeStage("butterFilter", np.shape(data)[0] if np.ndim(data) > 1 else 1):
+            sos = self.butterParams(cutoffFreq, samplingFreq, order, filterType)
+            return scipy.signal.sosfiltfilt(sos, data, axis = axis)
     
     def findPeak(self, xData, yData, peakWavelengthBounds = [10, -10], deriv = False):
-        # Find All Peaks in the Data
-        peakInfo = scipy.signal.find_peaks(yData, prominence=10E-10, width=5, distance = 20)
-        # Extract the Peak Information
-        allProminences = peakInfo[1]['prominences']
-        peakIndices = peakInfo[0]
+        # The Derivative Search is Recorded Separately (Inside the Original Call's Time)
+        with pipelineMetrics.timeStage("findPeak_Derivative" if deriv else "findPeak", 0 if deriv else 1) as stageRecord:
+            # Find All Peaks in the Data
+            peakInfo = scipy.signal.find_peaks(yData, prominence=10E-10, width=5, distance = 20)
+            # Extract the Peak Information
+            allProminences = peakInfo[1]['prominences']
+            peakIndices = peakInfo[0]
         
-        # Remove Peaks Nearby Boundaries
-        allProminences = allProminences[np.logical_and(peakWavelengthBounds[0] < xData[peakIndices], xData[peakIndices] < peakWavelengthBounds[1])]
-        peakIndices = peakIndices[np.logical_and(peakWavelengthBounds[0] < xData[peakIndices], xData[peakIndices] < peakWavelengthBounds[1])]
-        # Seperate Out the Stimulus Window
-        allProminences = allProminences[self.minLeftBoundaryInd < peakIndices]
-        peakIndices = peakIndices[self.minLeftBoundaryInd < peakIndices]
-
-        # If Peaks are Found
-        if len(peakIndices) > 0:
-            # Take the Most Prominent Peak
-            bestPeak = allProminences.argmax()
-            peakInd = peakIndices[bestPeak]
-            return peakInd
-        elif not deriv:
-            filteredVelocity = savgol_filter(np.gradient(yData), 251, 3)
-            return self.findPeak(xData, filteredVelocity, deriv = True)
-        # If No Peak is Found, Return None
-        return None
+            # Remove Peaks Nearby Boundaries
+            allProminences = allProminences[np.logical_and(peakWavelengthBounds[0] < xData[peakIndices], xData[peakIndices] < peakWavelengthBounds[1])]
+            peakIndices = peakIndices[np.logical_and(peakWavelengthBounds[0] < xData[peakIndices], xData[peakIndices] < peakWavelengthBounds[1])]
+            # Seperate Out the Stimulus Window
+            allProminences = allProminences[self.minLeftBoundaryInd < peakIndices]
+            peakIndices = peakIndices[self.minLeftBoundaryInd < peakIndices]
+
+            # If Peaks are Found
+            if len(peakIndices) > 0:
+                # Take the Most Prominent Peak
+                bestPeak = allProminences.argmax()
+                peakInd = peakIndices[bestPeak]
+                return peakInd
+            elif not deriv:
+                stageRecord["derivativeFallback"] = True
+                filteredVelocity = savgol_filter(np.gradient(yData), 251, 3)
+                return self.findPeak(xData, filteredVelocity, deriv = True)
+            # If No Peak is Found, Return None
+            return None
         
     
-    def findLinearBaseline(self, xData, yData, peakInd):
+    def getPeakIndexRange(self, xData, peakWavelengthBounds = [10, -10]):
+        """
+        The Indices [startInd, endInd) Where findPeak Keeps Peaks: peakWavelengthBounds[0] < xData < peakWavelengthBounds[1]
+        and Index > minLeftBoundaryInd. Found Once Per Wavelength Grid With searchsorted (xData Must Increase).
+        """
+        xData = np.asarray(xData, dtype=float)
+        rangeKey = (xData.tobytes(), float(peakWavelengthBounds[0]), float(peakWavelengthBounds[1]), self.minLeftBoundaryInd)
+        if rangeKey not in self.peakRangeCache:
+            startInd = max(int(np.searchsorted(xData, peakWavelengthBounds[0], side = "right")), self.minLeftBoundaryInd + 1)
+            endInd = int(np.searchsorted(xData, peakWavelengthBounds[1], side = "left"))
+            self.peakRangeCache[rangeKey] = (startInd, max(startInd, endInd))
+        return self.peakRangeCache[rangeKey]
+
+    def findPeakCandidates(self, xData, yMatrix, peakWavelengthBounds = [10, -10], derivWavelengthBounds = [10, -10]):
+        """
+        Batched findPeak: Finds Every Candidate Peak of Every Spectrum (Row of yMatrix) Inside the Bounds. Spectra With
+        No Candidate Fall Back to the Peaks of Their Smoothed Derivative (Computed Together, Only for Those Spectra).
+        derivWavelengthBounds: The Derivative Search's Bounds. findPeak's Recursion Uses its Default Bounds, so the
+            Default Matches findPeak (an Empty Range: the Fallback Never Finds a Peak, and is Skipped).
+        Returns (sampleInds, peakInds, prominences, isDerivative), Sorted by Sample Then Peak Index.
+        """
+        xData = np.asarray(xData, dtype=float); yMatrix = np.atleast_2d(np.asarray(yMatrix, dtype=float))
+        if not (np.diff(xData) > 0).all():
+            raise ValueError("The Wavelengths Must Increase to Find Peaks in Batch")
+
+        def findRowPeaks(dataMatrix, sampleInds, startInd, endInd, isDerivative):
+            candidateRows = []
+            if startInd >= endInd:
+                return candidateRows
+            for sampleInd in sampleInds:
+                # Find All Peaks in the Data
+                peakIndices, peakInfo = scipy.signal.find_peaks(dataMatrix[sampleInd], prominence=10E-10, width=5, distance = 20)
+                # Keep the Peaks Inside the Index Range
+                keepPeaks = slice(np.searchsorted(peakIndices, startInd), np.searchsorted(peakIndices, endInd))
+                peakIndices = peakIndices[keepPeaks]
+                candidateRows.append((np.full(len(peakIndices), sampleInd), peakIndices, peakInfo['prominences'][keepPeaks], np.full(len(peakIndices), isDerivative)))
+            return candidateRows
+
+        with pipelineMetrics.timeStage("findPeakCandidates", len(yMatrix)) as stageRecord:
+            # Search the Spectra
+            startInd, endInd = self.getPeakIndexRange(xData, peakWavelengthBounds)
+            candidateRows = findRowPeaks(yMatrix, range(len(yMatrix)), startInd, endInd, False)
+            foundPeak = np.zeros(len(yMatrix), dtype=bool)
+            for sampleInds, _, _, _ in candidateRows:
+                foundPeak[sampleInds] = True
+
+            # Search the Derivatives of the Spectra Without a Peak
+            derivSamples = np.flatnonzero(~foundPeak)
+            derivStartInd, derivEndInd = self.getPeakIndexRange(xData, derivWavelengthBounds)
+            stageRecord["derivativeFallbacks"] = len(derivSamples)
+            if len(derivSamples) != 0 and derivStartInd < derivEndInd:
+                filteredVelocity = np.zeros_like(yMatrix)
+                filteredVelocity[derivSamples] = savgol_filter(np.gradient(yMatrix[derivSamples], axis=1), 251, 3, axis=1)
+                candidateRows.extend(findRowPeaks(filteredVelocity, derivSamples, derivStartInd, derivEndInd, True))
+
+        if len(candidateRows) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0), np.zeros(0, dtype=bool)
+        sampleInds, peakInds, prominences, isDerivative = [np.concatenate(candidateColumn) for candidateColumn in zip(*candidateRows)]
+        candidateOrder = np.lexsort((peakInds, sampleInds))
+        return sampleInds[candidateOrder], peakInds[candidateOrder], prominences[candidateOrder], isDerivative[candidateOrder]
+
+    def findPeaks(self, xData, yMatrix, peakWavelengthBounds = [10, -10], derivWavelengthBounds = [10, -10]):
+        """
+        Batched findPeak: the Most Prominent Candidate (findPeakCandidates) of Each Spectrum, -1 Where None Was Found.
+        """
+        yMatrix = np.atleast_2d(yMatrix)
+        sampleInds, peakInds, prominences, _ = self.findPeakCandidates(xData, yMatrix, peakWavelengthBounds, derivWavelengthBounds)
+        bestPeaks = np.full(len(yMatrix), -1, dtype=np.int64)
+        # Most Prominent First (the First Peak on Ties, Like argmax)
+        candidateOrder = np.lexsort((peakInds, -prominences, sampleInds))
+        _, firstCandidates = np.unique(sampleInds[candidateOrder], return_index = True)
+        bestCandidates = candidateOrder[firstCandidates]
+        bestPeaks[sampleInds[bestCandidates]] = peakInds[bestCandidates]
+
+        return bestPeaks
+
+    def countWrongSideOfTangent(self, xData, yData, leftInds, rightInds, maxWindowPoints = 2**20):
+        """
+        Counts the Points Below the Line Through Each (leftInd, rightInd) Pair, Exactly as findLinearBaseline_Exhaustive.
+        Each Pair is Checked Over [leftInd - buffer, rightInd + buffer) with buffer = (rightInd - leftInd)//4.
+        """
+        numWrongSideOfTangent = np.zeros(len(leftInds), dtype=int)
+        self.numPairsChecked += len(leftInds)
+        if len(leftInds) == 0:
+            return numWrongSideOfTangent
+        # Initialize range of data to check
+        checkPeakBuffer = (rightInds - leftInds)//4
+        windowStart = np.maximum(0, leftInds - checkPeakBuffer)
+        windowEnd = np.minimum(len(yData), rightInds + checkPeakBuffer)
+        # Draw a Linear Line Between the Points
+        lineSlope = (yData[leftInds] - yData[rightInds])/(xData[leftInds] - xData[rightInds])
+        slopeIntercept = yData[leftInds] - lineSlope*xData[leftInds]
+        
+        # Check the Pairs in Batches of Padded Windows
+        windowOffsets = np.arange((windowEnd - windowStart).max())
+        batchSize = max(1, maxWindowPoints//len(windowOffsets))
+        for batchStart in range(0, len(leftInds), batchSize):
+            batch = slice(batchStart, batchStart + batchSize)
+            pointInds = windowStart[batch, None] + windowOffsets
+            inWindow = pointInds < windowEnd[batch, None]
+            pointInds = np.minimum(pointInds, len(yData) - 1)
+            # Find the Number of Points Above the Tangent Line
+            linearFit = lineSlope[batch, None]*xData[pointInds] + slopeIntercept[batch, None]
+            numWrongSideOfTangent[batch] = np.count_nonzero((linearFit - yData[pointInds] > 0) & inWindow, axis=1)
+        
+        return numWrongSideOfTangent
+    
+    def boundWrongSideOfTangent(self, xData, yData, leftInds, rightInds, countBelow, binScale, splitShift = 0, maxPairs = 2**15):
+        """
+        Lower Bound on countWrongSideOfTangent Using Prefix Counts (No Per-Point Work).
+        The Window is Cut into Segments (Left Buffer, 2**splitShift Interior Pieces, Right Buffer). On Each Segment the
+        Line is Above Its Lowest Endpoint, so Every Point Below That Value is Wrong; countBelow[k, j] Counts the Points
+        Before Index k in Absorbance Bins Below j.
+        """
+        numBins = countBelow.shape[1] - 1
+        flatCountBelow = countBelow.ravel()
+        lowerBound = np.zeros(len(leftInds), dtype=int)
+        # Initialize range of data to check
+        checkPeakBuffer = (rightInds - leftInds)//4
+        windowStart = np.maximum(0, leftInds - checkPeakBuffer)
+        windowEnd = np.minimum(len(yData), rightInds + checkPeakBuffer)
+        # Draw a Linear Line Between the Points
+        lineSlope = (yData[leftInds] - yData[rightInds])/(xData[leftInds] - xData[rightInds])
+        slopeIntercept = yData[leftInds] - lineSlope*xData[leftInds]
+        # Margin for Rounding in the Exact Check
+        roundingMargin = 1E-9*(np.abs(lineSlope)*np.abs(xData).max() + np.abs(slopeIntercept) + 1)
+        
+        splitFractions = np.arange(1, 2**splitShift)
+        for batchStart in range(0, len(leftInds), maxPairs):
+            batch = slice(batchStart, batchStart + maxPairs)
+            # Segment Edges: Window Start, Interior Splits Between the Pair, Right Point, Window End
+            interiorStart = leftInds[batch, None] + 1
+            interiorSplits = interiorStart + (((rightInds[batch, None] - interiorStart)*splitFractions) >> splitShift)
+            segmentEdges = np.concatenate((windowStart[batch, None], interiorStart, interiorSplits, rightInds[batch, None], windowEnd[batch, None]), axis=1)
+            segmentStart = segmentEdges[:, :-1]; segmentEnd = segmentEdges[:, 1:]
+            # Lowest Value of the Line on Each Segment
+            startFit = lineSlope[batch, None]*xData[segmentStart] + slopeIntercept[batch, None]
+            endFit = lineSlope[batch, None]*xData[np.maximum(segmentEnd - 1, segmentStart)] + slopeIntercept[batch, None]
+            segmentFloor = np.minimum(startFit, endFit) - roundingMargin[batch, None]
+            # Count the Points in Bins Wholly Below the Line
+            floorBin = np.clip((segmentFloor - yData.min())*binScale, 0, numBins - 1).astype(int)
+            segmentCounts = flatCountBelow[segmentEnd*(numBins + 1) + floorBin] - flatCountBelow[segmentStart*(numBins + 1) + floorBin]
+            lowerBound[batch] = segmentCounts.sum(axis=1)
+        
+        return lowerBound
+    
+    def searchTangentPairs(self, xData, yData, pairOrder, leftInds, rightInds, lowerBound, maxBadPoints, bestPair = None, maxPairs = None):
+        """
+        Exactly Checks Candidate Pairs in pairOrder, Which is Sorted by (lowerBound, -span, rightInd).
+        Stops Once No Remaining Pair Can Beat bestPair = ((numWrongSide, -span, rightInd), pairIndex).
+        Returns the Best Pair and Whether the Search Was Exhausted.
+        """
+        numPairs = len(pairOrder) if maxPairs == None else min(len(pairOrder), maxPairs)
+        batchStart = 0; batchSize = 64
+        while batchStart < numPairs:
+            candidates = pairOrder[batchStart:min(batchStart + batchSize, numPairs)]
+            batchStart += batchSize; batchSize *= 2
+            # If the Best Remaining Bound Cannot Win, Stop
+            firstPair = candidates[0]
+            if bestPair != None and (lowerBound[firstPair], leftInds[firstPair] - rightInds[firstPair], rightInds[firstPair]) > bestPair[0]:
+                return bestPair, True
+            
+            # Count the Wrong Side Points for the Batch
+            numWrongSide = self.countWrongSideOfTangent(xData, yData, leftInds[candidates], rightInds[candidates])
+            goodPairs = numWrongSide < maxBadPoints[candidates]
+            if goodPairs.any():
+                candidates = candidates[goodPairs]; numWrongSide = numWrongSide[goodPairs]
+                # Fewest Wrong Side Points, Then Widest Span, Then the First Right Index
+                bestCandidate = np.lexsort((rightInds[candidates], leftInds[candidates] - rightInds[candidates], numWrongSide))[0]
+                pairIndex = candidates[bestCandidate]
+                candidateKey = (int(numWrongSide[bestCandidate]), int(leftInds[pairIndex] - rightInds[pairIndex]), int(rightInds[pairIndex]))
+                if bestPair == None or candidateKey < bestPair[0]:
+                    bestPair = (candidateKey, pairIndex)
+        
+        return bestPair, numPairs == len(pairOrder)
+    
+    def getTangentCandidates(self, numPoints, peakInd, leftRange = None, rightRange = None):
+        """
+        Every (leftInd, rightInd) Pair Around the Peak That Can be a Tangent Pair: peakInd - 2 >= leftInd > minLeftBoundaryInd,
+        peakInd + 2 <= rightInd < numPoints, and rightInd - leftInd > minPeakDuration. leftRange/rightRange: Optional
+        [startInd, endInd] Limits. Returns (leftInds, rightInds, maxBadPoints), Where a Pair Needs Fewer Than maxBadPoints
+        Points Below its Line.
+        """
+        leftStart = self.minLeftBoundaryInd + 1; leftEnd = peakInd - 2
+        rightStart = peakInd + 2; rightEnd = numPoints - 1
+        if leftRange != None:
+            leftStart = max(leftStart, leftRange[0]); leftEnd = min(leftEnd, leftRange[1])
+        if rightRange != None:
+            rightStart = max(rightStart, rightRange[0]); rightEnd = min(rightEnd, rightRange[1])
+        rightInds, leftInds = np.meshgrid(np.arange(rightStart, rightEnd + 1), np.arange(leftEnd, leftStart - 1, -1), indexing='ij')
+        rightInds = rightInds.ravel(); leftInds = leftInds.ravel()
+        goodSpan = rightInds - leftInds > self.minPeakDuration
+        rightInds = rightInds[goodSpan]; leftInds = leftInds[goodSpan]
+        # Define a threshold for distinguishing good/bad lines
+        checkPeakBuffer = (rightInds - leftInds)//4
+        maxBadPoints = (np.minimum(numPoints, rightInds + checkPeakBuffer) - np.maximum(0, leftInds - checkPeakBuffer))//10
+
+        return leftInds, rightInds, maxBadPoints
+
+    def getBinCounts(self, yData, numBins = 256):
+        """
+        Prefix Counts of the Points in Each Absorbance Bin (for boundWrongSideOfTangent): Returns (countBelow, binScale).
+        """
+        yRange = yData.max() - yData.min()
+        binScale = numBins/yRange if yRange > 0 else 0
+        pointBins = np.minimum((yData - yData.min())*binScale, numBins - 1).astype(int)
+        countBelow = np.zeros((len(yData) + 1, numBins + 1), dtype=np.int32)
+        np.cumsum(pointBins[:, None] < np.arange(numBins + 1), axis=0, out=countBelow[1:])
+
+        return countBelow, binScale
+
+    def searchTangentCandidates(self, xData, yData, leftInds, rightInds, maxBadPoints, countBelow, binScale, splitShifts = (0, 2, 4), bestPair = None):
+        """
+        The Best Candidate Pair: Fewest Points Below the Line, Then the Widest Span, Then the First Right Index.
+        Cheap Prefix-Count Lower Bounds (boundWrongSideOfTangent) Discard the Pairs That Cannot Beat the Best Exact Count
+        Found so Far; Only the Rest are Counted Exactly. Returns ((numWrongSide, -span, rightInd), pairIndex), or None.
+        bestPair: A Good Candidate Already Counted Exactly (Same Form as the Return), to Prune Against From the Start
+        """
+        lowerBound = np.zeros(len(leftInds), dtype=int)
+        alivePairs = np.arange(len(leftInds))
+        for splitShift in splitShifts:
+            # Tighten the Bounds, Dropping Pairs That Cannot Win
+            lowerBound[alivePairs] = self.boundWrongSideOfTangent(xData, yData, leftInds[alivePairs], rightInds[alivePairs], countBelow, binScale, splitShift)
+            keepPairs = lowerBound[alivePairs] < maxBadPoints[alivePairs]
+            if bestPair != None:
+                (bestNumWrong, bestNegSpan, bestRightInd), _ = bestPair
+                aliveBound = lowerBound[alivePairs]; aliveNegSpan = leftInds[alivePairs] - rightInds[alivePairs]
+                keepPairs &= (aliveBound < bestNumWrong) | ((aliveBound == bestNumWrong) & ((aliveNegSpan < bestNegSpan) | ((aliveNegSpan == bestNegSpan) & (rightInds[alivePairs] <= bestRightInd))))
+            alivePairs = alivePairs[keepPairs]
+        
+            # Exactly Check the Most Promising Pairs (All Remaining Pairs on the Last Pass)
+            pairOrder = alivePairs[np.lexsort((rightInds[alivePairs], leftInds[alivePairs] - rightInds[alivePairs], lowerBound[alivePairs]))]
+            lastPass = splitShift == splitShifts[-1]
+            bestPair, searchFinished = self.searchTangentPairs(xData, yData, pairOrder, leftInds, rightInds, lowerBound, maxBadPoints, bestPair, None if lastPass else 64)
+            if searchFinished:
+                break
+
+        return bestPair
+
+    def findLinearBaseline(self, xData, yData, peakInd, numBins = 256, splitShifts = (0, 2, 4)):
+        """
+        Finds the Same Tangent Pair as findLinearBaseline_Exhaustive: Fewest Points Below the Line, Then the
+        Widest Span (First Found on Ties), With rightInd - leftInd > minPeakDuration and leftInd > minLeftBoundaryInd.
+        Instead of Checking Every Pair, Cheap Prefix-Count Lower Bounds (boundWrongSideOfTangent) Discard the Pairs
+        That Cannot Beat the Best Exact Count Found so Far; Only the Rest are Counted Exactly.
+        """
+        with pipelineMetrics.timeStage("findLinearBaseline", 1) as stageRecord:
+            numPairsChecked = self.numPairsChecked
+            xData = np.asarray(xData, dtype=float); yData = np.asarray(yData, dtype=float)
+            # All Index Pairs on the Left and Right of the Peak
+            leftInds, rightInds, maxBadPoints = self.getTangentCandidates(len(yData), peakInd)
+            if int(len(xData)/10) == 0 or len(leftInds) == 0:
+                return None, None
+
+            # Search the Pairs
+            countBelow, binScale = self.getBinCounts(yData, numBins)
+            bestPair = self.searchTangentCandidates(xData, yData, leftInds, rightInds, maxBadPoints, countBelow, binScale, splitShifts)
+            # Record How Many Pairs the Search Needed
+            stageRecord["candidatePairs"] = int(len(leftInds))
+            stageRecord["tangentPairs"] = self.numPairsChecked - numPairsChecked
+            
+            # If Nothing Found, Return None
+            if bestPair == None:
+                return None, None
+            return int(leftInds[bestPair[1]]), int(rightInds[bestPair[1]])
+
+    def findLinearBaseline_Warm(self, xData, yData, peakInd, seedPair, startRadius = 4, maxRadius = 64, numBins = 256, splitShifts = (0, 2, 4), verifyWarm = False):
+        """
+        Warm-Started findLinearBaseline for Sequences of Similar Spectra (Time Series): Starts From the Previous
+        Sample's Tangent Pair (seedPair) and Searches the Pairs Within a Radius of it, Doubling the Radius While the
+        Best Pair Sits on the Neighborhood's Edge With No Points Below its Line. A Local Best With No Points Below its Line, Away From the Edges, is
+        Taken Without the Full Search (a Wider Pair Elsewhere Could Tie it, so it May Differ From findLinearBaseline's).
+        Otherwise, or With verifyWarm, the Local Best Seeds the Full Search (searchTangentCandidates), Whose Bounds
+        Discard Almost Every Pair Against it, and the Result is Always findLinearBaseline's Pair.
+        Returns (leftCutInd, rightCutInd, warmAccepted); warmAccepted is True When the Local Best Held Up.
+        """
+        with pipelineMetrics.timeStage("findLinearBaseline_Warm", 1) as stageRecord:
+            numPairsChecked = self.numPairsChecked
+            xData = np.asarray(xData, dtype=float); yData = np.asarray(yData, dtype=float)
+            stageRecord["warmAccepted"] = False
+            stageRecord["fullSearchSkipped"] = False
+            # The Whole Search Space
+            leftStart = self.minLeftBoundaryInd + 1; leftEnd = peakInd - 2
+            rightStart = peakInd + 2; rightEnd = len(yData) - 1
+            if seedPair == None or None in seedPair or leftEnd < leftStart or rightEnd < rightStart or int(len(xData)/10) == 0:
+                return self.findLinearBaseline(xData, yData, peakInd, numBins, splitShifts) + (False,)
+            seedLeft = min(max(seedPair[0], leftStart), leftEnd); seedRight = min(max(seedPair[1], rightStart), rightEnd)
+            countBelow, binScale = self.getBinCounts(yData, numBins)
+
+            # Search the Neighborhood of the Seed
+            localPair = None; onEdge = True; searchRadius = startRadius
+            while searchRadius <= maxRadius:
+                leftRange = [max(leftStart, seedLeft - searchRadius), min(leftEnd, seedLeft + searchRadius)]
+                rightRange = [max(rightStart, seedRight - searchRadius), min(rightEnd, seedRight + searchRadius)]
+                leftInds, rightInds, maxBadPoints = self.getTangentCandidates(len(yData), peakInd, leftRange, rightRange)
+                bestPair = self.searchTangentCandidates(xData, yData, leftInds, rightInds, maxBadPoints, countBelow, binScale, splitShifts) if len(leftInds) != 0 else None
+                searchRadius *= 2
+                # No Good Pair Near the Seed: the Spectrum Moved, so Go Straight to the Full Search
+                if bestPair == None:
+                    break
+                localPair = (bestPair[0], int(leftInds[bestPair[1]]), int(rightInds[bestPair[1]]))
+                # Widen the Neighborhood if the Best Pair is on an Edge That Can Move (Only a Pair With No Points Below
+                # its Line Can Skip the Full Search, so a Worse One Goes Straight to it)
+                onEdge = (localPair[1] in leftRange and leftRange != [leftStart, leftEnd]) or (localPair[2] in rightRange and rightRange != [rightStart, rightEnd])
+                if not onEdge or localPair[0][0] != 0:
+                    break
+
+            # No Point Below the Line and Inside the Neighborhood: Take the Local Best
+            if not verifyWarm and localPair != None and localPair[0][0] == 0 and not onEdge:
+                stageRecord["tangentPairs"] = self.numPairsChecked - numPairsChecked
+                stageRecord["warmAccepted"] = stageRecord["fullSearchSkipped"] = True
+                return localPair[1], localPair[2], True
+
+            # Check the Local Best Against Every Pair (Most are Discarded by Their Bounds Alone)
+            leftInds, rightInds, maxBadPoints = self.getTangentCandidates(len(yData), peakInd)
+            if len(leftInds) == 0:
+                return None, None, False
+            seedBest = None
+            if localPair != None:
+                seedBest = (localPair[0], int(np.flatnonzero((leftInds == localPair[1]) & (rightInds == localPair[2]))[0]))
+            bestPair = self.searchTangentCandidates(xData, yData, leftInds, rightInds, maxBadPoints, countBelow, binScale, splitShifts, seedBest)
+            stageRecord["candidatePairs"] = int(len(leftInds))
+            stageRecord["tangentPairs"] = self.numPairsChecked - numPairsChecked
+            if bestPair == None:
+                return None, None, False
+            stageRecord["warmAccepted"] = bool(seedBest != None and bestPair[1] == seedBest[1])
+
+            return int(leftInds[bestPair[1]]), int(rightInds[bestPair[1]]), stageRecord["warmAccepted"]
+
+    def findLinearBaselines_Peaks(self, xData, yData, peakInds, numBins = 256, splitShifts = (0, 2, 4)):
+        """
+        findLinearBaseline Under Several Peaks of One Spectrum, Taken Left to Right. A Peak's Candidate Pairs Only Differ
+        From the Last Peak's by the Pairs Whose Left Point Lies Between the Two Peaks, so When the Last Peak's Pair Also
+        Spans This Peak (Peaks in the Same Band), Only Those Pairs are Searched, Against the Last Pair; Otherwise the
+        Peak Gets the Full Search. Either Way Each Peak Gets findLinearBaseline's Pair.
+        Returns (leftCutInds, rightCutInds), -1 Where No Baseline Was Found.
+        """
+        xData = np.asarray(xData, dtype=float); yData = np.asarray(yData, dtype=float)
+        peakInds = np.asarray(peakInds, dtype=np.int64)
+        leftCutInds = np.full(len(peakInds), -1, dtype=np.int64); rightCutInds = np.full(len(peakInds), -1, dtype=np.int64)
+        if int(len(xData)/10) == 0 or len(peakInds) == 0:
+            return leftCutInds, rightCutInds
+        with pipelineMetrics.timeStage("findLinearBaselines_Peaks", 1, numPeaks = len(peakInds)) as stageRecord:
+            numPairsChecked = self.numPairsChecked
+            countBelow, binScale = self.getBinCounts(yData, numBins)
+
+            # (peakInd, pairKey, leftCutInd, rightCutInd) of the Last Peak With a Baseline
+            lastPeak = None; numFullSearches = 0
+            for peakNum in np.argsort(peakInds, kind = "stable"):
+                peakInd = int(peakInds[peakNum])
+                if lastPeak != None and lastPeak[3] >= peakInd + 2:
+                    # The Last Pair is the Best of the Pairs Both Peaks Share: Only Check the New Ones Against it
+                    leftInds, rightInds, maxBadPoints = self.getTangentCandidates(len(yData), peakInd, leftRange = [lastPeak[0] - 1, peakInd - 2])
+                    seedBest = (lastPeak[1], -1)
+                else:
+                    leftInds, rightInds, maxBadPoints = self.getTangentCandidates(len(yData), peakInd)
+                    seedBest = None; numFullSearches += 1
+                bestPair = self.searchTangentCandidates(xData, yData, leftInds, rightInds, maxBadPoints, countBelow, binScale, splitShifts, seedBest) if len(leftInds) != 0 else seedBest
+                # No Baseline: the Last Pair Still Seeds the Next Peak
+                if bestPair == None:
+                    continue
+                if bestPair[1] == -1:
+                    lastPeak = (peakInd,) + lastPeak[1:]
+                else:
+                    lastPeak = (peakInd, bestPair[0], int(leftInds[bestPair[1]]), int(rightInds[bestPair[1]]))
+                leftCutInds[peakNum] = lastPeak[2]; rightCutInds[peakNum] = lastPeak[3]
+            stageRecord["fullSearches"] = numFullSearches
+            stageRecord["tangentPairs"] = self.numPairsChecked - numPairsChecked
+
+        return leftCutInds, rightCutInds
+
+    def findLinearBaselines_Local(self,xData, yMatrix, peakInds, seedLefts, seedRights, searchRadius = 6, maxWindowPoints = 2**20):
+        """
+        Batched Tangent Search for Many Similar Spectra at Once (e.g. the Noise Replicates of a Sample): Each Row Only
+        Checks the Pairs Within searchRadius of its Seed Pair, but Every Row's Pairs are Counted Exactly (Same Criteria
+        and Tie Breaks as findLinearBaseline) in One Array Operation. Rows Without a Peak, a Seed, or a Good Pair in
+        Their Neighborhood Get -1. Returns (leftCutInds, rightCutInds).
+        """
+        xData = np.asarray(xData, dtype=float); yMatrix = np.atleast_2d(np.asarray(yMatrix, dtype=float))
+        numRows, numPoints = yMatrix.shape
+        leftCutInds = np.full(numRows, -1, dtype=np.int64); rightCutInds = np.full(numRows, -1, dtype=np.int64)
+        with pipelineMetrics.timeStage("findLinearBaselines_Local", numRows) as stageRecord:
+            # Every Pair Within searchRadius of the Seed
+            radiusOffsets = np.arange(-searchRadius, searchRadius + 1)
+            leftOffsets, rightOffsets = [pairOffsets.ravel() for pairOffsets in np.meshgrid(radiusOffsets, radiusOffsets, indexing='ij')]
+            leftInds = np.asarray(seedLefts)[:, None] + leftOffsets
+            rightInds = np.asarray(seedRights)[:, None] + rightOffsets
+            peakInds = np.asarray(peakInds)[:, None]
+            goodPairs = (peakInds >= 0) & (np.asarray(seedLefts)[:, None] >= 0) & (self.minLeftBoundaryInd < leftInds) & (leftInds <= peakInds - 2) \
+                        & (peakInds + 2 <= rightInds) & (rightInds < numPoints) & (rightInds - leftInds > self.minPeakDuration)
+            leftInds = np.clip(leftInds, 0, numPoints - 1); rightInds = np.clip(rightInds, 0, numPoints - 1)
+            # Initialize range of data to check
+            checkPeakBuffer = (rightInds - leftInds)//4
+            windowStart = np.maximum(0, leftInds - checkPeakBuffer)
+            windowEnd = np.minimum(numPoints, rightInds + checkPeakBuffer)
+            maxBadPoints = (windowEnd - windowStart)//10
+            windowLength = max(1, (windowEnd - windowStart).max())
+            # Every Window as a View (Padded so Windows Can Run Past the Last Point)
+            xWindows = sliding_window_view(np.concatenate((xData, np.repeat(xData[-1:], windowLength))), windowLength)
+
+            # Count the Points Below Each Line, a Batch of Rows at a Time
+            numWrongSideOfTangent = np.zeros(leftInds.shape, dtype=int)
+            rowInds = np.arange(numRows)[:, None]
+            batchSize = max(1, maxWindowPoints//(len(leftOffsets)*windowLength))
+            for batchStart in range(0, numRows, batchSize):
+                batch = slice(batchStart, batchStart + batchSize)
+                yData = yMatrix[batch]; batchRows = rowInds[:len(yData)]
+                yWindows = sliding_window_view(np.concatenate((yData, np.repeat(yData[:, -1:], windowLength, axis=1)), axis=1), windowLength, axis=1)
+                # Only the Batch's Windows are Masked (the Mask of Every Row at Once is as Large as the Search)
+                inWindow = np.arange(windowLength) < (windowEnd[batch] - windowStart[batch])[:, :, None]
+                # Draw a Linear Line Between the Points
+                lineSlope = (yData[batchRows, leftInds[batch]] - yData[batchRows, rightInds[batch]])/(xData[leftInds[batch]] - xData[rightInds[batch]])
+                slopeIntercept = yData[batchRows, leftInds[batch]] - lineSlope*xData[leftInds[batch]]
+                linearFit = lineSlope[:, :, None]*xWindows[windowStart[batch]] + slopeIntercept[:, :, None]
+                numWrongSideOfTangent[batch] = np.count_nonzero((linearFit - yWindows[batchRows, windowStart[batch]] > 0) & inWindow, axis=2)
+
+            # Fewest Wrong Side Points, Then Widest Span, Then the First Right Index
+            goodPairs &= numWrongSideOfTangent < maxBadPoints
+            pairScore = (numWrongSideOfTangent*(numPoints + 1) + (leftInds - rightInds + numPoints))*(numPoints + 1) + rightInds
+            pairScore[~goodPairs] = np.iinfo(pairScore.dtype).max
+            bestPairs = np.argmin(pairScore, axis=1)
+            foundPair = goodPairs[np.arange(numRows), bestPairs]
+            leftCutInds[foundPair] = leftInds[foundPair, bestPairs[foundPair]]
+            rightCutInds[foundPair] = rightInds[foundPair, bestPairs[foundPair]]
+            stageRecord["tangentPairs"] = int(numRows*len(leftOffsets))
+            stageRecord["numFound"] = int(foundPair.sum())
+
+        return leftCutInds, rightCutInds
+
+    def findLinearBaseline_Exhaustive(self, xData, yData, peakInd):
+        """
+        Reference Implementation of findLinearBaseline: Checks Every Tangent Pair in Python Loops.
+        """
         # Define a threshold for distinguishing good/bad lines
         maxBadPointsTotal = int(len(xData)/10)
         # Store Possibly Good Tangent Indexes
@@ -99,6 +549,8 @@ class bestLinearFit:
         return None, None
     
     def plotLinearFit(self, leftCutInd, rightCutInd, peakInd):
+        # Modules to Plot (Only Loaded Here: the Analysis Does Not Need Them)
+        import matplotlib.pyplot as plt
         plt.figure()
         plt.plot(self.potential, self.current);
         plt.plot(self.potential[[leftCutInd, rightCutInd, peakInd]],  self.current[[leftCutInd, rightCutInd, peakInd]], 'o');
@@ -109,6 +561,3 @@ class bestLinearFit:
         plt.plot(self.potential, self.current, label = "True Data")
         plt.plot(self.potential, self.baseline, label="Baseline Current")
         plt.show()
-        
-
-
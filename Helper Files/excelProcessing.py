@@ -8,14 +8,15 @@ Need to Install on the Anaconda Prompt:
 
 # Basic Modules
 import os
+import re
 import sys
-# Read/Write to Excel
+import itertools
+import numpy as np
+# Read/Write to CSV (openpyxl and pyexcel are Slow to Import: Only Loaded by the Methods Reading/Writing Excel)
 import csv
-import pyexcel
-import openpyxl as xl
-# Openpyxl Styles
-from openpyxl.styles import Alignment
-from openpyxl.styles import Font
+
+# Import Python Helper Files
+import pipelineMetrics
 
 
 class dataProcessing:        
@@ -39,6 +40,7 @@ class dataProcessing:
         # Create Output File Directory to Save Data ONLY If None Exists
         os.makedirs(outputFolder, exist_ok = True)
         # Convert '.xls' to '.xlsx'
+        import pyexcel
         filename = os.path.basename(excelFile)
         newExcelFile = outputFolder + filename + "x"
         pyexcel.save_as(file_name = excelFile, dest_file_name = newExcelFile, logfile=open(os.devnull, 'w'))
@@ -61,24 +63,22 @@ class dataProcessing:
         inputFile: The Input TXT/CSV File to Convert XLSX
         excelFile: The Output Excel File Name (XLSX)
         """
+        import openpyxl as xl
         # If the File is Not Already Converted: Convert the CSV to XLSX
         if not os.path.isfile(excelFile) or overwriteXL:
-            # Make Excel WorkBook
-            xlWorkbook = xl.Workbook()
-            xlWorksheet = xlWorkbook.active
+            # Stream the Rows Into a Write-Only WorkBook (Never Holds the Whole Sheet in Memory)
+            xlWorkbook = xl.Workbook(write_only = True)
+            xlWorksheet = xlWorkbook.create_sheet()
             # Write the Data from the CSV File to the Excel WorkBook
             with open(inputFile, "r") as inputData:
-                inReader = csv.reader(inputData, delimiter = excelDelimiter)
-                with open(excelFile, 'w+', newline=''):
-                    for row in inReader:
-                        xlWorksheet.append(row)
+                for row in csv.reader(inputData, delimiter = excelDelimiter):
+                    xlWorksheet.append(row)
             # Save as New Excel File
             xlWorkbook.save(excelFile)
-        # Else Load the Data from the Excel File
-        else:
-            # Load the Data from the Excel File
-            xlWorkbook = xl.load_workbook(excelFile, data_only=True, read_only=True)
-            xlWorksheet = xlWorkbook.worksheets[testSheetNum]
+        
+        # Load the Data from the Excel File
+        xlWorkbook = xl.load_workbook(excelFile, data_only=True, read_only=True)
+        xlWorksheet = xlWorkbook.worksheets[testSheetNum]
         
         # Return Excel Sheet
         return xlWorkbook, xlWorksheet
@@ -87,6 +87,8 @@ class dataProcessing:
 class saveData():
     
     def addExcelAesthetics(self, WB_worksheet):
+        import openpyxl as xl
+        from openpyxl.styles import Alignment, Font
         # Center the Data in the Cells
         align = Alignment(horizontal='center',vertical='center',wrap_text=True)        
         for column_cells in WB_worksheet.columns:
@@ -101,40 +103,137 @@ class saveData():
         
         return WB_worksheet
     
-    def saveData(self, dataToSave, saveDataFolder, saveExcelName, sheetName = "UV-Vis Analysis"):
+    def saveData(self, dataToSave, saveDataFolder, saveExcelName, sheetName = "UV-Vis Analysis", headers = ["Sample Name", "Wavelength (nm)", "Absorbance (AU)", "Baseline Subtracted (AU)"]):
         print("Saving the Data")
         # Create Output File Directory to Save Data: If Not Already Created
         os.makedirs(saveDataFolder, exist_ok=True)
         
         # Create Path to Save the Excel File
         excelFile = saveDataFolder + saveExcelName
-        
-        # If the File is Not Present: Create it
-        if not os.path.isfile(excelFile):
-            # Make Excel WorkBook
-            WB = xl.Workbook()
-            WB_worksheet = WB.active 
-            WB_worksheet.title = sheetName
-        else:
+        if os.path.isfile(excelFile):
             print("Excel File Already Exists. Adding New Sheet to File")
-            WB = xl.load_workbook(excelFile)
-            WB_worksheet = WB.create_sheet(sheetName)
-            
-        # Add the Header
-        headers = ["Sample Name", "Wavelength (nm)", "Absorbance (AU)", "Baseline Subtracted (AU)"]
-        WB_worksheet.append(headers)
         
-        # Organize and save the data
-        for data in dataToSave:
-            # Write the Data to Excel
-            WB_worksheet.append(data)
+        # Stream the Data Into the Workbook (Keeping Any Sheets Already in the File)
+        with pipelineMetrics.timeStage("saveData", len(dataToSave), excelFile = saveExcelName):
+            with reportWriter(excelFile, keepSheets = True) as excelReport:
+                excelReport.addSheet(sheetName, headers, dataToSave)
+
+
+class reportWriter:
+    """
+    Streams Sheets Into a Write-Only (openpyxl) Workbook: Each Sheet's Rows Go Straight to a Temporary File as They
+    are Added, so Memory and Time Stay Flat However Many Rows and Sheets are Written, and Adding a Sheet Never Touches
+    the Sheets Before it. The Cells Get saveData's Look (Centered, Red Header), and Each Column's Width is Set From
+    the Header and the First widthSampleRows Rows (a Write-Only Sheet Needs its Widths Before its First Row).
+    Use as:
+        with excelProcessing.reportWriter(excelFile) as excelReport:
+            excelReport.addSheet("UV-Vis Analysis", headers, dataRows)
+            excelReport.addSheet("Sample 1", ["Wavelength (nm)", "Absorbance (AU)"], zip(wavelength, absorbance))
+    """
+
+    def __init__(self, excelFile, keepSheets = False, widthSampleRows = 1000):
+        import openpyxl as xl
+        from openpyxl.cell import WriteOnlyCell
+        self.excelFile = excelFile
+        self.widthSampleRows = widthSampleRows
+        self.getColumnLetter = xl.utils.get_column_letter
+        self.xlWorkbook = xl.Workbook(write_only = True)
+        self.sheetNames = []; self.numRows = 0
         
-        # Add Excel Aesthetics
-        WB_worksheet = self.addExcelAesthetics(WB_worksheet)    
-            
-        # Save as New Excel File
-        WB.save(excelFile)
-        WB.close()
+        # One Style Each for the Header and Data Cells, Shared by Every Cell (Made With the First Sheet)
+        self.WriteOnlyCell = WriteOnlyCell
+        self.headerStyle = None; self.dataStyle = None
+        
+        # Copy the Sheets Already in the File (Streamed, Like New Ones)
+        if keepSheets and os.path.isfile(excelFile):
+            oldWorkbook = xl.load_workbook(excelFile, read_only=True)
+            for oldWorksheet in oldWorkbook.worksheets:
+                oldRows = oldWorksheet.iter_rows(values_only = True)
+                self.addSheet(oldWorksheet.title, next(oldRows, []), oldRows)
+            oldWorkbook.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exceptionInfo):
+        self.close()
+    
+    def getSheetName(self, sheetName):
+        """
+        A Valid, Unused Sheet Name: Without []:*?/ or Backslashes, at Most 31 Characters, and Numbered if Already Taken.
+        """
+        sheetName = re.sub(r"[\[\]:*?/\\]", "_", str(sheetName))[:31] or "Sheet"
+        uniqueName = sheetName; copyNum = 1
+        while uniqueName.lower() in self.sheetNames:
+            copyNum += 1
+            uniqueName = sheetName[:31 - len(str(copyNum)) - 1] + " " + str(copyNum)
+        self.sheetNames.append(uniqueName.lower())
+        return uniqueName
+    
+    def setStyles(self, xlWorksheet):
+        from openpyxl.styles import Alignment, Font
+        align = Alignment(horizontal='center',vertical='center',wrap_text=True)
+        dataCell = self.WriteOnlyCell(xlWorksheet)
+        dataCell.alignment = align
+        headerCell = self.WriteOnlyCell(xlWorksheet)
+        headerCell.alignment = align
+        headerCell.font = Font(color='00FF0000', italic=True, bold=True)
+        self.dataStyle = dataCell._style; self.headerStyle = headerCell._style
+    
+    def getCells(self, xlWorksheet, rowValues, cellStyle):
+        cells = []
+        for cellValue in rowValues:
+            cell = self.WriteOnlyCell(xlWorksheet, cellValue)
+            cell._style = cellStyle
+            cells.append(cell)
+        return cells
+    
+    def addSheet(self, sheetName, headers, dataRows):
+        """
+        Writes a Sheet of headers Then dataRows (Any Iterable of Rows, e.g. a Generator). Returns the Sheet's Name.
+        """
+        xlWorksheet = self.xlWorkbook.create_sheet(self.getSheetName(sheetName))
+        if self.dataStyle == None:
+            self.setStyles(xlWorksheet)
+        headers = list(headers)
+        dataRows = iter(dataRows)
+        
+        # Size the Columns to the Header and the First Rows
+        firstRows = [list(rowValues) for rowValues in itertools.islice(dataRows, self.widthSampleRows)]
+        columnWidths = [len(str(headerVal)) if headerVal != None else 0 for headerVal in headers]
+        for rowValues in firstRows:
+            for columnNum, cellValue in enumerate(rowValues):
+                cellWidth = len(str(cellValue)) if cellValue else 0
+                if columnNum >= len(columnWidths):
+                    columnWidths.append(cellWidth)
+                elif cellWidth > columnWidths[columnNum]:
+                    columnWidths[columnNum] = cellWidth
+        for columnNum, columnWidth in enumerate(columnWidths):
+            xlWorksheet.column_dimensions[self.getColumnLetter(columnNum + 1)].width = columnWidth
+        
+        # Stream the Rows
+        with pipelineMetrics.timeStage("writeSheet", excelFile = os.path.basename(self.excelFile)) as stageRecord:
+            if len(headers) != 0:
+                xlWorksheet.append(self.getCells(xlWorksheet, headers, self.headerStyle))
+            numRows = 0
+            for rowValues in itertools.chain(firstRows, dataRows):
+                xlWorksheet.append(self.getCells(xlWorksheet, rowValues, self.dataStyle))
+                numRows += 1
+            stageRecord["numSamples"] = numRows
+        self.numRows += numRows
+        
+        return xlWorksheet.title
+    
+    def close(self):
+        """
+        Saves the Workbook (Once Closed, No More Sheets Can be Added).
+        """
+        if self.xlWorkbook == None:
+            return
+        if len(self.sheetNames) == 0:
+            self.xlWorkbook.create_sheet()
+        self.xlWorkbook.save(self.excelFile)
+        self.xlWorkbook = None
     
 
 class processFiles(dataProcessing):
@@ -161,9 +260,9 @@ class processFiles(dataProcessing):
         # Loop Through the Info Section and Extract the Needxed Run Info from Excel
         rowGenerator = uvVisWorksheet.rows
         for cell in rowGenerator:
-            # Get Cell Value
-            cellVal = cell[0].value
-            if cellVal == None:
+            # Get Cell Value (Read-Only Sheets Give Blank Rows as Empty Tuples, and Some Exports Write Blank Rows as a Lone Tab)
+            cellVal = cell[0].value if len(cell) != 0 else None
+            if cellVal == None or cellVal == "":
                 if newSample:
                     wavelengthList.append([])
                     absorbanceList.append([])
@@ -185,13 +284,93 @@ class processFiles(dataProcessing):
             
         return wavelengthList, absorbanceList, sampleNames
     
+    def iterData_UVVis(self, inputFile, startOffset = 0, delimiter = "\t", includeUnfinished = True):
+        """
+        Generator Version of readData_UVVis: Parses the Export From Byte startOffset and Yields Each Sample as
+        (sampleName, wavelength, absorbance, sampleHeader, endOffset), Where endOffset is the Byte Offset Just After
+        the Sample. Pass endOffset Back as startOffset to Pick Up Only the Samples Appended Since.
+        sampleHeader: {"timestamp": The Line After 'Sample N' (or None), "wlCalib": {"Shift": 0.17333, "261S": -0.08, ...}}
+        --------------------------------------------------------------------------
+        Input Variable Definitions:
+            inputFile: The Spectrometer's TXT/CSV/TSV Export
+            startOffset: Byte Offset to Start Reading From (0 or an endOffset From a Previous Call)
+            includeUnfinished: Also Yield the Last Sample if it is Not Followed by a Blank Row. Set False While
+                the File is Still Being Written, so a Sample is Only Yielded Once its Block is Complete.
+        --------------------------------------------------------------------------
+        """
+        sampleName = None; sampleRows = []; sampleHeader = None; newSample = False
+        # Read in Binary to Keep Track of the Byte Offset
+        with open(inputFile, "rb") as inputData:
+            inputData.seek(startOffset)
+            currentOffset = startOffset
+            for line in inputData:
+                # Stop at a Line the Spectrometer Has Not Finished Writing
+                if not line.endswith(b"\n") and not includeUnfinished:
+                    break
+                currentOffset += len(line)
+                # Get the First Two Columns of the Row
+                rowVals = line.decode("utf-8", "replace").rstrip("\r\n").split(delimiter, 2)
+                cellVal = rowVals[0]
+                # A Blank Row Ends the Current Sample
+                if cellVal == "":
+                    if sampleName != None:
+                        sampleData = np.array(sampleRows, dtype=float).reshape(-1, 2)
+                        yield sampleName, sampleData[:, 0], sampleData[:, 1], sampleHeader, currentOffset
+                        sampleName = None; sampleRows = []
+                    continue
+                
+                # If there is a new sample ready
+                if cellVal.startswith("Sample "):
+                    sampleName = cellVal
+                    sampleHeader = {"timestamp": None, "wlCalib": {}}
+                    newSample = True
+                    continue
+                # If there is data to add (a Row Cut Off Before its Absorbance is Still Being Written: Drop it)
+                elif sampleName != None and cellVal.replace(".", "", 1).isdigit():
+                    if len(rowVals) > 1 and rowVals[1].strip() != "":
+                        sampleRows.append(rowVals[0:2])
+                # Wavelength Calibration Values
+                elif sampleName != None and cellVal.startswith("//WLCalib:") and len(rowVals) > 1:
+                    try:
+                        sampleHeader["wlCalib"][cellVal[len("//WLCalib:"):].strip()] = float(rowVals[1])
+                    except ValueError:
+                        pass
+                # The Timestamp is the Line After 'Sample N'
+                elif sampleName != None and newSample:
+                    sampleHeader["timestamp"] = cellVal.strip()
+                newSample = False
+        
+        # Add the Last Sample if the File Did Not End on a Blank Row
+        if includeUnfinished and len(sampleRows) != 0:
+            sampleData = np.array(sampleRows, dtype=float).reshape(-1, 2)
+            yield sampleName, sampleData[:, 0], sampleData[:, 1], sampleHeader, currentOffset
+
+    def readData_UVVis(self, inputFile, delimiter = "\t"):
+        """
+        Parses the Spectrometer's TXT/CSV/TSV Export Directly into NumPy Arrays (No Excel Round-Trip).
+        Each Sample Block is 'Sample N', a Header Section (Timestamp, Column Names, //WLCalib, //QSpecEnd),
+        Then 'Wavelength<delimiter>Absorbance' Rows Until the Next Blank Line.
+        Returns the Same Sample Names and Values as extractData_UVVis.
+        """
+        wavelengthList = []; absorbanceList = []; sampleNames = []
+        # Read the Whole File in One Pass
+        with pipelineMetrics.timeStage("readData_UVVis", fileName = os.path.basename(inputFile)) as stageRecord:
+            for sampleName, wavelength, absorbance, _, _ in self.iterData_UVVis(inputFile, delimiter = delimiter):
+                sampleNames.append(sampleName)
+                wavelengthList.append(wavelength)
+                absorbanceList.append(absorbance)
+            stageRecord["numSamples"] = len(sampleNames)
+            
+        return wavelengthList, absorbanceList, sampleNames
+    
     
-    def getData(self, oldFile, outputFolder, testSheetNum = 0, excelDelimiter = "\t"):
+    def getData(self, oldFile, outputFolder, testSheetNum = 0, excelDelimiter = "\t", saveExcel = False):
         """
         --------------------------------------------------------------------------
         Input Variable Definitions:
             oldFile: The Path to the Excel File Containing the Data: txt, csv, xls, xlsx
             testSheetNum: An Integer Representing the Excel Worksheet (0-indexed) Order.
+            saveExcel: Also Write an Excel Copy of a TXT/CSV/TSV File to 'outputFolder/Excel Files/'.
         --------------------------------------------------------------------------
         """
         # Check if File Exists
@@ -199,22 +378,33 @@ class processFiles(dataProcessing):
             print("The following Input File Does Not Exist:", oldFile)
             sys.exit()
 
-        # Convert TXT and CSV Files to XLSX
+        # Read TXT and CSV Files Directly
         if oldFile.endswith((".txt", ".csv", '.tsv')):
-            # Extract Filename Information
-            oldFileExtension = os.path.basename(oldFile)
-            filename = os.path.splitext(oldFileExtension)[0]
-            newFilePath = outputFolder + "Excel Files/"
-            # Make Output Folder Directory if Not Already Created
-            os.makedirs(newFilePath, exist_ok = True)
-
-            # Convert CSV or TXT to XLSX
-            excelFile = newFilePath + filename + ".xlsx"
-            xlWorkbook, xlWorksheet = self.convertToExcel(oldFile, excelFile, excelDelimiter = excelDelimiter, overwriteXL = True, testSheetNum = testSheetNum)
+            # Save an Excel Copy of the Raw Data Only If Asked
+            if saveExcel:
+                # Extract Filename Information
+                oldFileExtension = os.path.basename(oldFile)
+                filename = os.path.splitext(oldFileExtension)[0]
+                newFilePath = outputFolder + "Excel Files/"
+                # Make Output Folder Directory if Not Already Created
+                os.makedirs(newFilePath, exist_ok = True)
+                
+                # Convert CSV or TXT to XLSX
+                excelFile = newFilePath + filename + ".xlsx"
+                xlWorkbook, xlWorksheet = self.convertToExcel(oldFile, excelFile, excelDelimiter = excelDelimiter, overwriteXL = True, testSheetNum = testSheetNum)
+                xlWorkbook.close()
+            
+            # Extract the Data
+            print("Extracting Data from the File:", oldFile)
+            wavelengthList, absorbanceList, sampleNames = self.readData_UVVis(oldFile, delimiter = excelDelimiter)
+            
+            print("Done Collecting Data");
+            return wavelengthList, absorbanceList, sampleNames
         # If the File is Already an Excel File, Just Load the File
         elif oldFile.endswith(".xlsx"):
             excelFile = oldFile
             # Load the Data from the Excel File
+            import openpyxl as xl
             xlWorkbook = xl.load_workbook(excelFile, data_only=True, read_only=True)
             xlWorksheet = xlWorkbook.worksheets[testSheetNum]
         else:
@@ -223,7 +413,9 @@ class processFiles(dataProcessing):
         
         # Extract the Data
         print("Extracting Data from the Excel File:", excelFile)
-        wavelengthList, absorbanceList, sampleNames = self.extractData_UVVis(xlWorksheet)
+        with pipelineMetrics.timeStage("extractData_UVVis", fileName = os.path.basename(excelFile)) as stageRecord:
+            wavelengthList, absorbanceList, sampleNames = self.extractData_UVVis(xlWorksheet)
+            stageRecord["numSamples"] = len(sampleNames)
         
         xlWorkbook.close()
         # Finished Data Collection: Close Workbook and Return Data to User
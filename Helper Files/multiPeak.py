@@ -0,0 +1,262 @@
+
+# Basic Modules
+import os
+import warnings
+import numpy as np
+# Modules for Finding and Fitting Peaks
+import scipy.signal
+import scipy.optimize
+
+# Import Python Helper Files
+import calculateBaseline
+import pipelineMetrics
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# One Row Per Peak (Several Per Sample). leftCutInd/rightCutInd are -1 (and the Baseline Values NaN) if No Baseline Was Found.
+# The fit Columns are NaN Unless a peakShape is Fit; Peaks Sharing a Tangent Pair are Fit Together (Same fitGroup)
+peaksType = np.dtype([
+    ("sampleName", "U64"),
+    ("peakNum", np.int64),
+    ("peakInd", np.int64),
+    ("leftCutInd", np.int64),
+    ("rightCutInd", np.int64),
+    ("peakWavelength", np.float64),
+    ("peakHeight", np.float64),
+    ("peakHeight_Baseline", np.float64),
+    ("prominence", np.float64),
+    ("fitGroup", np.int64),
+    ("fitCenter", np.float64),
+    ("fitAmplitude", np.float64),
+    ("fitFWHM", np.float64),
+    ("fitArea", np.float64),
+    ("fitRMSE", np.float64),
+])
+fitFields = ["fitCenter", "fitAmplitude", "fitFWHM", "fitArea", "fitRMSE"]
+# The Peaks of Several Files Merged: Each Row Tagged With the File it Came From
+filePeaksType = np.dtype([("fileName", "U256")] + peaksType.descr)
+# Column Headers for the Saved Table
+peakHeaders = {
+    "fileName": "File", "sampleName": "Sample Name", "peakNum": "Peak", "peakWavelength": "Wavelength (nm)", "peakHeight": "Absorbance (AU)",
+    "peakHeight_Baseline": "Baseline Subtracted (AU)", "prominence": "Prominence (AU)", "fitCenter": "Fit Center (nm)",
+    "fitAmplitude": "Fit Amplitude (AU)", "fitFWHM": "Fit FWHM (nm)", "fitArea": "Fit Area (AU nm)", "fitRMSE": "Fit RMSE (AU)",
+}
+
+# Component Shapes: (FWHM, Area/Amplitude) Per Unit of the Width Parameter (Gaussian: Sigma; Lorentzian: Half Width)
+peakShapes = {
+    "gaussian": (2*np.sqrt(2*np.log(2)), np.sqrt(2*np.pi)),
+    "lorentzian": (2.0, np.pi),
+}
+
+
+def getComponents(peakShape, xData, centers, amplitudes, widths):
+    """
+    Evaluates Every Component at Every Point at Once, With its Analytic Derivatives.
+    Returns (components, dAmplitude, dCenter, dWidth), Each (numPoints x numComponents).
+    """
+    pointOffsets = xData[:, None] - centers
+    if peakShape == "gaussian":
+        shapeValues = np.exp(-0.5*(pointOffsets/widths)**2)
+        components = amplitudes*shapeValues
+        dCenter = components*pointOffsets/widths**2
+        dWidth = components*pointOffsets**2/widths**3
+    elif peakShape == "lorentzian":
+        denominator = pointOffsets**2 + widths**2
+        shapeValues = widths**2/denominator
+        components = amplitudes*shapeValues
+        dCenter = 2*components*pointOffsets/denominator
+        dWidth = 2*amplitudes*widths*pointOffsets**2/denominator**2
+    else:
+        raise ValueError("Unknown Peak Shape: " + str(peakShape) + " (Use One of " + ", ".join(peakShapes) + ")")
+
+    return components, shapeValues, dCenter, dWidth
+
+
+class multiPeakAnalysis:
+    """
+    Finds Every Peak of Every Sample (Not Just the Most Prominent), its Tangent Baseline, and Optionally Deconvolves the
+    Overlapping Peaks Into Gaussian/Lorentzian Components. Works on the Filtered Spectra of batchProcessing.
+    """
+
+    def __init__(self, baselineObject = None):
+        # Shared Baseline Object (Finds the Peaks and the Tangent Pairs)
+        self.baselineObject = baselineObject if baselineObject != None else calculateBaseline.bestLinearFit()
+
+        # Peak Thresholds (On Top of findPeak's Prominence, Width, and Distance)
+        self.minRelativeProminence = 0.1   # Keep Peaks at Least This Fraction as Prominent as the Sample's Most Prominent
+        self.maxPeaks = 8                  # Most Peaks Kept Per Sample (the Most Prominent); None for No Limit
+        # Deconvolution: None, 'gaussian', or 'lorentzian'
+        self.peakShape = None
+
+    def findAllPeaks(self, wavelength, filteredMatrix, peakWavelengthBounds = None):
+        """
+        Returns (sampleInds, peakInds, prominences) of Every Peak Passing the Thresholds, Sorted by Sample Then Wavelength.
+        """
+        peakWavelengthBounds = peakWavelengthBounds if peakWavelengthBounds != None else [-np.inf, np.inf]
+        sampleInds, peakInds, prominences, isDerivative = self.baselineObject.findPeakCandidates(wavelength, filteredMatrix, peakWavelengthBounds)
+        # A Derivative Peak Does Not Have a Baseline of its Own
+        sampleInds, peakInds, prominences = sampleInds[~isDerivative], peakInds[~isDerivative], prominences[~isDerivative]
+
+        # Drop the Peaks Much Smaller Than the Sample's Biggest
+        maxProminences = np.zeros(len(filteredMatrix))
+        np.maximum.at(maxProminences, sampleInds, prominences)
+        keepPeaks = prominences >= self.minRelativeProminence*maxProminences[sampleInds]
+        # Keep the maxPeaks Most Prominent of Each Sample
+        if self.maxPeaks != None:
+            candidateOrder = np.lexsort((peakInds, -prominences, sampleInds))
+            sampleStarts = np.searchsorted(sampleInds[candidateOrder], sampleInds[candidateOrder])
+            peakRanks = np.zeros(len(peakInds), dtype=np.int64)
+            peakRanks[candidateOrder] = np.arange(len(peakInds)) - sampleStarts
+            keepPeaks &= peakRanks < self.maxPeaks
+
+        return sampleInds[keepPeaks], peakInds[keepPeaks], prominences[keepPeaks]
+
+    def findBaselines(self, wavelength, filteredMatrix, sampleInds, peakInds):
+        """
+        Returns the (leftCutInd, rightCutInd) Tangent Pair Under Each Peak (-1 if No Baseline Found). Each Sample's Peaks
+        are Searched Together, so Peaks in the Same Band Only Search the Pairs They Do Not Share (findLinearBaselines_Peaks).
+        """
+        leftCutInds = np.full(len(peakInds), -1, dtype=np.int64)
+        rightCutInds = np.full(len(peakInds), -1, dtype=np.int64)
+        with pipelineMetrics.timeStage("multiPeakBaselines", len(np.unique(sampleInds)), numPeaks = len(peakInds)):
+            for sampleInd in np.unique(sampleInds):
+                samplePeaks = np.flatnonzero(sampleInds == sampleInd)
+                leftCutInds[samplePeaks], rightCutInds[samplePeaks] = self.baselineObject.findLinearBaselines_Peaks(wavelength, filteredMatrix[sampleInd], peakInds[samplePeaks])
+
+        return leftCutInds, rightCutInds
+
+    def fitPeakGroup(self, xData, yData, peakInds, leftCutInd, rightCutInd):
+        """
+        Fits a Linear Baseline Plus One Component Per Peak to the Data Between the Tangent Points (Together, by Least
+        Squares With the Analytic Jacobian). The Fit Starts From the Tangent Line and Each Peak's Height and Half Width.
+        --------------------------------------------------------------------------
+        Input Variable Definitions:
+            peakInds: The Peaks Sharing the Tangent Pair (leftCutInd, rightCutInd)
+        Returns:
+            fitParams: (numPeaks x 4) [center, amplitude, FWHM, area] Per Peak, or None if the Fit Failed
+            fitRMSE: The Root Mean Square Residual of the Fit
+        --------------------------------------------------------------------------
+        """
+        fwhmFactor, areaFactor = peakShapes[self.peakShape]
+        xWindow = xData[leftCutInd:rightCutInd + 1]; yWindow = yData[leftCutInd:rightCutInd + 1]
+        numPeaks = len(peakInds)
+        if len(xWindow) <= 2 + 3*numPeaks:
+            return None, np.nan
+
+        # Start From the Tangent Line
+        xCenter = (xWindow[0] + xWindow[-1])/2
+        pointSpacing = (xWindow[-1] - xWindow[0])/(len(xWindow) - 1)
+        lineSlope = (yWindow[-1] - yWindow[0])/(xWindow[-1] - xWindow[0])
+        lineOffset = yWindow[0] + lineSlope*(xCenter - xWindow[0])
+        peakData = yWindow - (lineOffset + lineSlope*(xWindow - xCenter))
+        localInds = np.asarray(peakInds) - leftCutInd
+        with warnings.catch_warnings():
+            # A Shoulder Can Sit Below the Tangent Line (Zero Width): Clipped to the Smallest Width Below
+            warnings.simplefilter("ignore", RuntimeWarning)
+            halfMaxWidths = scipy.signal.peak_widths(peakData, localInds, rel_height = 0.5)[0]*pointSpacing
+        # Parameters: [lineOffset, lineSlope, amplitude_0, center_0, width_0, amplitude_1, ...]
+        minWidth = pointSpacing/fwhmFactor; maxWidth = (xWindow[-1] - xWindow[0])/fwhmFactor
+        initialParams = np.column_stack((np.maximum(peakData[localInds], 1E-12), xWindow[localInds], np.clip(halfMaxWidths/fwhmFactor, minWidth, maxWidth)))
+        initialParams = np.concatenate(([lineOffset, lineSlope], initialParams.ravel()))
+        lowerBounds = np.concatenate(([-np.inf, -np.inf], np.tile([0, xWindow[0], minWidth], numPeaks)))
+        upperBounds = np.concatenate(([np.inf, np.inf], np.tile([np.inf, xWindow[-1], maxWidth], numPeaks)))
+
+        def getResiduals(fitParams):
+            componentParams = fitParams[2:].reshape(numPeaks, 3)
+            components = getComponents(self.peakShape, xWindow, componentParams[:, 1], componentParams[:, 0], componentParams[:, 2])[0]
+            return fitParams[0] + fitParams[1]*(xWindow - xCenter) + components.sum(axis = 1) - yWindow
+
+        def getJacobian(fitParams):
+            componentParams = fitParams[2:].reshape(numPeaks, 3)
+            _, dAmplitude, dCenter, dWidth = getComponents(self.peakShape, xWindow, componentParams[:, 1], componentParams[:, 0], componentParams[:, 2])
+            # Columns in Parameter Order: the Line, Then Each Component's (Amplitude, Center, Width)
+            return np.column_stack((np.ones(len(xWindow)), xWindow - xCenter, np.stack((dAmplitude, dCenter, dWidth), axis = 2).reshape(len(xWindow), 3*numPeaks)))
+
+        fitResult = scipy.optimize.least_squares(getResiduals, initialParams, jac = getJacobian, bounds = (lowerBounds, upperBounds), x_scale = 'jac')
+        if not fitResult.success:
+            return None, np.nan
+        componentParams = fitResult.x[2:].reshape(numPeaks, 3)
+        fitParams = np.column_stack((componentParams[:, 1], componentParams[:, 0], fwhmFactor*componentParams[:, 2], areaFactor*componentParams[:, 0]*componentParams[:, 2]))
+        return fitParams, float(np.sqrt(np.mean(fitResult.fun**2)))
+
+    def analyzeSamples(self, wavelength, filteredMatrix, sampleNames, peakWavelengthBounds = None):
+        """
+        --------------------------------------------------------------------------
+        Input Variable Definitions:
+            wavelength: The Shared Wavelength Axis (numWavelengths)
+            filteredMatrix: The Filtered Spectra From batchProcessing.analyzeSamples (Sign Flipped for Negative Peaks)
+            peakWavelengthBounds: [minWavelength, maxWavelength] to Look for Peaks In; None for the Whole Spectrum
+        Returns:
+            peaks: Structured Array of peaksType, One Row Per Peak (in Sample Then Wavelength Order)
+        --------------------------------------------------------------------------
+        """
+        wavelength = np.asarray(wavelength, dtype=float)
+        filteredMatrix = np.atleast_2d(np.asarray(filteredMatrix, dtype=float))
+        if self.peakShape != None and self.peakShape not in peakShapes:
+            raise ValueError("Unknown Peak Shape: " + str(self.peakShape) + " (Use One of " + ", ".join(peakShapes) + ")")
+        peaks = np.zeros(0, dtype=peaksType)
+        if len(filteredMatrix) == 0:
+            return peaks
+
+        # Find Every Peak and the Baseline Under it
+        sampleInds, peakInds, prominences = self.findAllPeaks(wavelength, filteredMatrix, peakWavelengthBounds)
+        leftCutInds, rightCutInds = self.findBaselines(wavelength, filteredMatrix, sampleInds, peakInds)
+
+        # Fill in the Table
+        peaks = np.zeros(len(peakInds), dtype=peaksType)
+        peaks["sampleName"] = np.asarray(sampleNames)[sampleInds] if len(peakInds) != 0 else []
+        peaks["peakNum"] = np.arange(len(peakInds)) - np.searchsorted(sampleInds, sampleInds)
+        peaks["peakInd"] = peakInds
+        peaks["leftCutInd"] = leftCutInds
+        peaks["rightCutInd"] = rightCutInds
+        peaks["peakWavelength"] = wavelength[peakInds]
+        peaks["peakHeight"] = filteredMatrix[sampleInds, peakInds]
+        peaks["prominence"] = prominences
+        peaks["fitGroup"] = -1
+        for fieldName in ["peakHeight_Baseline"] + fitFields:
+            peaks[fieldName] = np.nan
+        # Height Above the Tangent Line
+        foundBaseline = leftCutInds >= 0
+        if foundBaseline.any():
+            rowInds = sampleInds[foundBaseline]; leftInds = leftCutInds[foundBaseline]; rightInds = rightCutInds[foundBaseline]
+            lineSlope = (filteredMatrix[rowInds, rightInds] - filteredMatrix[rowInds, leftInds])/(wavelength[rightInds] - wavelength[leftInds])
+            tangentHeights = filteredMatrix[rowInds, leftInds] + lineSlope*(wavelength[peakInds[foundBaseline]] - wavelength[leftInds])
+            peaks["peakHeight_Baseline"][foundBaseline] = peaks["peakHeight"][foundBaseline] - tangentHeights
+
+        # Deconvolve the Peaks Sharing a Baseline
+        if self.peakShape != None and foundBaseline.any():
+            groupKeys, groupInds = np.unique(np.column_stack((sampleInds, leftCutInds, rightCutInds))[foundBaseline], axis = 0, return_inverse = True)
+            peaks["fitGroup"][foundBaseline] = groupInds.ravel()
+            with pipelineMetrics.timeStage("fitPeaks", len(np.unique(groupKeys[:, 0])), numGroups = len(groupKeys), peakShape = self.peakShape) as stageRecord:
+                numFailed = 0
+                for groupInd, (sampleInd, leftCutInd, rightCutInd) in enumerate(groupKeys):
+                    groupPeaks = np.flatnonzero(peaks["fitGroup"] == groupInd)
+                    fitParams, fitRMSE = self.fitPeakGroup(wavelength, filteredMatrix[sampleInd], peakInds[groupPeaks], leftCutInd, rightCutInd)
+                    if fitParams is None:
+                        numFailed += 1
+                        continue
+                    for fieldNum, fieldName in enumerate(["fitCenter", "fitAmplitude", "fitFWHM", "fitArea"]):
+                        peaks[fieldName][groupPeaks] = fitParams[:, fieldNum]
+                    peaks["fitRMSE"][groupPeaks] = fitRMSE
+                stageRecord["numFailed"] = numFailed
+
+        return peaks
+
+
+def getTableRows(peaksTable, rootDirectory = None):
+    """
+    Returns (headers, rows) of the Peaks Table for saveData/CSV (Without the Fit Columns if Nothing Was Fit);
+    fileName is Made Relative to rootDirectory.
+    """
+    fieldNames = [fieldName for fieldName in peaksTable.dtype.names if fieldName in peakHeaders]
+    if not np.isfinite(peaksTable["fitRMSE"]).any():
+        fieldNames = [fieldName for fieldName in fieldNames if fieldName not in fitFields]
+    tableRows = []
+    for row in peaksTable:
+        tableRow = [row[fieldName].item() for fieldName in fieldNames]
+        if rootDirectory != None and fieldNames[0] == "fileName":
+            tableRow[0] = os.path.relpath(tableRow[0], rootDirectory)
+        tableRows.append(tableRow)
+    return [peakHeaders[fieldName] for fieldName in fieldNames], tableRows
@@ -0,0 +1,297 @@
+
+# Basic Modules
+import os
+import time
+import itertools
+import traceback
+import numpy as np
+# Modules for Parallel Processing
+import concurrent.futures
+
+# Import Python Helper Files
+import batchProcessing
+import pipelineMetrics
+import sampleSet
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Analysis as a Graph of Stages: {stageName: (Upstream Stages, Parameters)}. A Stage's Output Only Depends on
+# its Parameters and its Upstream Stages, so it is Reused by Every Combination That Agrees on Those
+sweepStages = {
+    "spectra": ([], ["isPeakPositive"]),
+    "filtered": (["spectra"], ["cutoffFreq", "filterOrder", "savgolWindow", "savgolOrder"]),
+    "peaks": (["filtered"], ["peakWavelengthBounds", "minLeftBoundaryInd"]),
+    "baselines": (["filtered", "peaks"], ["minPeakDuration", "warmStart"]),
+    "results": (["filtered", "baselines"], []),
+}
+# Every Parameter That Can be Swept
+sweepParamNames = [paramName for _, stageParams in sweepStages.values() for paramName in stageParams]
+
+
+def getDefaultParams():
+    """
+    The Settings Used by uvVisAnalysis.py (Any Parameter Not Swept Stays at its Default).
+    """
+    samplePipeline = batchProcessing.batchProcessing()
+    return {
+        "isPeakPositive": True,
+        "cutoffFreq": samplePipeline.cutoffFreq,
+        "filterOrder": samplePipeline.filterOrder,
+        "savgolWindow": samplePipeline.savgolWindow,
+        "savgolOrder": samplePipeline.savgolOrder,
+        "peakWavelengthBounds": None,
+        "minLeftBoundaryInd": samplePipeline.baselineObject.minLeftBoundaryInd,
+        "minPeakDuration": samplePipeline.baselineObject.minPeakDuration,
+        "warmStart": samplePipeline.warmStart,
+    }
+
+def getCombinations(paramGrid):
+    """
+    Every Combination of the Values in paramGrid ({paramName: [Values]}), Filled in With the Defaults. Ordered so
+    Combinations Sharing Upstream Stages are Next to Each Other (the Filter Settings Vary Slowest).
+    """
+    unknownParams = [paramName for paramName in paramGrid if paramName not in sweepParamNames]
+    if len(unknownParams) != 0:
+        raise KeyError("Parameters That Cannot be Swept: " + ", ".join(unknownParams))
+    sweptNames = [paramName for paramName in sweepParamNames if paramName in paramGrid]
+    defaultParams = getDefaultParams()
+
+    combinations = []
+    for paramValues in itertools.product(*[list(paramGrid[paramName]) for paramName in sweptNames]):
+        combinations.append(dict(defaultParams, **dict(zip(sweptNames, paramValues))))
+    return combinations
+
+def getStageKey(stageName, sweepParams):
+    """
+    Identifies a Stage's Output: the Stage's Parameters Plus the Keys of its Upstream Stages.
+    """
+    upstreamStages, stageParams = sweepStages[stageName]
+    return tuple(repr(sweepParams[paramName]) for paramName in stageParams) + tuple(getStageKey(upstreamStage, sweepParams) for upstreamStage in upstreamStages)
+
+def getSweptNames(combinations):
+    """
+    The Parameters That Take More Than One Value Across the Combinations.
+    """
+    return [paramName for paramName in sweepParamNames if len(set(repr(sweepParams[paramName]) for sweepParams in combinations)) > 1]
+
+
+class sweepEngine:
+    """
+    Evaluates Parameter Combinations on One File, Memoizing Every Stage of sweepStages: a Stage is Only Run Again
+    When its Own Parameters or an Upstream Stage Changed (e.g. New Peak Bounds Reuse the Filtered Spectra, and New
+    Baseline Thresholds Reuse the Peaks).
+    """
+
+    def __init__(self):
+        self.samplePipeline = batchProcessing.batchProcessing()
+        # Stage Outputs: {(stageName, stageKey): Output}, for One File at a Time
+        self.stageOutputs = {}
+        self.dataFile = None; self.sampleNames = None
+        self.wavelength = None; self.absorbanceMatrix = None
+        # How Often Each Stage Was Run/Reused
+        self.numRuns = dict.fromkeys(sweepStages, 0)
+        self.numReused = dict.fromkeys(sweepStages, 0)
+
+    def setFile(self, dataFile):
+        """
+        Loads a File (Forgetting the Last File's Stages).
+        """
+        if dataFile != self.dataFile:
+            self.stageOutputs.clear(); self.dataFile = None
+            fileSamples = sampleSet.sampleSet.fromFile(dataFile)
+            if len(fileSamples) == 0:
+                raise ValueError("No Samples Found in the File")
+            wavelength, absorbanceMatrix = fileSamples.resample().getMatrix()
+            self.wavelength = np.asarray(wavelength, dtype=float)
+            self.absorbanceMatrix = np.asarray(absorbanceMatrix, dtype=float)
+            self.sampleNames = fileSamples.sampleNames
+            self.dataFile = dataFile
+
+    def getStage(self, stageName, sweepParams):
+        """
+        Returns the Stage's Output for These Parameters, Running it (and Any Missing Upstream Stage) if Needed.
+        """
+        stageKey = (stageName, getStageKey(stageName, sweepParams))
+        if stageKey in self.stageOutputs:
+            self.numReused[stageName] += 1
+            return self.stageOutputs[stageKey]
+
+        upstreamOutputs = [self.getStage(upstreamStage, sweepParams) for upstreamStage in sweepStages[stageName][0]]
+        with pipelineMetrics.timeStage("sweep_" + stageName, len(self.sampleNames)):
+            stageOutput = getattr(self, "run_" + stageName)(sweepParams, *upstreamOutputs)
+        self.stageOutputs[stageKey] = stageOutput
+        self.numRuns[stageName] += 1
+        return stageOutput
+
+    def run_spectra(self, sweepParams):
+        return self.absorbanceMatrix if sweepParams["isPeakPositive"] else -self.absorbanceMatrix
+
+    def run_filtered(self, sweepParams, absorbanceMatrix):
+        for paramName in sweepStages["filtered"][1]:
+            setattr(self.samplePipeline, paramName, sweepParams[paramName])
+        return self.samplePipeline.filterSamples(self.wavelength, absorbanceMatrix)
+
+    def run_peaks(self, sweepParams, filteredMatrix):
+        self.samplePipeline.baselineObject.minLeftBoundaryInd = sweepParams["minLeftBoundaryInd"]
+        return self.samplePipeline.findPeaks(self.wavelength, filteredMatrix, sweepParams["peakWavelengthBounds"])
+
+    def run_baselines(self, sweepParams, filteredMatrix, peakInds):
+        self.samplePipeline.baselineObject.minLeftBoundaryInd = sweepParams["minLeftBoundaryInd"]
+        self.samplePipeline.baselineObject.minPeakDuration = sweepParams["minPeakDuration"]
+        self.samplePipeline.warmStart = sweepParams["warmStart"]
+        self.samplePipeline.resetWarmStart()
+        return self.samplePipeline.findBaselines(self.wavelength, filteredMatrix, peakInds)
+
+    def run_results(self, sweepParams, filteredMatrix, cutInds):
+        baselineMatrix = self.samplePipeline.subtractBaselines(self.wavelength, filteredMatrix, *cutInds)
+        return self.samplePipeline.getResults(self.wavelength, self.sampleNames, filteredMatrix, baselineMatrix, *cutInds)
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Engine Kept by Each Worker Process (Reuses the Last File's Stages Between Tasks)
+workerEngine = None
+
+
+def getSweepType(combinations):
+    """
+    The Tidy Table: One Row Per (File, Combination, Sample), With a Column Per Swept Parameter.
+    """
+    paramFields = []
+    for paramName in getSweptNames(combinations):
+        if paramName == "peakWavelengthBounds":
+            paramFields.extend([("minPeakWavelength", np.float64), ("maxPeakWavelength", np.float64)])
+        else:
+            paramFields.append((paramName, np.asarray([sweepParams[paramName] for sweepParams in combinations]).dtype))
+    return np.dtype([("fileName", "U256"), ("combinationNum", np.int64)] + paramFields + batchProcessing.resultsType.descr)
+
+def sweepFile(dataFile, combinationNums, combinations, metricsFile = None):
+    """
+    Evaluates Some of the Combinations on One File. Runs in a Worker Process, so Errors are Returned, Not Raised.
+    Returns a Dictionary With the Tidy Rows, the Stage Run/Reuse Counts, the Time Spent, and Any Errors.
+    """
+    global workerEngine
+    startTime = time.time()
+    sweepType = getSweepType(combinations)
+    taskReport = {"dataFile": dataFile, "workerID": os.getpid(), "numCombinations": len(combinationNums), "rows": np.zeros(0, dtype=sweepType), "errors": []}
+    if workerEngine == None:
+        workerEngine = sweepEngine()
+    numRuns = dict(workerEngine.numRuns); numReused = dict(workerEngine.numReused)
+
+    tableRows = []
+    try:
+        if metricsFile != None and not pipelineMetrics.isEnabled():
+            pipelineMetrics.setSink(pipelineMetrics.jsonSink(metricsFile))
+        pipelineMetrics.setContext(dataFile = dataFile)
+        workerEngine.setFile(dataFile)
+        for combinationNum in combinationNums:
+            sweepParams = combinations[combinationNum]
+            try:
+                results = workerEngine.getStage("results", sweepParams)
+            except Exception:
+                taskReport["errors"].append((combinationNum, traceback.format_exc(limit = 3)))
+                continue
+
+            # Tag the Results With the File and the Parameters
+            combinationRows = np.zeros(len(results), dtype=sweepType)
+            combinationRows["fileName"] = dataFile
+            combinationRows["combinationNum"] = combinationNum
+            for fieldName in sweepType.names:
+                if fieldName in batchProcessing.resultsType.names:
+                    combinationRows[fieldName] = results[fieldName]
+                elif fieldName in sweepParams:
+                    combinationRows[fieldName] = sweepParams[fieldName]
+            if "minPeakWavelength" in sweepType.names:
+                peakWavelengthBounds = sweepParams["peakWavelengthBounds"]
+                combinationRows["minPeakWavelength"] = peakWavelengthBounds[0] if peakWavelengthBounds != None else np.nan
+                combinationRows["maxPeakWavelength"] = peakWavelengthBounds[1] if peakWavelengthBounds != None else np.nan
+            tableRows.append(combinationRows)
+    except Exception:
+        taskReport["errors"].append((None, traceback.format_exc(limit = 3)))
+
+    if len(tableRows) != 0:
+        taskReport["rows"] = np.concatenate(tableRows)
+    taskReport["numRuns"] = {stageName: workerEngine.numRuns[stageName] - numRuns[stageName] for stageName in sweepStages}
+    taskReport["numReused"] = {stageName: workerEngine.numReused[stageName] - numReused[stageName] for stageName in sweepStages}
+    taskReport["runTime"] = time.time() - startTime
+    return taskReport
+
+def getSweepTasks(dataFiles, combinations, numWorkers):
+    """
+    Splits the Sweep Into (dataFile, combinationNums) Tasks: One Per File, or Per File and Filter Setting When There
+    are Fewer Files Than Workers (the Filter Settings are Where the Stages Branch).
+    """
+    if len(dataFiles) >= numWorkers:
+        return [(dataFile, list(range(len(combinations)))) for dataFile in dataFiles]
+
+    # Group the Combinations by Their Filtered Spectra
+    filterGroups = {}
+    for combinationNum, sweepParams in enumerate(combinations):
+        filterKey = getStageKey("filtered", sweepParams)
+        filterGroups.setdefault(filterKey, []).append(combinationNum)
+    return [(dataFile, combinationNums) for dataFile in dataFiles for combinationNums in filterGroups.values()]
+
+def runSweep(dataFiles, paramGrid, numWorkers = None, metricsFile = None):
+    """
+    --------------------------------------------------------------------------
+    Input Variable Definitions:
+        dataFiles: The Files to Analyze
+        paramGrid: {paramName: [Values]} (See sweepParamNames); Parameters Not Given Stay at Their Defaults
+        numWorkers: Number of Worker Processes (Default: One Per CPU); 1 Runs in This Process
+        metricsFile: Record Each Stage's Timings Here (pipelineMetrics.jsonSink); None to Not Record
+    Returns:
+        sweepTable: The Tidy Table (See getSweepType), in dataFiles Then Combination Order
+        combinations: The Parameters of Each combinationNum
+        taskReports: One Report Per Task (See sweepFile)
+    --------------------------------------------------------------------------
+    """
+    combinations = getCombinations(paramGrid)
+    numWorkers = numWorkers if numWorkers != None else os.cpu_count()
+    sweepTasks = getSweepTasks(dataFiles, combinations, numWorkers)
+    numWorkers = max(1, min(numWorkers, len(sweepTasks)))
+
+    # Fan the Tasks Out to the Workers
+    if numWorkers == 1:
+        taskReports = [sweepFile(dataFile, combinationNums, combinations, metricsFile) for dataFile, combinationNums in sweepTasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = numWorkers) as workerPool:
+            taskReports = list(workerPool.map(sweepFile, *zip(*sweepTasks), [combinations]*len(sweepTasks), [metricsFile]*len(sweepTasks)))
+
+    # Merge the Rows (Each Task's Rows are Already in Combination Order)
+    sweepTable = np.concatenate([taskReport["rows"] for taskReport in taskReports]) if len(taskReports) != 0 else np.zeros(0, dtype=getSweepType(combinations))
+    sweepTable = sweepTable[np.lexsort((sweepTable["combinationNum"], [dataFiles.index(fileName) for fileName in sweepTable["fileName"]]))] if len(sweepTable) != 0 else sweepTable
+    return sweepTable, combinations, taskReports
+
+def printSweepReport(taskReports, numCombinations, wallTime):
+    """
+    Prints the Failed Combinations and How Often Each Stage Was Reused.
+    """
+    for taskReport in taskReports:
+        for combinationNum, errorMessage in taskReport["errors"]:
+            print("Failed to Analyze " + taskReport["dataFile"] + ("" if combinationNum == None else " (Combination " + str(combinationNum) + ")"))
+            print(errorMessage)
+
+    # Report the Memoization
+    for stageName in sweepStages:
+        numRuns = sum(taskReport["numRuns"][stageName] for taskReport in taskReports)
+        numReused = sum(taskReport["numReused"][stageName] for taskReport in taskReports)
+        print("Stage '" + stageName + "': Ran " + str(numRuns) + " Times, Reused " + str(numReused) + " Times")
+    numFiles = len(set(taskReport["dataFile"] for taskReport in taskReports))
+    numRows = sum(len(taskReport["rows"]) for taskReport in taskReports)
+    print("Swept " + str(numCombinations) + " Combinations Over " + str(numFiles) + " Files (" + str(numRows) + " Rows) in " + str(np.round(wallTime, 2)) + " s")
+
+def getTableRows(sweepTable, rootDirectory = None):
+    """
+    Returns (headers, rows) of the Tidy Table for saveData/CSV; fileName is Made Relative to rootDirectory.
+    """
+    headers = list(sweepTable.dtype.names)
+    tableRows = []
+    for row in sweepTable:
+        tableRow = [row[fieldName].item() for fieldName in headers]
+        if rootDirectory != None:
+            tableRow[0] = os.path.relpath(tableRow[0], rootDirectory)
+        tableRows.append(tableRow)
+    return headers, tableRows
@@ -0,0 +1,176 @@
+"""
+Timing and Counters for the Analysis Stages. Each Instrumented Stage Sends One Record to the Active Sink:
+    {"stage": "findLinearBaseline", "wallTime": 0.03, "numSamples": 1, "tangentPairs": 5120, "dataFile": ..., ...}
+Nothing is Recorded Until a Sink is Set, and Then Only in This Process (Worker Processes Set Their Own):
+    pipelineMetrics.setSink(pipelineMetrics.jsonSink("./Analysis Metrics.jsonl"))
+A Sink is Any Function Taking a Record: jsonSink, logSink, or Your Own Callback.
+"""
+
+# Basic Modules
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# Where the Records Go (None Disables the Instrumentation)
+activeSink = None
+
+
+class threadContext(threading.local):
+    """
+    The Tags Added to Every Record (e.g. the Data File Being Analyzed). Each Thread Has its Own, so the Server's
+    Threads Do Not Tag Each Other's Records.
+    """
+
+    def __init__(self):
+        self.tags = {}
+
+# Tags Added to Every Record
+metricContext = threadContext()
+
+
+class jsonSink:
+    """
+    Appends Each Record as One JSON Line. Several Processes Can Share the File, and Threads Take Turns Writing.
+    """
+
+    def __init__(self, metricsFile):
+        self.metricsFile = metricsFile
+        os.makedirs(os.path.dirname(os.path.abspath(metricsFile)), exist_ok = True)
+        self.outputFile = open(metricsFile, "a")
+        self.writeLock = threading.Lock()
+
+    def __call__(self, record):
+        recordLine = json.dumps(record) + "\n"
+        with self.writeLock:
+            self.outputFile.write(recordLine)
+            self.outputFile.flush()
+
+    def close(self):
+        with self.writeLock:
+            self.outputFile.close()
+
+class logSink:
+    """
+    Writes Each Record as One Readable Line (to print, or a logging Function Like logger.info).
+    """
+
+    def __init__(self, logFunction = print):
+        self.logFunction = logFunction
+
+    def __call__(self, record):
+        recordInfo = ", ".join(str(key) + " = " + str(value) for key, value in record.items() if key not in ["stage", "wallTime", "time", "pid"])
+        self.logFunction("Metrics: " + record["stage"] + " Took " + str(round(record["wallTime"]*1000, 3)) + " ms (" + recordInfo + ")")
+
+class stageTimer:
+    """
+    Times One Call of a Stage. The Record Given by 'with' Can be Filled With Counters Before it is Sent.
+    """
+    __slots__ = ("record", "startTime")
+
+    def __init__(self, stageName, numSamples, stageTags):
+        self.record = {"stage": stageName, "numSamples": numSamples}
+        self.record.update(metricContext.tags)
+        self.record.update(stageTags)
+
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+        return self.record
+
+    def __exit__(self, *exceptionInfo):
+        self.record["wallTime"] = time.perf_counter() - self.startTime
+        self.record["time"] = time.time()
+        self.record["pid"] = os.getpid()
+        if activeSink != None:
+            activeSink(self.record)
+
+class disabledTimer:
+    """
+    Stands In for stageTimer While No Sink is Set: the Record is Thrown Away.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exceptionInfo):
+        pass
+
+# Shared by Every Stage While Disabled
+disabledStage = disabledTimer()
+
+
+def setSink(sink):
+    """
+    Sends the Records to sink (a Function Taking a Record Dictionary). None Turns the Instrumentation Off.
+    """
+    global activeSink
+    activeSink = sink
+
+def isEnabled():
+    return activeSink != None
+
+def setContext(**contextTags):
+    """
+    Adds Tags to Every Following Record of This Thread (a Tag Set to None is Removed).
+    """
+    for tagName, tagValue in contextTags.items():
+        if tagValue == None:
+            metricContext.tags.pop(tagName, None)
+        else:
+            metricContext.tags[tagName] = tagValue
+
+def timeStage(stageName, numSamples = 0, **stageTags):
+    """
+    Use as 'with pipelineMetrics.timeStage("butterFilter", numSamples) as stageRecord:'. Costs One Call While Disabled.
+    """
+    if activeSink == None:
+        return disabledStage
+    return stageTimer(stageName, numSamples, stageTags)
+
+def summarizeRecords(records, groupBy = "stage"):
+    """
+    Totals the Records by a Tag: {groupValue: {"calls", "numSamples", "wallTime", <Other Numeric Counters>}}.
+    """
+    summary = {}
+    for record in records:
+        groupSummary = summary.setdefault(record.get(groupBy), {"calls": 0})
+        groupSummary["calls"] += 1
+        for key, value in record.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and key not in ["time", "pid"]:
+                groupSummary[key] = groupSummary.get(key, 0) + value
+            elif isinstance(value, bool):
+                groupSummary[key] = groupSummary.get(key, 0) + int(value)
+
+    return summary
+
+
+if __name__ == "__main__":
+    # Summarize a Metrics File From the Command Line:
+    #    $ python "Helper Files/pipelineMetrics.py" "./Analysis Metrics.jsonl"
+    #    $ python "Helper Files/pipelineMetrics.py" "./Analysis Metrics.jsonl" --groupBy dataFile --stage findLinearBaseline
+    parser = argparse.ArgumentParser(description = "Summarize the stage timings recorded by pipelineMetrics.jsonSink.")
+    parser.add_argument("metricsFile")
+    parser.add_argument("--groupBy", default = "stage", help = "Record tag to total by (stage, dataFile, ...)")
+    parser.add_argument("--stage", default = None, help = "Only use the records of this stage")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.metricsFile):
+        print("No Metrics Found at:", args.metricsFile)
+        sys.exit(1)
+    with open(args.metricsFile) as metricsData:
+        records = [json.loads(line) for line in metricsData if line.strip()]
+    if args.stage != None:
+        records = [record for record in records if record["stage"] == args.stage]
+
+    # Slowest First
+    summary = summarizeRecords(records, args.groupBy)
+    for groupValue, groupSummary in sorted(summary.items(), key = lambda groupItem: -groupItem[1].get("wallTime", 0)):
+        counterInfo = ", ".join(key + " = " + str(round(value, 4)) for key, value in groupSummary.items() if key not in ["calls", "wallTime"])
+        print(str(groupValue) + ": " + str(groupSummary["calls"]) + " Calls in " + str(round(groupSummary.get("wallTime", 0), 4)) + " s (" + counterInfo + ")")
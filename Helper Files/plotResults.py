@@ -0,0 +1,134 @@
+
+# Basic Modules
+import os
+import numpy as np
+# Modules for Parallel Processing
+import concurrent.futures
+
+# Import Python Helper Files
+import pipelineMetrics
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Renderer Kept by Each Worker Process
+workerRenderer = None
+
+
+class plotResults:
+    """
+    Renders the Analysis Plot of Each Sample to a PNG. One Figure (and its Lines, Labels, and Legend) is Made
+    Once and Reused for Every Sample; Only the Data, Title, and Limits Change.
+    """
+
+    def __init__(self, dpi = 300, thumbnail = False):
+        # Modules to Plot (Agg Canvas: Headless, and Figures are Not Kept by pyplot). Loaded on the First Plot, so
+        # Importing This File Stays Fast When the Plots are Turned Off
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        # Thumbnails are Smaller, Lower Resolution Plots for Quick Checks
+        self.renderSettings = (dpi, thumbnail)
+        self.dpi = 72 if thumbnail else dpi
+        self.figure = Figure(figsize = (3.2, 2.4) if thumbnail else (6.4, 4.8))
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+
+        # Create the Lines Once
+        self.rawLine, = self.axes.plot([], [], linewidth=2, label = "Raw Data")
+        self.filteredLine, = self.axes.plot([], [], linewidth=2, label = "Filtered Data")
+        self.baselineLine, = self.axes.plot([], [], linewidth=2, label = "Baseline Subtracted")
+        self.tangentLine, = self.axes.plot([], [], linewidth=2)
+        # Set the Labels
+        self.axes.set_xlabel("Wavelength (nm)")
+        self.axes.set_ylabel("Absorbance (AU)")
+        # Add the Legend
+        self.legend = self.axes.legend()
+
+    def renderSample(self, outputFile, wavelength, absorbance, filteredData, baselineData, sampleResult):
+        """
+        Saves One Sample's Plot. sampleResult is its Row of the Results Table (batchProcessing.resultsType).
+        """
+        leftCutInd = sampleResult["leftCutInd"]; rightCutInd = sampleResult["rightCutInd"]
+        peakWavelength = sampleResult["peakWavelength"]
+        peakHeight = sampleResult["peakHeight"]; peakHeight_Baseline = sampleResult["peakHeight_Baseline"]
+
+        # Plot the Data
+        self.rawLine.set_data(wavelength, absorbance)
+        self.filteredLine.set_data(wavelength, filteredData)
+        self.baselineLine.set_data(wavelength, baselineData)
+        self.tangentLine.set_data(wavelength[[leftCutInd, rightCutInd]], filteredData[[leftCutInd, rightCutInd]])
+        # Set the Title
+        self.axes.set_title(str(sampleResult["sampleName"]) + ": Peak at (" + str(peakWavelength) + ", " + str(np.round(peakHeight_Baseline, 4)) + ")")
+        # Set the Figure Boundaries
+        self.axes.set_xlim(wavelength[leftCutInd] - 20, wavelength[rightCutInd] + 20)
+        self.axes.set_ylim(min(min(filteredData[leftCutInd:rightCutInd]), 0)*1.1, max(peakHeight_Baseline, peakHeight)*1.1)
+        # Save the Plot
+        self.figure.savefig(outputFile, dpi = self.dpi, bbox_extra_artists = (self.legend,), bbox_inches = 'tight')
+
+    def renderFile(self, renderJob):
+        """
+        Saves the Plots of One File's Samples. Returns the Number of Plots Saved.
+        --------------------------------------------------------------------------
+        renderJob: Dictionary With
+            outputDirectory: Folder to Save '<Sample Name>.png' To
+            wavelength, absorbanceMatrix, filteredMatrix, baselineMatrix: The File's Spectra (numSamples x numWavelengths)
+            results: The File's Results Table (batchProcessing.resultsType)
+            renderSamples: Optional Boolean Mask of the Samples to Plot (Default: All With a Result)
+        --------------------------------------------------------------------------
+        """
+        results = renderJob["results"]
+        renderSamples = renderJob.get("renderSamples", np.ones(len(results), dtype=bool)) & (results["leftCutInd"] >= 0)
+        os.makedirs(renderJob["outputDirectory"], exist_ok = True)
+
+        with pipelineMetrics.timeStage("renderPlots", int(renderSamples.sum()), outputDirectory = renderJob["outputDirectory"]):
+            for sampleNum in np.flatnonzero(renderSamples):
+                outputFile = os.path.join(renderJob["outputDirectory"], str(results[sampleNum]["sampleName"]) + ".png")
+                self.renderSample(outputFile, renderJob["wavelength"], renderJob["absorbanceMatrix"][sampleNum], renderJob["filteredMatrix"][sampleNum], renderJob["baselineMatrix"][sampleNum], results[sampleNum])
+
+        return int(renderSamples.sum())
+
+
+def renderFile(renderJob, dpi = 300, thumbnail = False, metricsFile = None):
+    """
+    Renders One Job With This Process's Renderer (Made on First Use). Used by the Worker Pool.
+    """
+    global workerRenderer
+    if metricsFile != None and not pipelineMetrics.isEnabled():
+        pipelineMetrics.setSink(pipelineMetrics.jsonSink(metricsFile))
+    if workerRenderer == None or workerRenderer.renderSettings != (dpi, thumbnail):
+        workerRenderer = plotResults(dpi, thumbnail)
+    return workerRenderer.renderFile(renderJob)
+
+def splitRenderJob(renderJob, maxSamples):
+    """
+    Splits a Job Into Jobs of at Most maxSamples Plots Each, Holding Only Their Own Samples' Rows (Less to Send to a Worker).
+    """
+    results = renderJob["results"]
+    renderSamples = renderJob.get("renderSamples", np.ones(len(results), dtype=bool)) & (results["leftCutInd"] >= 0)
+    sampleNums = np.flatnonzero(renderSamples)
+
+    chunkJobs = []
+    for chunkStart in range(0, len(sampleNums), maxSamples):
+        chunkSamples = sampleNums[chunkStart:chunkStart + maxSamples]
+        chunkJobs.append({"outputDirectory": renderJob["outputDirectory"], "wavelength": renderJob["wavelength"], "absorbanceMatrix": renderJob["absorbanceMatrix"][chunkSamples],
+                          "filteredMatrix": renderJob["filteredMatrix"][chunkSamples], "baselineMatrix": renderJob["baselineMatrix"][chunkSamples], "results": results[chunkSamples]})
+    return chunkJobs
+
+def renderFiles(renderJobs, numWorkers = 1, dpi = 300, thumbnail = False, metricsFile = None, chunksPerWorker = 4):
+    """
+    Renders Every Job (See plotResults.renderFile), Spread Over numWorkers Processes. Returns the Number of Plots Saved.
+    The Jobs are Split Into Chunks of Samples (About chunksPerWorker Per Worker), so One File's Plots Also Render in Parallel.
+    metricsFile: Where the Worker Processes Record Their Timings (pipelineMetrics.jsonSink); None to Not Record Them.
+    """
+    numPlots = sum(int((renderJob.get("renderSamples", True) & (renderJob["results"]["leftCutInd"] >= 0)).sum()) for renderJob in renderJobs)
+    numWorkers = max(1, min(numWorkers if numWorkers != None else os.cpu_count(), numPlots))
+    if numWorkers == 1:
+        return sum(renderFile(renderJob, dpi, thumbnail) for renderJob in renderJobs)
+
+    # Split the Files' Samples Into Chunks
+    maxSamples = max(1, -(-numPlots//(numWorkers*chunksPerWorker)))
+    chunkJobs = [chunkJob for renderJob in renderJobs for chunkJob in splitRenderJob(renderJob, maxSamples)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers = numWorkers) as workerPool:
+        return sum(workerPool.map(renderFile, chunkJobs, [dpi]*len(chunkJobs), [thumbnail]*len(chunkJobs), [metricsFile]*len(chunkJobs)))
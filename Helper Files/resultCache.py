@@ -0,0 +1,135 @@
+
+# Basic Modules
+import os
+import sys
+import json
+import hashlib
+import argparse
+import numpy as np
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+class resultCache:
+    """
+    On-Disk Cache of Analyzed Samples. Each Entry is Keyed by a Hash of the Sample's Raw Data Plus the Analysis
+    Parameters, and Holds the Sample's Result Row and its Filtered/Baseline Subtracted Spectra.
+    The Least Recently Used Entries are Deleted Once the Cache Grows Past maxCacheSize (Bytes).
+    """
+
+    # Bump When the Analysis Changes in a Way That Makes Old Entries Wrong
+    cacheVersion = 3
+
+    def __init__(self, cacheFolder, maxCacheSize = 500*1024**2):
+        self.cacheFolder = cacheFolder
+        self.maxCacheSize = maxCacheSize
+        os.makedirs(self.cacheFolder, exist_ok = True)
+
+    def getSampleKey(self, wavelength, absorbance, analysisParams):
+        """
+        Hash of the Raw Sample Block (Wavelengths and Absorbances) and the Analysis Parameters.
+        """
+        sampleHash = hashlib.sha256()
+        sampleHash.update(json.dumps([self.cacheVersion, analysisParams], sort_keys = True).encode())
+        sampleHash.update(np.ascontiguousarray(wavelength, dtype=np.float64).tobytes())
+        sampleHash.update(np.ascontiguousarray(absorbance, dtype=np.float64).tobytes())
+        return sampleHash.hexdigest()
+
+    def getEntryFile(self, sampleKey):
+        return os.path.join(self.cacheFolder, sampleKey + ".npz")
+
+    def load(self, sampleKey):
+        """
+        Returns (sampleResult, filteredData, baselineData) for a Cached Sample, Else None.
+        """
+        entryFile = self.getEntryFile(sampleKey)
+        try:
+            with np.load(entryFile) as cacheEntry:
+                cachedSample = (cacheEntry["sampleResult"][0], cacheEntry["filteredData"], cacheEntry["baselineData"])
+            # Mark the Entry as Recently Used
+            os.utime(entryFile)
+        except (OSError, KeyError, ValueError):
+            return None
+
+        return cachedSample
+
+    def store(self, sampleKey, sampleResult, filteredData, baselineData):
+        """
+        Saves One Analyzed Sample. Written to a Temporary File First so Other Processes Never Read a Partial Entry.
+        """
+        entryFile = self.getEntryFile(sampleKey)
+        tempFile = entryFile + "." + str(os.getpid()) + ".tmp"
+        with open(tempFile, "wb") as cacheEntry:
+            np.savez(cacheEntry, sampleResult = np.atleast_1d(sampleResult), filteredData = filteredData, baselineData = baselineData)
+        os.replace(tempFile, entryFile)
+
+    def getEntries(self):
+        """
+        Returns [(lastUsedTime, entrySize, entryFile)] for Every Entry in the Cache.
+        """
+        cacheEntries = []
+        for fileName in os.listdir(self.cacheFolder):
+            if fileName.endswith(".npz"):
+                entryFile = os.path.join(self.cacheFolder, fileName)
+                try:
+                    entryStats = os.stat(entryFile)
+                except FileNotFoundError:
+                    continue
+                cacheEntries.append((entryStats.st_mtime, entryStats.st_size, entryFile))
+
+        return cacheEntries
+
+    def evict(self):
+        """
+        Deletes the Least Recently Used Entries Until the Cache Fits in maxCacheSize. Returns the Number Deleted.
+        """
+        cacheEntries = sorted(self.getEntries())
+        cacheSize = sum(entrySize for _, entrySize, _ in cacheEntries)
+        numDeleted = 0
+        for _, entrySize, entryFile in cacheEntries:
+            if cacheSize <= self.maxCacheSize:
+                break
+            try:
+                os.remove(entryFile)
+                numDeleted += 1
+            except FileNotFoundError:
+                pass
+            cacheSize -= entrySize
+
+        return numDeleted
+
+    def invalidate(self):
+        """
+        Deletes Every Entry in the Cache. Returns the Number Deleted.
+        """
+        numDeleted = 0
+        for fileName in os.listdir(self.cacheFolder):
+            if fileName.endswith((".npz", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.cacheFolder, fileName))
+                    numDeleted += 1
+                except FileNotFoundError:
+                    pass
+
+        return numDeleted
+
+
+if __name__ == "__main__":
+    # Manage a Cache From the Command Line:
+    #    $ python "Helper Files/resultCache.py" invalidate "./Data/Analysis Cache/"
+    #    $ python "Helper Files/resultCache.py" info "./Data/Analysis Cache/"
+    parser = argparse.ArgumentParser(description = "Inspect or clear a UV-Vis analysis result cache.")
+    parser.add_argument("command", choices = ["info", "invalidate"])
+    parser.add_argument("cacheFolder")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cacheFolder):
+        print("No Cache Found at:", args.cacheFolder)
+        sys.exit(1)
+    analysisCache = resultCache(args.cacheFolder)
+    if args.command == "invalidate":
+        print("Deleted " + str(analysisCache.invalidate()) + " Cached Samples")
+    else:
+        cacheEntries = analysisCache.getEntries()
+        print(str(len(cacheEntries)) + " Cached Samples Using " + str(np.round(sum(entrySize for _, entrySize, _ in cacheEntries)/1024**2, 2)) + " MB")
@@ -0,0 +1,311 @@
+
+# Basic Modules
+import os
+import sys
+import time
+import json
+import hashlib
+import argparse
+import numpy as np
+
+# Import Python Helper Files
+import excelProcessing
+import batchProcessing
+import wavelengthGrid
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+def getParamsKey(analysisParams):
+    """
+    Hash of the Analysis Parameters a Chunk Was Analyzed With (batchProcessing.getAnalysisParams).
+    """
+    return hashlib.sha256(json.dumps(analysisParams, sort_keys = True).encode()).hexdigest()
+
+def getDataKey(wavelength, absorbanceMatrix):
+    """
+    Hash of the Spectra a Chunk Was Analyzed From (the Wavelength Axis and the Raw Absorbance Matrix).
+    """
+    dataHash = hashlib.sha256(np.ascontiguousarray(wavelength, dtype=np.float64).tobytes())
+    dataHash.update(np.ascontiguousarray(absorbanceMatrix, dtype=np.float64).tobytes())
+    return dataHash.hexdigest()
+
+
+class resultStore:
+    """
+    Columnar Store of Analyzed Samples: Each Append Writes One New Chunk ('<Time>-<PID>.npz') Holding the Result
+    Rows (batchProcessing.resultsType), the Filtered and Baseline Subtracted Spectra, and Their Wavelength Axis.
+    Appending Never Rewrites Old Data, and Several Processes Can Append at Once. When a Sample is Stored Again
+    (Same File and Sample Name), the Newest Row Wins; compact() Merges the Chunks and Drops the Old Rows.
+    Each Chunk Also Keeps the Key of the Analysis Parameters (getParamsKey) and of the Spectra (getDataKey), so a Run
+    Can Tell if the Stored Rows Came From the Same Data and Settings (and Skip Storing Them Again).
+    The Manifest ('Store Manifest.jsonl') Has One Line Per Chunk With its Data File and Keys, so Reading One File's
+    Samples Only Opens That File's Chunks. Chunks Missing From it (Older Stores) are Read Once and Added.
+    """
+
+    def __init__(self, storeFolder):
+        self.storeFolder = storeFolder
+        self.manifestFile = os.path.join(storeFolder, "Store Manifest.jsonl")
+        os.makedirs(self.storeFolder, exist_ok = True)
+
+    def getChunkFiles(self, dataFile = None):
+        """
+        Returns Every Chunk (or Only dataFile's) in the Order They Were Written.
+        """
+        if dataFile != None:
+            return [chunkFile for chunkFile, chunkInfo in self.getManifest().items() if chunkInfo["dataFile"] == dataFile]
+        return sorted(os.path.join(self.storeFolder, fileName) for fileName in os.listdir(self.storeFolder) if fileName.endswith(".npz"))
+
+    def addToManifest(self, chunkInfos):
+        """
+        Appends Manifest Lines ({"chunk": <Chunk File Name>, "dataFile": ..., "paramsKey": ..., "dataKey": ...}). Each
+        Line is One Small Write to a File Opened for Appending, so Processes Appending at Once Do Not Mix Their Lines.
+        """
+        with open(self.manifestFile, "a") as manifestData:
+            for chunkInfo in chunkInfos:
+                manifestData.write(json.dumps(chunkInfo) + "\n")
+
+    def getManifest(self):
+        """
+        Returns {chunkFile: {"dataFile", "paramsKey", "dataKey"}} of Every Chunk, in the Order They Were Written.
+        """
+        manifestInfo = {}
+        if os.path.isfile(self.manifestFile):
+            with open(self.manifestFile, "r") as manifestData:
+                for manifestLine in manifestData:
+                    try:
+                        chunkInfo = json.loads(manifestLine)
+                    except ValueError:
+                        continue
+                    manifestInfo[chunkInfo.pop("chunk")] = chunkInfo
+
+        # Read the Chunks Not in the Manifest (Written Before it Existed, or Its Line Was Lost) and Add Them
+        chunkFiles = self.getChunkFiles(); newInfos = []
+        for chunkFile in chunkFiles:
+            chunkName = os.path.basename(chunkFile)
+            if chunkName not in manifestInfo:
+                try:
+                    with np.load(chunkFile) as chunkData:
+                        manifestInfo[chunkName] = {"dataFile": str(chunkData["dataFile"]), "paramsKey": str(chunkData["paramsKey"]) if "paramsKey" in chunkData.files else "",
+                                                   "dataKey": str(chunkData["dataKey"]) if "dataKey" in chunkData.files else ""}
+                except (OSError, KeyError, ValueError):
+                    continue
+                newInfos.append(dict(chunk = chunkName, **manifestInfo[chunkName]))
+        if len(newInfos) != 0:
+            self.addToManifest(newInfos)
+
+        return {chunkFile: manifestInfo[os.path.basename(chunkFile)] for chunkFile in chunkFiles if os.path.basename(chunkFile) in manifestInfo}
+
+    def append(self, dataFile, wavelength, results, filteredMatrix, baselineMatrix, paramsKey = "", dataKey = ""):
+        """
+        Stores One Data File's Analyzed Samples as a New Chunk. Returns the Chunk's Path.
+        paramsKey: getParamsKey of the Settings the Samples Were Analyzed With ("" if Unknown)
+        dataKey: getDataKey of the Spectra the Samples Were Analyzed From ("" if Unknown)
+        """
+        chunkFile = os.path.join(self.storeFolder, "%020d-%d.npz" % (time.time_ns(), os.getpid()))
+        tempFile = chunkFile + ".tmp"
+        # Written to a Temporary File First so Readers Never See a Partial Chunk
+        with open(tempFile, "wb") as chunkData:
+            np.savez(chunkData, dataFile = np.array(dataFile), paramsKey = np.array(paramsKey), dataKey = np.array(dataKey), wavelength = np.asarray(wavelength, dtype=float),
+                     results = np.asarray(results, dtype=batchProcessing.resultsType), filteredMatrix = np.asarray(filteredMatrix, dtype=float), baselineMatrix = np.asarray(baselineMatrix, dtype=float))
+        os.replace(tempFile, chunkFile)
+        self.addToManifest([{"chunk": os.path.basename(chunkFile), "dataFile": dataFile, "paramsKey": paramsKey, "dataKey": dataKey}])
+
+        return chunkFile
+
+    def isStored(self, dataFile, paramsKey, dataKey, storedKeys = None):
+        """
+        True if dataFile's Newest Chunk Came From the Same Spectra (dataKey) With the Same Settings (paramsKey).
+        storedKeys: getStoredKeys(both = True) Read Earlier (Read Now if None)
+        """
+        storedKeys = storedKeys if storedKeys is not None else self.getStoredKeys(both = True)
+        return dataKey != "" and storedKeys.get(dataFile) == (paramsKey, dataKey)
+
+    def getLatestRows(self, fileNames, sampleNames):
+        """
+        Returns the Index of the Newest Row of Each (fileName, sampleName), in the Order They Were First Stored.
+        """
+        sampleKeys = np.char.add(np.char.add(fileNames, "\n"), sampleNames)
+        _, firstRows = np.unique(sampleKeys, return_index = True)
+        _, lastRows = np.unique(sampleKeys[::-1], return_index = True)
+        lastRows = len(sampleKeys) - 1 - lastRows
+
+        return lastRows[np.argsort(firstRows)]
+
+    def readResults(self, chunkResults):
+        """
+        A Chunk's Result Rows as the Current batchProcessing.resultsType (Columns Added Since the Chunk Was Written are NaN).
+        """
+        if chunkResults.dtype == batchProcessing.resultsType:
+            return chunkResults
+        results = np.zeros(len(chunkResults), dtype=batchProcessing.resultsType)
+        for fieldName in batchProcessing.uncertaintyFields:
+            results[fieldName] = np.nan
+        for fieldName in chunkResults.dtype.names:
+            if fieldName in batchProcessing.resultsType.names:
+                results[fieldName] = chunkResults[fieldName]
+
+        return results
+
+    def loadResults(self, dataFile = None):
+        """
+        Returns the Stored Result Rows (batchProcessing.summaryType) of Every Data File, or Only dataFile.
+        Only the Result Columns are Read; the Spectra Stay on Disk.
+        """
+        summaryChunks = []
+        for chunkFile in self.getChunkFiles(dataFile):
+            with np.load(chunkFile) as chunkData:
+                chunkFileName = str(chunkData["dataFile"])
+                results = self.readResults(chunkData["results"])
+            summary = np.zeros(len(results), dtype=batchProcessing.summaryType)
+            summary["fileName"] = chunkFileName
+            for fieldName in batchProcessing.resultsType.names:
+                summary[fieldName] = results[fieldName]
+            summaryChunks.append(summary)
+        if len(summaryChunks) == 0:
+            return np.zeros(0, dtype=batchProcessing.summaryType)
+
+        summary = np.concatenate(summaryChunks)
+        return summary[self.getLatestRows(summary["fileName"], summary["sampleName"])]
+
+    def loadSpectra(self, dataFile):
+        """
+        Returns (wavelength, results, filteredMatrix, baselineMatrix) of dataFile's Samples (Newest Version of Each).
+        Replaced Rows are Dropped Before the Grids are Compared, so Re-Analyzing a File on a New Grid (e.g. With
+        Calibration) Still Loads. If the Newest Rows Come From Chunks With Different Grids, They are Resampled Onto
+        the Newest Chunk's Grid (NaN Where a Spectrum Does Not Reach).
+        """
+        chunkWavelengths = []; resultChunks = []; filteredChunks = []; baselineChunks = []
+        for chunkFile in self.getChunkFiles(dataFile):
+            with np.load(chunkFile) as chunkData:
+                chunkWavelengths.append(chunkData["wavelength"])
+                resultChunks.append(self.readResults(chunkData["results"])); filteredChunks.append(chunkData["filteredMatrix"]); baselineChunks.append(chunkData["baselineMatrix"])
+        if len(chunkWavelengths) == 0:
+            return np.zeros(0), np.zeros(0, dtype=batchProcessing.resultsType), np.zeros((0, 0)), np.zeros((0, 0))
+
+        # Keep the Newest Version of Each Sample
+        results = np.concatenate(resultChunks)
+        chunkSizes = [len(chunkResults) for chunkResults in resultChunks]
+        chunkInds = np.repeat(np.arange(len(resultChunks)), chunkSizes)
+        keepRows = self.getLatestRows(np.full(len(results), dataFile), results["sampleName"])
+        keepChunks = chunkInds[keepRows]; chunkRows = keepRows - np.concatenate(([0], np.cumsum(chunkSizes)))[keepChunks]
+
+        # Gather the Kept Rows, Bringing Them Onto the Newest Kept Chunk's Grid
+        wavelength = chunkWavelengths[keepChunks.max()] if len(keepRows) != 0 else chunkWavelengths[-1]
+        filteredMatrix = np.zeros((len(keepRows), len(wavelength))); baselineMatrix = np.zeros((len(keepRows), len(wavelength)))
+        for chunkInd in np.unique(keepChunks):
+            rowMask = keepChunks == chunkInd
+            filteredRows = filteredChunks[chunkInd][chunkRows[rowMask]]; baselineRows = baselineChunks[chunkInd][chunkRows[rowMask]]
+            if not np.array_equal(chunkWavelengths[chunkInd], wavelength):
+                filteredRows = self.resampleRows(chunkWavelengths[chunkInd], filteredRows, wavelength)
+                baselineRows = self.resampleRows(chunkWavelengths[chunkInd], baselineRows, wavelength)
+            filteredMatrix[rowMask] = filteredRows; baselineMatrix[rowMask] = baselineRows
+
+        return wavelength, results[keepRows], filteredMatrix, baselineMatrix
+
+    def resampleRows(self, chunkWavelength, spectraMatrix, wavelength):
+        """
+        Interpolates Spectra Stored on chunkWavelength Onto wavelength.
+        """
+        numSamples, numWavelengths = np.shape(spectraMatrix)
+        offsets = numWavelengths*np.arange(numSamples + 1)
+        return wavelengthGrid.resampleSamples(np.tile(chunkWavelength, numSamples), np.asarray(spectraMatrix).ravel(), offsets, wavelength)
+
+    def getDataFiles(self):
+        """
+        Returns the Data Files With Stored Samples, in the Order They Were First Stored.
+        """
+        return list(dict.fromkeys(chunkInfo["dataFile"] for chunkInfo in self.getManifest().values()))
+
+    def getStoredKeys(self, both = False):
+        """
+        Returns {dataFile: paramsKey} of Each Data File's Newest Chunk ("" for Chunks Written Without a Key), or
+        {dataFile: (paramsKey, dataKey)} With both. Only the Manifest is Read.
+        """
+        storedKeys = {}
+        for chunkInfo in self.getManifest().values():
+            storedKeys[chunkInfo["dataFile"]] = (chunkInfo["paramsKey"], chunkInfo["dataKey"]) if both else chunkInfo["paramsKey"]
+
+        return storedKeys
+
+    def compact(self):
+        """
+        Rewrites the Store as One Chunk Per Data File Without the Replaced Rows. Do Not Run While Another Process Appends.
+        Returns the Number of Chunks Removed.
+        """
+        oldChunks = self.getChunkFiles()
+        storedKeys = self.getStoredKeys(both = True)
+        for dataFile in self.getDataFiles():
+            self.append(dataFile, *self.loadSpectra(dataFile), *storedKeys[dataFile])
+        for chunkFile in oldChunks:
+            os.remove(chunkFile)
+        # Rewrite the Manifest Without the Removed Chunks
+        manifestInfo = self.getManifest()
+        with open(self.manifestFile + ".tmp", "w") as manifestData:
+            for chunkFile, chunkInfo in manifestInfo.items():
+                manifestData.write(json.dumps(dict(chunk = os.path.basename(chunkFile), **chunkInfo)) + "\n")
+        os.replace(self.manifestFile + ".tmp", self.manifestFile)
+
+        return len(oldChunks) - len(self.getChunkFiles())
+
+    def exportExcel(self, saveDataFolder, saveExcelName, dataFile = None, includeSpectra = False, summary = None):
+        """
+        Writes the Formatted Excel Report From the Store: dataFile's Samples (Like uvVisAnalysis.py's '<File> Analysis.xlsx'),
+        or Every Stored Sample With the File it Came From. includeSpectra Adds a Sheet Per Sample With its Filtered
+        and Baseline Subtracted Spectrum. Every Sheet is Streamed (excelProcessing.reportWriter), One File at a Time.
+        summary: The Rows to Report (loadResults(dataFile) if None). Pass the Rows Kept in Memory to Skip Reading the Chunks.
+        """
+        summary = summary if summary is not None else self.loadResults(dataFile)
+        summary = summary[summary["peakInd"] >= 0]
+        os.makedirs(saveDataFolder, exist_ok=True)
+        # Replace Any Earlier Export
+        with excelProcessing.reportWriter(saveDataFolder + saveExcelName) as excelReport:
+            # The Summary Sheet (With the Confidence Intervals if Any Were Estimated)
+            headers = ["Sample Name", "Wavelength (nm)", "Absorbance (AU)", "Baseline Subtracted (AU)"]
+            fieldNames = ["sampleName", "peakWavelength", "peakHeight", "peakHeight_Baseline"]
+            if dataFile == None:
+                headers = ["File"] + headers; fieldNames = ["fileName"] + fieldNames
+            if np.isfinite(summary["peakHeight_Baseline_Low"]).any():
+                headers += batchProcessing.uncertaintyHeaders; fieldNames += batchProcessing.uncertaintyFields
+            dataRows = ([row[fieldName].item() for fieldName in fieldNames] for row in summary)
+            excelReport.addSheet("UV-Vis Analysis", headers, dataRows)
+            
+            # One Sheet Per Sample
+            if includeSpectra:
+                dataFiles = [dataFile] if dataFile != None else self.getDataFiles()
+                for fileNum, spectraFile in enumerate(dataFiles):
+                    wavelength, results, filteredMatrix, baselineMatrix = self.loadSpectra(spectraFile)
+                    for sampleNum, sampleName in enumerate(results["sampleName"]):
+                        sheetName = str(sampleName) if dataFile != None else "File " + str(fileNum + 1) + " " + str(sampleName)
+                        excelReport.addSheet(sheetName, ["Wavelength (nm)", "Absorbance (AU)", "Baseline Subtracted (AU)"],
+                                             zip(wavelength.tolist(), filteredMatrix[sampleNum].tolist(), baselineMatrix[sampleNum].tolist()))
+
+
+if __name__ == "__main__":
+    # Manage a Store From the Command Line:
+    #    $ python "Helper Files/resultStore.py" info "./Data/Analysis/Results Store/"
+    #    $ python "Helper Files/resultStore.py" export "./Data/Analysis/Results Store/" "./Data/Analysis/All Results.xlsx"
+    #    $ python "Helper Files/resultStore.py" compact "./Data/Analysis/Results Store/"
+    parser = argparse.ArgumentParser(description = "Inspect, export, or compact a UV-Vis analysis results store.")
+    parser.add_argument("command", choices = ["info", "export", "compact"])
+    parser.add_argument("storeFolder")
+    parser.add_argument("excelFile", nargs = "?", default = None, help = "Excel file to export to")
+    parser.add_argument("--dataFile", default = None, help = "Only export the samples of this data file")
+    parser.add_argument("--spectra", action = "store_true", help = "Also export a sheet per sample with its spectrum")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.storeFolder):
+        print("No Store Found at:", args.storeFolder)
+        sys.exit(1)
+    analysisStore = resultStore(args.storeFolder)
+    if args.command == "export":
+        if args.excelFile == None:
+            parser.error("export needs an excelFile")
+        excelFolder, excelName = os.path.split(os.path.abspath(args.excelFile))
+        analysisStore.exportExcel(excelFolder + "/", excelName, args.dataFile, args.spectra)
+    elif args.command == "compact":
+        print("Removed " + str(analysisStore.compact()) + " Chunks")
+    else:
+        summary = analysisStore.loadResults()
+        print(str(len(analysisStore.getChunkFiles())) + " Chunks Holding " + str(len(summary)) + " Samples From " + str(len(np.unique(summary["fileName"]))) + " Files")
@@ -0,0 +1,217 @@
+
+# Basic Modules
+import os
+import numpy as np
+
+# Import Python Helper Files
+import excelProcessing
+import pipelineMetrics
+import wavelengthGrid
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+class spectrum:
+    """
+    One Sample of a sampleSet. wavelength and absorbance are Views Into the Set's Arrays (Nothing is Copied).
+    """
+    __slots__ = ("sampleName", "wavelength", "absorbance", "sampleHeader")
+
+    def __init__(self, sampleName, wavelength, absorbance, sampleHeader = None):
+        self.sampleName = sampleName
+        self.wavelength = wavelength
+        self.absorbance = absorbance
+        self.sampleHeader = sampleHeader
+
+    def __repr__(self):
+        return "spectrum(" + repr(self.sampleName) + ", " + str(len(self.wavelength)) + " Points)"
+
+
+class sampleSet:
+    """
+    The Spectra of Many Samples in Two Flat, Contiguous Arrays. Sample i's Points are absorbanceData[offsets[i]:offsets[i + 1]].
+    When Every Sample Shares One Wavelength Grid, the Grid is Stored Once and absorbanceData is the Row-Major
+    (numSamples x numWavelengths) Matrix (getMatrix Returns it Without a Copy). Otherwise (Ragged Grids) Each
+    Sample's Wavelengths are Stored Too, at the Same Offsets.
+    --------------------------------------------------------------------------
+        wavelengthData: The Shared Grid (hasSharedGrid), Else Every Sample's Wavelengths Back to Back
+        absorbanceData: Every Sample's Absorbance Back to Back (float64 or float32)
+        offsets: Where Each Sample Starts in absorbanceData (numSamples + 1 Entries)
+        sampleNames: One Name Per Sample ('Sample N')
+        sampleHeaders: One Dictionary Per Sample (e.g. {"timestamp", "wlCalib", "dataFile"}), or None
+    --------------------------------------------------------------------------
+    """
+    __slots__ = ("wavelengthData", "absorbanceData", "offsets", "sampleNames", "sampleHeaders", "hasSharedGrid")
+
+    def __init__(self, wavelengthData, absorbanceData, offsets, sampleNames, sampleHeaders = None, hasSharedGrid = False):
+        self.wavelengthData = wavelengthData
+        self.absorbanceData = absorbanceData
+        self.offsets = offsets
+        self.sampleNames = list(sampleNames)
+        self.sampleHeaders = sampleHeaders if sampleHeaders != None else [{} for _ in self.sampleNames]
+        self.hasSharedGrid = hasSharedGrid
+
+    @classmethod
+    def fromMatrix(cls, wavelength, absorbanceMatrix, sampleNames, sampleHeaders = None):
+        """
+        Wraps Samples Already on One Grid. A C-Contiguous Matrix (Including a Memory Map) is Used Without a Copy.
+        """
+        absorbanceMatrix = np.atleast_2d(absorbanceMatrix)
+        if absorbanceMatrix.shape[1] != len(wavelength):
+            raise ValueError("The Absorbance Matrix Has " + str(absorbanceMatrix.shape[1]) + " Columns but the Grid Has " + str(len(wavelength)) + " Wavelengths")
+        numPoints = len(wavelength)
+        return cls(wavelength, np.ascontiguousarray(absorbanceMatrix).reshape(-1), np.arange(len(absorbanceMatrix) + 1, dtype=np.int64)*numPoints,
+                   sampleNames, sampleHeaders, hasSharedGrid = True)
+
+    @classmethod
+    def fromArrays(cls, wavelengthList, absorbanceList, sampleNames = None, sampleHeaders = None, dtype = np.float64):
+        """
+        Packs One Wavelength and Absorbance Array (or List) Per Sample. The Grid is Stored Once if Every Sample Shares it.
+        """
+        if sampleNames == None:
+            sampleNames = ["Sample " + str(sampleNum + 1) for sampleNum in range(len(absorbanceList))]
+        sampleLengths = np.array([len(absorbance) for absorbance in absorbanceList], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(sampleLengths)))
+        absorbanceData = np.concatenate(absorbanceList).astype(dtype, copy = False) if len(absorbanceList) != 0 else np.zeros(0, dtype=dtype)
+
+        # Store the Grid Once if Every Sample Shares it
+        if len(wavelengthList) == 0:
+            return cls(np.zeros(0), absorbanceData, offsets, sampleNames, sampleHeaders, hasSharedGrid = True)
+        wavelength = np.asarray(wavelengthList[0], dtype=float)
+        if all(len(sampleWavelength) == len(wavelength) and np.array_equal(sampleWavelength, wavelength) for sampleWavelength in wavelengthList[1:]):
+            return cls(wavelength, absorbanceData, offsets, sampleNames, sampleHeaders, hasSharedGrid = True)
+
+        return cls(np.concatenate(wavelengthList).astype(float, copy = False), absorbanceData, offsets, sampleNames, sampleHeaders, hasSharedGrid = False)
+
+    @classmethod
+    def fromFile(cls, dataFile, delimiter = "\t", dtype = np.float64):
+        """
+        Parses a Spectrometer Export (See excelProcessing.processFiles.iterData_UVVis) Into a sampleSet.
+        Each Header Also Records the Data File.
+        """
+        wavelengthList = []; absorbanceList = []; sampleNames = []; sampleHeaders = []
+        with pipelineMetrics.timeStage("readSampleSet", fileName = os.path.basename(dataFile)) as stageRecord:
+            for sampleName, wavelength, absorbance, sampleHeader, _ in excelProcessing.processFiles().iterData_UVVis(dataFile, delimiter = delimiter):
+                sampleNames.append(sampleName)
+                wavelengthList.append(wavelength)
+                absorbanceList.append(absorbance)
+                sampleHeaders.append(dict(sampleHeader, dataFile = dataFile))
+            fileSamples = cls.fromArrays(wavelengthList, absorbanceList, sampleNames, sampleHeaders, dtype)
+            stageRecord["numSamples"] = len(fileSamples)
+
+        return fileSamples
+
+    @classmethod
+    def fromFiles(cls, dataFiles, delimiter = "\t", dtype = np.float64):
+        """
+        Loads Several Exports (e.g. a Whole Experiment Folder) Into One sampleSet.
+        """
+        return cls.concatenate([cls.fromFile(dataFile, delimiter, dtype) for dataFile in dataFiles])
+
+    @classmethod
+    def concatenate(cls, sampleSets):
+        """
+        Joins sampleSets (Keeping One Shared Grid if They All Have the Same One).
+        """
+        sampleSets = [samples for samples in sampleSets if len(samples) != 0]
+        if len(sampleSets) == 0:
+            return cls(np.zeros(0), np.zeros(0), np.zeros(1, dtype=np.int64), [], hasSharedGrid = True)
+
+        sampleNames = [sampleName for samples in sampleSets for sampleName in samples.sampleNames]
+        sampleHeaders = [sampleHeader for samples in sampleSets for sampleHeader in samples.sampleHeaders]
+        absorbanceData = np.concatenate([samples.absorbanceData for samples in sampleSets])
+        offsets = np.concatenate(([0], np.cumsum(np.concatenate([np.diff(samples.offsets) for samples in sampleSets]))))
+
+        # One Grid if They All Share it
+        firstGrid = sampleSets[0].wavelengthData
+        if all(samples.hasSharedGrid and np.array_equal(samples.wavelengthData, firstGrid) for samples in sampleSets):
+            return cls(firstGrid, absorbanceData, offsets, sampleNames, sampleHeaders, hasSharedGrid = True)
+        wavelengthData = np.concatenate([samples.getWavelengths() for samples in sampleSets])
+        return cls(wavelengthData, absorbanceData, offsets, sampleNames, sampleHeaders, hasSharedGrid = False)
+
+    def __len__(self):
+        return len(self.sampleNames)
+
+    def __getitem__(self, sampleKey):
+        """
+        A spectrum View of One Sample, by Index or Name.
+        """
+        sampleInd = self.sampleNames.index(sampleKey) if isinstance(sampleKey, str) else range(len(self))[sampleKey]
+        sampleSlice = slice(self.offsets[sampleInd], self.offsets[sampleInd + 1])
+        wavelength = self.wavelengthData if self.hasSharedGrid else self.wavelengthData[sampleSlice]
+        return spectrum(self.sampleNames[sampleInd], wavelength, self.absorbanceData[sampleSlice], self.sampleHeaders[sampleInd])
+
+    def __iter__(self):
+        for sampleInd in range(len(self)):
+            yield self[sampleInd]
+
+    def __repr__(self):
+        return "sampleSet(" + str(len(self)) + " Samples, " + ("Shared Grid" if self.hasSharedGrid else "Ragged Grids") + ", " + str(self.nbytes) + " Bytes)"
+
+    @property
+    def nbytes(self):
+        return self.wavelengthData.nbytes + self.absorbanceData.nbytes + self.offsets.nbytes
+
+    def getMatrix(self):
+        """
+        Returns (wavelength, absorbanceMatrix) of a Shared Grid, Both Views. Ragged Sets Can be Resampled Onto One Grid First.
+        """
+        if not self.hasSharedGrid:
+            raise ValueError("The Samples Do Not Share the Same Wavelength Grid (Use resample)")
+        return self.wavelengthData, self.absorbanceData.reshape(len(self), len(self.wavelengthData))
+
+    def getWavelengths(self):
+        """
+        Every Sample's Wavelengths Back to Back (at the Same Offsets as absorbanceData).
+        """
+        if self.hasSharedGrid:
+            return np.tile(self.wavelengthData, len(self))
+        return self.wavelengthData
+
+    def select(self, sampleKeys):
+        """
+        A New sampleSet of Some Samples (by Index, Name, or Boolean Mask), in the Given Order.
+        """
+        sampleKeys = np.flatnonzero(sampleKeys) if np.asarray(sampleKeys).dtype == bool else sampleKeys
+        sampleInds = [self.sampleNames.index(sampleKey) if isinstance(sampleKey, str) else int(sampleKey) for sampleKey in sampleKeys]
+        sampleNames = [self.sampleNames[sampleInd] for sampleInd in sampleInds]
+        sampleHeaders = [self.sampleHeaders[sampleInd] for sampleInd in sampleInds]
+        if self.hasSharedGrid:
+            wavelength, absorbanceMatrix = self.getMatrix()
+            return sampleSet.fromMatrix(wavelength, absorbanceMatrix[sampleInds], sampleNames, sampleHeaders)
+
+        return sampleSet.fromArrays([self[sampleInd].wavelength for sampleInd in sampleInds], [self[sampleInd].absorbance for sampleInd in sampleInds],
+                                    sampleNames, sampleHeaders, self.absorbanceData.dtype)
+
+    def calibrate(self):
+        """
+        A New sampleSet With Each Sample's '//WLCalib' Header Applied to its Wavelengths (See wavelengthGrid.calibrateWavelengths).
+        Samples on One Grid With the Same Calibration Stay on One (Shifted) Grid.
+        """
+        wlCalibs = [sampleHeader.get("wlCalib") for sampleHeader in self.sampleHeaders]
+        with pipelineMetrics.timeStage("calibrateSamples", len(self)):
+            if self.hasSharedGrid and len(set(wavelengthGrid.getCalibrationKey(wlCalib) for wlCalib in wlCalibs)) <= 1:
+                wavelengthData = wavelengthGrid.calibrateWavelengths(self.wavelengthData, [0, len(self.wavelengthData)], wlCalibs[:1] if len(self) != 0 else [{}])
+                return sampleSet(wavelengthData, self.absorbanceData, self.offsets, self.sampleNames, self.sampleHeaders, hasSharedGrid = True)
+            wavelengthData = wavelengthGrid.calibrateWavelengths(self.getWavelengths(), self.offsets, wlCalibs)
+
+        return sampleSet(wavelengthData, self.absorbanceData, self.offsets, self.sampleNames, self.sampleHeaders, hasSharedGrid = False)
+
+    def resample(self, commonGrid = None, gridStep = None, fillValue = np.nan):
+        """
+        A New sampleSet With Every Sample Interpolated Onto One Shared Grid, in One Batched Pass (See wavelengthGrid.resampleSamples).
+        commonGrid Defaults to the Wavelengths Every Sample Covers (wavelengthGrid.getCommonGrid), in gridStep Steps.
+        A Set Already on One Grid is Returned as is Unless a Grid or Step is Given.
+        """
+        if self.hasSharedGrid and commonGrid is None and gridStep == None:
+            return self
+        if commonGrid is None:
+            commonGrid = wavelengthGrid.getCommonGrid(self.getWavelengths(), self.offsets, gridStep)
+        commonGrid = np.asarray(commonGrid, dtype=float)
+
+        absorbanceMatrix = wavelengthGrid.resampleSamples(self.getWavelengths(), self.absorbanceData, self.offsets, commonGrid, fillValue)
+        return sampleSet.fromMatrix(commonGrid, absorbanceMatrix, self.sampleNames, self.sampleHeaders)
+
+    def astype(self, dtype):
+        return sampleSet(self.wavelengthData, self.absorbanceData.astype(dtype), self.offsets, self.sampleNames, self.sampleHeaders, self.hasSharedGrid)
@@ -0,0 +1,191 @@
+
+# Basic Modules
+import os
+import time
+import hashlib
+import numpy as np
+
+# Import Python Helper Files
+import excelProcessing
+import batchProcessing
+import resultStore
+import plotResults
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+class sampleStream:
+    """
+    Follows a UV-Vis Export the Spectrometer is Still Appending 'Sample N' Blocks To. Remembers the Byte Offset
+    Just After the Last Complete Sample, so Each Read Only Parses the Newly Appended Samples. A Hash of the Bytes
+    Already Read (Their Start and End) is Kept Too, to Tell When the File Was Replaced. The Content is Compared, Not
+    the Inode, so a File Saved Again With the Same Samples Plus New Ones Carries On.
+    """
+
+    # Bytes Hashed at Each End of the Part Already Read
+    fingerprintBytes = 4096
+
+    def __init__(self, dataFile, delimiter = "\t"):
+        self.dataFile = dataFile
+        self.delimiter = delimiter
+        self.extractData = excelProcessing.processFiles()
+
+        # Where the Next Read Starts
+        self.byteOffset = 0
+        self.numSamples = 0      # Samples Read Since the Last Reset
+        self.fingerprint = None  # getFingerprint() at byteOffset
+
+    def reset(self):
+        self.byteOffset = 0
+        self.numSamples = 0
+        self.fingerprint = None
+
+    def getFingerprint(self, byteOffset):
+        """
+        Hash of the File's First and Last fingerprintBytes Before byteOffset (None if the File is Gone or Too Short).
+        """
+        try:
+            with open(self.dataFile, "rb") as dataFile:
+                fileHead = dataFile.read(min(byteOffset, self.fingerprintBytes))
+                dataFile.seek(max(0, byteOffset - self.fingerprintBytes))
+                fileTail = dataFile.read(byteOffset - max(0, byteOffset - self.fingerprintBytes))
+        except OSError:
+            return None
+        if len(fileTail) != min(byteOffset, self.fingerprintBytes):
+            return None
+        return hashlib.sha256(fileHead + b"\n" + fileTail).hexdigest()
+
+    def wasRewritten(self):
+        """
+        True if the File Was Deleted, Overwritten, or Restarted Since the Last Read: it Shrank Below the Read Offset,
+        or the Part Already Read Changed (Even if the New File is the Same Size or Larger).
+        """
+        if self.byteOffset == 0:
+            return False
+        if not os.path.isfile(self.dataFile) or os.path.getsize(self.dataFile) < self.byteOffset:
+            return True
+        return self.getFingerprint(self.byteOffset) != self.fingerprint
+
+    def readNewSamples(self, includeUnfinished = False):
+        """
+        Returns (wavelengthList, absorbanceList, sampleNames) for the Samples Completed Since the Last Call.
+        A Sample is Only Complete Once a Blank Row Follows it (Unless includeUnfinished; Use When the Run Has Ended).
+        """
+        wavelengthList = []; absorbanceList = []; sampleNames = []
+        if not os.path.isfile(self.dataFile) or os.path.getsize(self.dataFile) == self.byteOffset:
+            return wavelengthList, absorbanceList, sampleNames
+
+        # Parse From the End of the Last Complete Sample
+        for sampleName, wavelength, absorbance, _, endOffset in self.extractData.iterData_UVVis(self.dataFile, self.byteOffset, self.delimiter, includeUnfinished):
+            sampleNames.append(sampleName)
+            wavelengthList.append(wavelength)
+            absorbanceList.append(absorbance)
+            self.byteOffset = endOffset
+        self.numSamples += len(sampleNames)
+        # Remember What Was Read, to Spot a Replaced File
+        if len(sampleNames) != 0:
+            self.fingerprint = self.getFingerprint(self.byteOffset)
+
+        return wavelengthList, absorbanceList, sampleNames
+
+
+class sampleWatcher:
+    """
+    Analyzes the Samples of a sampleStream as They Arrive (uvVisWatchAnalysis.py): Each Batch of New Samples is
+    Analyzed Together, Appended to the Results Store 'Analysis/Results Store/' Next to the File, and Plotted.
+    With makeReport, 'Analysis/<File>/<File> Analysis.xlsx' is Written From the Rows Kept in Memory (Without
+    Re-Reading the Store), at Most Every reportInterval Seconds (updateReport) and When exportReport is Called.
+    """
+
+    def __init__(self, dataFile, samplePipeline = None, peakWavelengthBounds = None, isPeakPositive = True, makePlots = True, plotDPI = 300,
+                 plotThumbnails = False, makeReport = False, reportInterval = 60):
+        self.dataStream = sampleStream(dataFile)
+        # The Pipeline is Kept Between Checks (With warmStart, the Last Tangent Pair Carries Over)
+        self.samplePipeline = samplePipeline if samplePipeline != None else batchProcessing.batchProcessing()
+        self.peakWavelengthBounds = peakWavelengthBounds
+        self.isPeakPositive = isPeakPositive
+        self.sampleRenderer = plotResults.plotResults(plotDPI, plotThumbnails) if makePlots else None
+
+        # Save Next to the File, Like uvVisAnalysis.py
+        self.fileName = os.path.splitext(os.path.basename(dataFile))[0]
+        self.outputDirectory = os.path.join(os.path.dirname(os.path.abspath(dataFile)), "Analysis", self.fileName) + "/"
+        self.analysisStore = resultStore.resultStore(os.path.join(os.path.dirname(os.path.abspath(dataFile)), "Analysis", "Results Store"))
+        self.storeFileName = os.path.basename(dataFile)
+
+        # The Report's Rows: Read From the Store Once, Then Kept Up to Date in Memory
+        self.makeReport = makeReport
+        self.reportInterval = reportInterval
+        self.reportChunks = [self.analysisStore.loadResults(self.storeFileName)] if makeReport else []
+        self.reportPending = False
+        self.lastReportTime = time.time()
+
+    def analyzeNewSamples(self, includeUnfinished = False):
+        """
+        Analyzes the Samples Appended Since the Last Call and Adds Them to the Store (and Plots). Returns the Number Analyzed.
+        """
+        # Start Over if the File Was Replaced
+        if self.dataStream.wasRewritten():
+            print("The File Was Rewritten. Starting Over")
+            self.dataStream.reset()
+            self.samplePipeline.resetWarmStart()
+
+        # Read Only the New Samples
+        wavelengthList, absorbanceList, sampleNames = self.dataStream.readNewSamples(includeUnfinished)
+        if len(sampleNames) == 0:
+            return 0
+
+        # Analyze the New Samples Together
+        try:
+            wavelength, absorbanceMatrix = self.samplePipeline.stackSamples(wavelengthList, absorbanceList)
+        except ValueError as error:
+            print("Skipping " + ", ".join(sampleNames) + ": " + str(error))
+            return 0
+        results, filteredMatrix, baselineMatrix = self.samplePipeline.analyzeSamples(wavelength, absorbanceMatrix, sampleNames, self.peakWavelengthBounds, self.isPeakPositive)
+        for sampleNum, sampleResult in enumerate(results):
+            if sampleResult["leftCutInd"] < 0:
+                print("No Peak or Baseline Found in " + sampleNames[sampleNum] + " Data")
+            else:
+                print(sampleNames[sampleNum] + ": Peak at (" + str(sampleResult["peakWavelength"]) + ", " + str(np.round(sampleResult["peakHeight_Baseline"], 4)) + ")")
+
+        # Append the New Samples to the Store (Re-Analyzed Samples Replace Their Old Rows)
+        paramsKey = resultStore.getParamsKey(self.samplePipeline.getAnalysisParams(self.peakWavelengthBounds, self.isPeakPositive))
+        self.analysisStore.append(self.storeFileName, wavelength, results, filteredMatrix, baselineMatrix, paramsKey)
+        if self.makeReport:
+            newSummary = np.zeros(len(results), dtype=batchProcessing.summaryType)
+            newSummary["fileName"] = self.storeFileName
+            for fieldName in batchProcessing.resultsType.names:
+                newSummary[fieldName] = results[fieldName]
+            self.reportChunks.append(newSummary)
+            self.reportPending = True
+        # Plot the New Samples
+        if self.sampleRenderer != None:
+            self.sampleRenderer.renderFile({"outputDirectory": self.outputDirectory, "wavelength": wavelength, "absorbanceMatrix": absorbanceMatrix if self.isPeakPositive else -absorbanceMatrix,
+                                            "filteredMatrix": filteredMatrix, "baselineMatrix": baselineMatrix, "results": results})
+
+        return len(sampleNames)
+
+    def getReportSummary(self):
+        """
+        The Report's Rows (Newest Version of Each Sample), Merged Into One Chunk.
+        """
+        reportSummary = np.concatenate(self.reportChunks) if len(self.reportChunks) != 0 else np.zeros(0, dtype=batchProcessing.summaryType)
+        reportSummary = reportSummary[self.analysisStore.getLatestRows(reportSummary["fileName"], reportSummary["sampleName"])]
+        self.reportChunks = [reportSummary]
+        return reportSummary
+
+    def exportReport(self):
+        """
+        Rewrites the Excel Report if New Samples Came in Since the Last Export (the Whole Report, so it is Not Done for Every Sample).
+        """
+        if self.makeReport and self.reportPending:
+            self.analysisStore.exportExcel(self.outputDirectory, self.fileName + " Analysis.xlsx", self.storeFileName, summary = self.getReportSummary())
+            self.reportPending = False
+        self.lastReportTime = time.time()
+
+    def updateReport(self):
+        """
+        Exports the Report if reportInterval Seconds Have Passed Since the Last Export.
+        """
+        if time.time() - self.lastReportTime >= self.reportInterval:
+            self.exportReport()
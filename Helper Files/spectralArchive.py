@@ -0,0 +1,215 @@
+
+# Basic Modules
+import os
+import sys
+import json
+import argparse
+import datetime
+import numpy as np
+
+# Import Python Helper Files
+import excelProcessing
+import sampleSet
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# One Row Per Archived Sample. rowInd is the Sample's Row in its Wavelength Grid's Matrix
+archiveIndexType = np.dtype([
+    ("fileID", np.int32),
+    ("sampleName", "U64"),
+    ("timestamp", "U32"),
+    ("time", "datetime64[s]"),
+    ("gridID", np.int32),
+    ("rowInd", np.int64),
+])
+
+
+class spectralArchive:
+    """
+    The Raw Spectra of a Whole Data Tree, Parsed Once and Packed Into float32 Files That are Memory-Mapped on Load.
+    Samples Sharing a Wavelength Grid are Rows of One Contiguous (numSamples x numWavelengths) Matrix, in the Order
+    They Were Compiled, so Each File's Samples are a Slice (a View; Nothing is Copied or Parsed).
+    --------------------------------------------------------------------------
+    Archive Folder:
+        'Grid <ID>.f32': The Absorbance Matrix of Each Wavelength Grid (Row-Major float32)
+        'Archive Index.npz': The Index (archiveIndexType), the Data Files, the Wavelength Grids, and the WLCalib Values
+    --------------------------------------------------------------------------
+    """
+
+    # Bump When the Archive Layout Changes (Version 2: 12-Hour Timestamps are Parsed Instead of Left as NaT)
+    archiveVersion = 2
+    # The Timestamp Line Written After 'Sample N' (Most Exports Use a 12-Hour Clock: '5/20/2022 2:11 PM')
+    timestampFormats = ["%m/%d/%Y %I:%M %p", "%m/%d/%y %I:%M %p", "%m/%d/%Y %I:%M:%S %p", "%m/%d/%y %I:%M:%S %p",
+                        "%m/%d/%y %H:%M", "%m/%d/%Y %H:%M", "%m/%d/%y %H:%M:%S", "%m/%d/%Y %H:%M:%S"]
+
+    def __init__(self, archiveFolder):
+        self.archiveFolder = archiveFolder
+        self.indexFile = os.path.join(archiveFolder, "Archive Index.npz")
+
+        # Filled by load()
+        self.sampleIndex = np.zeros(0, dtype=archiveIndexType)
+        self.dataFiles = []
+        self.gridWavelengths = []
+        self.wlCalibNames = []
+        self.wlCalib = np.zeros((0, 0))
+        self.gridMatrices = []
+
+    def getGridFile(self, gridID):
+        return os.path.join(self.archiveFolder, "Grid " + str(gridID) + ".f32")
+
+    def parseTimestamp(self, timestamp):
+        for timestampFormat in self.timestampFormats:
+            try:
+                return np.datetime64(datetime.datetime.strptime(timestamp, timestampFormat), "s")
+            except (TypeError, ValueError):
+                pass
+        return np.datetime64("NaT", "s")
+
+    def compileArchive(self, dataFiles, rootDirectory = None):
+        """
+        Parses Every Data File and Writes the Archive (Replacing Any Archive Already There). Files are Recorded
+        Relative to rootDirectory When Given. Returns the Number of Samples Archived.
+        """
+        extractData = excelProcessing.processFiles()
+        # Remove the Old Archive's Files
+        os.makedirs(self.archiveFolder, exist_ok = True)
+        for fileName in os.listdir(self.archiveFolder):
+            if fileName.startswith("Grid ") and fileName.endswith(".f32"):
+                os.remove(os.path.join(self.archiveFolder, fileName))
+
+        self.gridWavelengths = []
+        indexRows = []; sampleCalibs = []; gridKeys = {}; gridFiles = []; gridCounts = []
+        try:
+            for fileID, dataFile in enumerate(dataFiles):
+                for sampleName, wavelength, absorbance, sampleHeader, _ in extractData.iterData_UVVis(dataFile):
+                    # Find the Sample's Wavelength Grid (or Start a New One)
+                    gridKey = wavelength.tobytes()
+                    if gridKey not in gridKeys:
+                        gridKeys[gridKey] = len(gridFiles)
+                        self.gridWavelengths.append(wavelength)
+                        gridFiles.append(open(self.getGridFile(len(gridFiles)), "wb"))
+                        gridCounts.append(0)
+                    gridID = gridKeys[gridKey]
+
+                    # Append the Spectrum to its Grid's Matrix
+                    gridFiles[gridID].write(np.asarray(absorbance, dtype=np.float32).tobytes())
+                    indexRows.append((fileID, sampleName, sampleHeader["timestamp"] or "", self.parseTimestamp(sampleHeader["timestamp"]), gridID, gridCounts[gridID]))
+                    sampleCalibs.append(sampleHeader["wlCalib"])
+                    gridCounts[gridID] += 1
+        finally:
+            for gridFile in gridFiles:
+                gridFile.close()
+
+        # Put the WLCalib Values in Columns (NaN Where a Sample Does Not Have One)
+        self.wlCalibNames = []
+        for sampleCalib in sampleCalibs:
+            self.wlCalibNames.extend(calibName for calibName in sampleCalib if calibName not in self.wlCalibNames)
+        self.wlCalib = np.full((len(sampleCalibs), len(self.wlCalibNames)), np.nan)
+        for sampleNum, sampleCalib in enumerate(sampleCalibs):
+            for calibNum, calibName in enumerate(self.wlCalibNames):
+                self.wlCalib[sampleNum, calibNum] = sampleCalib.get(calibName, np.nan)
+
+        # Save the Index
+        self.sampleIndex = np.array(indexRows, dtype=archiveIndexType)
+        self.dataFiles = [os.path.relpath(dataFile, rootDirectory) if rootDirectory != None else dataFile for dataFile in dataFiles]
+        gridArrays = {"grid_" + str(gridID): gridWavelength for gridID, gridWavelength in enumerate(self.gridWavelengths)}
+        np.savez(self.indexFile, sampleIndex = self.sampleIndex, dataFiles = np.array(self.dataFiles, dtype=str), wlCalibNames = np.array(self.wlCalibNames, dtype=str),
+                 wlCalib = self.wlCalib, archiveInfo = np.array(json.dumps({"archiveVersion": self.archiveVersion, "gridCounts": gridCounts})), **gridArrays)
+        self.load()
+
+        return len(self.sampleIndex)
+
+    def load(self):
+        """
+        Reads the Index and Memory-Maps Every Grid's Matrix (Read Only). Returns Itself.
+        """
+        with np.load(self.indexFile) as archiveData:
+            archiveInfo = json.loads(str(archiveData["archiveInfo"]))
+            if archiveInfo["archiveVersion"] != self.archiveVersion:
+                raise ValueError("The Archive at " + self.archiveFolder + " Was Made by a Different Version; Compile it Again")
+            self.sampleIndex = archiveData["sampleIndex"]
+            self.dataFiles = list(archiveData["dataFiles"])
+            self.wlCalibNames = list(archiveData["wlCalibNames"])
+            self.wlCalib = archiveData["wlCalib"]
+            self.gridWavelengths = [archiveData["grid_" + str(gridID)] for gridID in range(len(archiveInfo["gridCounts"]))]
+
+        self.gridMatrices = []
+        for gridID, numSamples in enumerate(archiveInfo["gridCounts"]):
+            self.gridMatrices.append(np.memmap(self.getGridFile(gridID), dtype=np.float32, mode="r", shape=(numSamples, len(self.gridWavelengths[gridID]))))
+
+        return self
+
+    def getGrid(self, gridID):
+        """
+        Returns (wavelength, absorbanceMatrix) of Every Sample on One Wavelength Grid. The Matrix is the Memory Map Itself.
+        """
+        return self.gridWavelengths[gridID], self.gridMatrices[gridID]
+
+    def getFileSamples(self, dataFile):
+        """
+        Returns (wavelength, absorbanceMatrix, sampleIndex) of One File's Samples. The Matrix is a View of the Memory Map
+        When the File's Samples Share One Grid (Always the Case for the Spectrometer's Exports).
+        """
+        fileID = self.dataFiles.index(dataFile)
+        sampleIndex = self.sampleIndex[self.sampleIndex["fileID"] == fileID]
+        if len(sampleIndex) == 0:
+            return np.zeros(0), np.zeros((0, 0), dtype=np.float32), sampleIndex
+        if not (sampleIndex["gridID"] == sampleIndex["gridID"][0]).all():
+            raise ValueError("The Samples of " + dataFile + " Do Not Share the Same Wavelength Grid")
+
+        return self.gridWavelengths[sampleIndex["gridID"][0]], self.getRows(sampleIndex), sampleIndex
+
+    def getSampleSet(self, dataFile):
+        """
+        One File's Samples as a sampleSet Backed by the Memory Map (float32; Nothing is Read Until it is Used).
+        Each Sample's Header Keeps its '//WLCalib' Values, so the Set Can be Calibrated Like One Read From the File.
+        """
+        wavelength, absorbanceMatrix, sampleIndex = self.getFileSamples(dataFile)
+        wlCalibs = self.getCalibrations(np.flatnonzero(self.sampleIndex["fileID"] == self.dataFiles.index(dataFile)))
+        sampleHeaders = [{"timestamp": str(sampleRow["timestamp"]) or None, "wlCalib": wlCalib, "dataFile": dataFile} for sampleRow, wlCalib in zip(sampleIndex, wlCalibs)]
+        return sampleSet.sampleSet.fromMatrix(wavelength, absorbanceMatrix, [str(sampleName) for sampleName in sampleIndex["sampleName"]], sampleHeaders)
+
+    def getCalibrations(self, sampleNums):
+        """
+        The '//WLCalib' Values of the Given Samples (Rows of sampleIndex), as {"Shift": 0.17333, "261S": -0.08, ...}
+        Without the Calibration Lines a Sample Did Not Have.
+        """
+        return [{str(calibName): float(calibValue) for calibName, calibValue in zip(self.wlCalibNames, self.wlCalib[sampleNum]) if not np.isnan(calibValue)} for sampleNum in sampleNums]
+
+    def getRows(self, sampleIndex):
+        """
+        Returns the Spectra of the Given Index Rows (All on One Grid). Consecutive Rows Come Back as a View; Other
+        Selections Have to be Gathered Into a New Array.
+        """
+        gridMatrix = self.gridMatrices[sampleIndex["gridID"][0]]
+        rowInds = sampleIndex["rowInd"]
+        if len(rowInds) != 0 and (np.diff(rowInds) == 1).all():
+            return gridMatrix[rowInds[0]:rowInds[-1] + 1]
+
+        return gridMatrix[rowInds]
+
+
+if __name__ == "__main__":
+    # Build or Inspect an Archive From the Command Line:
+    #    $ python "Helper Files/spectralArchive.py" compile ./Data/ "./Data/Spectral Archive/"
+    #    $ python "Helper Files/spectralArchive.py" info ./Data/ "./Data/Spectral Archive/"
+    import batchRunner
+    parser = argparse.ArgumentParser(description = "Pack every UV-Vis .tsv export under a folder into a memory-mapped archive.")
+    parser.add_argument("command", choices = ["compile", "info"])
+    parser.add_argument("rootDirectory")
+    parser.add_argument("archiveFolder")
+    args = parser.parse_args()
+
+    archive = spectralArchive(args.archiveFolder)
+    if args.command == "compile":
+        dataFiles = batchRunner.findDataFiles(args.rootDirectory)
+        print("Archived " + str(archive.compileArchive(dataFiles, args.rootDirectory)) + " Samples From " + str(len(dataFiles)) + " Files")
+    elif not os.path.isfile(archive.indexFile):
+        print("No Archive Found at:", args.archiveFolder)
+        sys.exit(1)
+    else:
+        archive.load()
+    for gridID, (gridWavelength, gridMatrix) in enumerate(zip(archive.gridWavelengths, archive.gridMatrices)):
+        print("Grid " + str(gridID) + ": " + str(len(gridMatrix)) + " Samples, " + str(gridWavelength[0]) + " to " + str(gridWavelength[-1]) + " nm (" + str(len(gridWavelength)) + " Points)")
@@ -0,0 +1,139 @@
+
+# Basic Modules
+import re
+import numpy as np
+
+# Import Python Helper Files
+import pipelineMetrics
+
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# A Calibration Line's Key: its Wavelength Then a Letter (e.g. '261S')
+calibrationLinePattern = re.compile(r"^(\d+(?:\.\d+)?)")
+
+
+def parseCalibration(wlCalib):
+    """
+    Splits a Sample's '//WLCalib' Values ({"Shift": 0.17333, "261S": -0.08, ...}) Into the Overall Shift and the
+    Correction at Each Calibration Line. Unknown Keys are Ignored.
+    Returns (wavelengthShift, lineWavelengths, lineCorrections), the Lines Sorted by Wavelength.
+    """
+    wavelengthShift = 0.0; calibrationLines = []
+    for calibrationKey, calibrationValue in (wlCalib if wlCalib != None else {}).items():
+        lineMatch = calibrationLinePattern.match(calibrationKey)
+        if calibrationKey.lower() == "shift":
+            wavelengthShift = float(calibrationValue)
+        elif lineMatch != None:
+            calibrationLines.append((float(lineMatch.group(1)), float(calibrationValue)))
+    calibrationLines.sort()
+
+    lineWavelengths = np.array([lineWavelength for lineWavelength, _ in calibrationLines], dtype=float)
+    lineCorrections = np.array([lineCorrection for _, lineCorrection in calibrationLines], dtype=float)
+    return wavelengthShift, lineWavelengths, lineCorrections
+
+def getCalibrationCorrection(wavelength, wlCalib):
+    """
+    The Correction (nm) to Add to Each Wavelength: the Shift Plus the Line Corrections, Interpolated Linearly Between
+    the Calibration Lines (and Held Constant Past the First and Last Line).
+    """
+    wavelengthShift, lineWavelengths, lineCorrections = parseCalibration(wlCalib)
+    wavelength = np.asarray(wavelength, dtype=float)
+    if len(lineWavelengths) == 0:
+        return np.full(wavelength.shape, wavelengthShift)
+    return wavelengthShift + np.interp(wavelength, lineWavelengths, lineCorrections)
+
+def getCalibrationKey(wlCalib):
+    return tuple(sorted((wlCalib if wlCalib != None else {}).items()))
+
+def calibrateWavelengths(wavelengthData, offsets, wlCalibs):
+    """
+    Applies Each Sample's Calibration to its Points of wavelengthData (Every Sample's Wavelengths Back to Back).
+    Samples are Grouped by Calibration, so There is One Interpolation Per Distinct Calibration (Usually One Per
+    Instrument), Not Per Sample.
+    """
+    wavelengthData = np.asarray(wavelengthData, dtype=float)
+    sampleInds = np.repeat(np.arange(len(wlCalibs)), np.diff(offsets))
+    calibrationKeys = [getCalibrationKey(wlCalib) for wlCalib in wlCalibs]
+    uniqueKeys = list(dict.fromkeys(calibrationKeys))
+    calibrationInds = np.array([uniqueKeys.index(calibrationKey) for calibrationKey in calibrationKeys], dtype=np.int64)
+
+    calibratedData = wavelengthData.copy()
+    for calibrationInd, calibrationKey in enumerate(uniqueKeys):
+        pointMask = calibrationInds[sampleInds] == calibrationInd
+        calibratedData[pointMask] += getCalibrationCorrection(wavelengthData[pointMask], dict(calibrationKey))
+
+    return calibratedData
+
+def getCommonGrid(wavelengthData, offsets, gridStep = None):
+    """
+    The Grid Every Sample Covers: From the Largest First Wavelength to the Smallest Last One in gridStep Steps
+    (Default: the Median Spacing of the Data). The Grid Points are Multiples of gridStep, so Grids Line Up Across Files.
+    """
+    wavelengthData = np.asarray(wavelengthData, dtype=float)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if len(offsets) < 2 or (np.diff(offsets) < 2).any():
+        raise ValueError("Every Sample Needs at Least Two Points to be Resampled")
+    if gridStep == None:
+        sampleSpacing = np.diff(wavelengthData)
+        sampleSpacing[offsets[1:-1] - 1] = np.nan    # Not a Spacing: the Jump Between Two Samples
+        gridStep = float(np.nanmedian(sampleSpacing))
+    if gridStep <= 0:
+        raise ValueError("The Grid Step Must be Positive")
+
+    # Only Where Every Sample Has Data
+    gridStart = np.ceil(wavelengthData[offsets[:-1]].max()/gridStep - 1E-9)*gridStep
+    gridEnd = np.floor(wavelengthData[offsets[1:] - 1].min()/gridStep + 1E-9)*gridStep
+    if gridEnd < gridStart:
+        raise ValueError("The Samples Do Not Have Any Wavelengths in Common")
+    return gridStart + gridStep*np.arange(int(np.round((gridEnd - gridStart)/gridStep)) + 1)
+
+def resampleSamples(wavelengthData, absorbanceData, offsets, commonGrid, fillValue = np.nan):
+    """
+    Linearly Interpolates Every Sample Onto commonGrid in One Batched Pass (No Loop Over the Samples).
+    Each Sample's Points are Offset by its Index Times the Wavelength Span, so the Whole Set is One Sorted Array
+    and a Single searchsorted Finds Every Grid Point's Neighbors.
+    --------------------------------------------------------------------------
+    Input Variable Definitions:
+        wavelengthData: Every Sample's Wavelengths Back to Back (Increasing Within Each Sample)
+        absorbanceData: Every Sample's Absorbance Back to Back
+        offsets: Where Each Sample Starts (numSamples + 1 Entries)
+        commonGrid: The Wavelengths to Interpolate At
+        fillValue: The Value of Grid Points Outside a Sample's Wavelengths
+    Returns:
+        absorbanceMatrix: (numSamples x len(commonGrid))
+    --------------------------------------------------------------------------
+    """
+    wavelengthData = np.asarray(wavelengthData, dtype=float)
+    absorbanceData = np.asarray(absorbanceData)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    commonGrid = np.asarray(commonGrid, dtype=float)
+    numSamples = len(offsets) - 1
+    with pipelineMetrics.timeStage("resampleSamples", numSamples, numGridPoints = len(commonGrid)):
+        if numSamples == 0:
+            return np.zeros((0, len(commonGrid)), dtype=absorbanceData.dtype)
+        if (np.diff(offsets) < 2).any():
+            raise ValueError("Every Sample Needs at Least Two Points to be Resampled")
+        sampleInds = np.repeat(np.arange(numSamples), np.diff(offsets))
+        pointSpacing = np.diff(wavelengthData)
+        if (pointSpacing[sampleInds[1:] == sampleInds[:-1]] <= 0).any():
+            raise ValueError("The Wavelengths Must Increase Within Each Sample")
+
+        # Stack the Samples End to End Along One Sorted Axis
+        minWavelength = min(wavelengthData.min(), commonGrid.min())
+        wavelengthSpan = max(wavelengthData.max(), commonGrid.max()) - minWavelength + 1
+        pointKeys = sampleInds*wavelengthSpan + (wavelengthData - minWavelength)
+        gridKeys = np.arange(numSamples)[:, None]*wavelengthSpan + (commonGrid - minWavelength)
+        # The Points on Either Side of Each Grid Point (Within the Same Sample)
+        rightInds = np.clip(np.searchsorted(pointKeys, gridKeys, side = "right"), offsets[:-1, None] + 1, offsets[1:, None] - 1)
+        leftInds = rightInds - 1
+
+        # Interpolate
+        leftWavelengths = wavelengthData[leftInds]
+        interpWeights = (commonGrid - leftWavelengths)/(wavelengthData[rightInds] - leftWavelengths)
+        absorbanceMatrix = absorbanceData[leftInds] + interpWeights*(absorbanceData[rightInds] - absorbanceData[leftInds])
+        outsideSample = (commonGrid < wavelengthData[offsets[:-1], None]) | (wavelengthData[offsets[1:] - 1, None] < commonGrid)
+        absorbanceMatrix[outsideSample] = fillValue
+
+    return absorbanceMatrix.astype(absorbanceData.dtype, copy = False)
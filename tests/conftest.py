@@ -0,0 +1,49 @@
+
+# Basic Modules
+import os
+import sys
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Helper Files'))  # Folder with All the Helper Files
+
+# The Example Exports Shipped With the Repo
+dataFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+
+def makeSpectrum(wavelength, peakCenters = (280,), peakHeights = (1.0,), peakWidth = 8.0, baselineSlope = -0.002, noiseLevel = 0.002, randomSeed = 0):
+    """
+    A Synthetic Absorbance Spectrum: Gaussian Peaks on a Sloped Linear Background, Plus a Little Noise.
+    """
+    wavelength = np.asarray(wavelength, dtype=float)
+    absorbance = 0.5 + baselineSlope*(wavelength - wavelength[0])
+    for peakCenter, peakHeight in zip(peakCenters, peakHeights):
+        absorbance = absorbance + peakHeight*np.exp(-0.5*((wavelength - peakCenter)/peakWidth)**2)
+    return absorbance + noiseLevel*np.random.default_rng(randomSeed).standard_normal(len(wavelength))
+
+def writeExport(exportFile, wavelengthList, absorbanceList, wlCalib = None, blankRow = "", lineEnd = "\r\n"):
+    """
+    Writes Spectra in the Spectrometer's Export Layout ('Sample N', a Timestamp, the Column Names, the //WLCalib
+    Lines, '//QSpecEnd:', Then Tab Separated Rows, and Two Blank Rows Between Samples).
+    blankRow: The Text of a Blank Row (Some Exports Write a Lone Tab)
+    """
+    exportLines = []
+    for sampleNum, (wavelength, absorbance) in enumerate(zip(wavelengthList, absorbanceList)):
+        exportLines += ["Sample " + str(sampleNum + 1), "4/28/2022 1:" + str(23 + sampleNum) + " PM", "Wavelength (nm)\t10mm Absorbance"]
+        exportLines += ["//WLCalib: " + calibrationKey + " \t" + str(calibrationValue) + "\t" for calibrationKey, calibrationValue in (wlCalib or {}).items()]
+        exportLines += ["//QSpecEnd: "]
+        exportLines += [repr(float(wavelengthVal)) + "\t" + repr(float(absorbanceVal)) for wavelengthVal, absorbanceVal in zip(wavelength, absorbance)]
+        exportLines += [blankRow, blankRow]
+    with open(exportFile, "w", newline = "") as exportData:
+        exportData.write(lineEnd.join(exportLines) + lineEnd)
+    return exportFile
+
+@pytest.fixture
+def shortExport(tmp_path):
+    """
+    Three Short Spectra (190-400 nm, 0.5 nm Steps) With a Calibration Header.
+    """
+    wavelength = np.arange(190, 400.5, 0.5)
+    absorbanceList = [makeSpectrum(wavelength, peakHeights = (peakHeight,), randomSeed = sampleNum) for sampleNum, peakHeight in enumerate([1.0, 0.8, 1.2])]
+    return writeExport(str(tmp_path / "UV-Vis Short.tsv"), [wavelength]*3, absorbanceList, wlCalib = {"Shift": 0.17333, "261S": -0.08, "362S": -0.3})
@@ -0,0 +1,89 @@
+
+# Basic Modules
+import threading
+import concurrent.futures
+import numpy as np
+
+# Import Python Helper Files
+import analysisClient
+import analysisServer
+import batchRunner
+from conftest import makeSpectrum, writeExport
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getRaggedExport(exportFile):
+    """
+    Four Samples on Two Grids (as When the Instrument's Step Changes Mid-Run).
+    """
+    wavelengthList = [np.arange(190, 400.5, 0.5), np.arange(190, 400.5, 0.5), np.arange(191, 399, 1.0), np.arange(191, 399, 1.0)]
+    absorbanceList = [makeSpectrum(wavelength, peakHeights = (0.6 + 0.2*sampleNum,), randomSeed = sampleNum) for sampleNum, wavelength in enumerate(wavelengthList)]
+    return writeExport(exportFile, wavelengthList, absorbanceList)
+
+def test_analyzeRequest_RaggedSubset(tmp_path):
+    """
+    A Ragged File is Resampled Like the Batch CLI, and Only the Requested Samples are Analyzed.
+    """
+    dataFile = getRaggedExport(str(tmp_path / "UV-Vis Ragged.tsv"))
+    analysisParams = batchRunner.getDefaultParams()
+    analysisParams.update(peakWavelengthBounds = [240, 320], makePlots = False)
+    summary, fileReports = batchRunner.runFiles([dataFile], analysisParams, numWorkers = 1)
+    assert fileReports[0]["error"] == None
+
+    service = analysisServer.analysisService()
+    try:
+        response = service.submit({"dataFile": dataFile, "sampleNames": ["Sample 4", "Sample 2"], "peakWavelengthBounds": [240, 320]}).result(60)
+        assert response["error"] == None
+        assert [sampleResult["sampleName"] for sampleResult in response["results"]] == ["Sample 2", "Sample 4"]
+        for sampleResult in response["results"]:
+            batchRow = summary[summary["sampleName"] == sampleResult["sampleName"]][0]
+            assert sampleResult["peakWavelength"] == batchRow["peakWavelength"]
+            assert np.isclose(sampleResult["peakHeight_Baseline"], batchRow["peakHeight_Baseline"])
+
+        response = service.submit({"dataFile": dataFile, "sampleNames": ["Sample 5"]}).result(60)
+        assert "Sample 5" in response["error"]
+    finally:
+        service.stop()
+
+def test_requestTimeout(monkeypatch):
+    """
+    A Request That Outlasts the Timeout Gets a 504 With a JSON Error, Not a Dropped Connection.
+    """
+    service = analysisServer.analysisService()
+    monkeypatch.setattr(service, "submit", lambda analysisRequest: concurrent.futures.Future())
+    monkeypatch.setattr(analysisServer.analysisRequestHandler, "requestTimeout", 0.1)
+    server = analysisServer.makeServer(service, port = 0)
+    serverThread = threading.Thread(target = server.serve_forever, daemon = True)
+    serverThread.start()
+    try:
+        statusCode, response = analysisClient.callServer("http://127.0.0.1:" + str(server.server_address[1]), "/analyze", {"dataFile": "UV-Vis.tsv"}, timeout = 30)
+        assert statusCode == 504
+        assert "Longer Than" in response["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+def test_workerSurvivesBadRequest(tmp_path, monkeypatch):
+    """
+    A Request That Fails Before its Analysis (Here the Plots Cannot be Made) Gets an Error, and the Worker Keeps Serving.
+    """
+    def missingPlots(*plotArgs):
+        raise ImportError("No module named 'matplotlib'")
+    monkeypatch.setattr(analysisServer.plotResults, "plotResults", missingPlots)
+    dataFile = getRaggedExport(str(tmp_path / "UV-Vis Ragged.tsv"))
+
+    service = analysisServer.analysisService()
+    try:
+        response = service.submit({"dataFile": dataFile, "peakWavelengthBounds": [240, 320], "makePlots": True}).result(60)
+        assert "matplotlib" in response["error"]
+        assert response["results"] == []
+
+        response = service.submit({"dataFile": dataFile, "peakWavelengthBounds": [240, 320], "makePlots": False, "store": False}).result(60)
+        assert response["error"] == None
+        assert len(response["results"]) == 4
+        assert service.getStatus()["failed"] == 1
+    finally:
+        service.stop()
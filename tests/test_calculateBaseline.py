@@ -0,0 +1,190 @@
+
+# Basic Modules
+import os
+import glob
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import batchProcessing
+import calculateBaseline
+import excelProcessing
+import pipelineMetrics
+import sampleSet
+from conftest import makeSpectrum, dataFolder
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# Short Spectra (261 Points) Keep the Exhaustive Search Fast
+wavelength = np.arange(190, 320.5, 0.5)
+
+# (peakCenters, peakHeights, isPeakPositive, peakWavelengthBounds); None Bounds Search the Whole Spectrum
+spectrumCases = {
+    "singlePeak": ((270,), (1.0,), True, [240, 300]),
+    "overlappingPeaks": ((262, 280), (0.6, 1.0), True, [240, 300]),
+    "smallPeakOnSlope": ((285,), (0.05,), True, [240, 310]),
+    "negativePeak": ((275,), (0.8,), False, [240, 300]),
+    "negativeOverlapping": ((258, 276), (0.5, 0.7), False, [240, 300]),
+    "unbounded": ((255, 290), (0.7, 0.4), True, None),
+    "unboundedNegative": ((268,), (0.9,), False, None),
+}
+
+
+def getFilteredSpectra(caseName, numSamples = 3):
+    """
+    A Case's Spectra (Different Noise Per Sample), Filtered and Sign Flipped as in batchProcessing.analyzeSamples.
+    """
+    peakCenters, peakHeights, isPeakPositive, peakWavelengthBounds = spectrumCases[caseName]
+    peakSign = 1 if isPeakPositive else -1
+    absorbanceMatrix = np.array([makeSpectrum(wavelength, peakCenters, [peakSign*peakHeight for peakHeight in peakHeights], randomSeed = sampleNum) for sampleNum in range(numSamples)])
+    samplePipeline = batchProcessing.batchProcessing()
+    filteredMatrix = samplePipeline.filterSamples(wavelength, peakSign*absorbanceMatrix)
+    return samplePipeline.baselineObject, filteredMatrix, peakWavelengthBounds if peakWavelengthBounds != None else [wavelength[0] - 1, wavelength[-1] + 1]
+
+@pytest.mark.parametrize("caseName", spectrumCases)
+def test_findLinearBaseline_MatchesExhaustive(caseName):
+    """
+    The Bounded Tangent Search Finds the Same Pair as Checking Every Pair.
+    """
+    baselineObject, filteredMatrix, peakWavelengthBounds = getFilteredSpectra(caseName)
+    numChecked = 0
+    for filteredData in filteredMatrix:
+        peakInd = baselineObject.findPeak(wavelength, filteredData, peakWavelengthBounds)
+        if peakInd == None:
+            continue
+        assert tuple(baselineObject.findLinearBaseline(wavelength, filteredData, peakInd)) == tuple(baselineObject.findLinearBaseline_Exhaustive(wavelength, filteredData, peakInd))
+        numChecked += 1
+    assert numChecked != 0
+
+@pytest.mark.parametrize("caseName", spectrumCases)
+def test_findPeaks_MatchesFindPeak(caseName):
+    """
+    The Batched Peak Search Picks the Same Peak as findPeak on Each Spectrum.
+    """
+    baselineObject, filteredMatrix, peakWavelengthBounds = getFilteredSpectra(caseName)
+    peakInds = baselineObject.findPeaks(wavelength, filteredMatrix, peakWavelengthBounds)
+    for filteredData, peakInd in zip(filteredMatrix, peakInds):
+        singlePeakInd = baselineObject.findPeak(wavelength, filteredData, peakWavelengthBounds)
+        assert peakInd == (singlePeakInd if singlePeakInd != None else -1)
+
+@pytest.mark.parametrize("caseName", spectrumCases)
+def test_findLinearBaselines_Local_MatchesExhaustive(caseName):
+    """
+    Seeded Near the Exhaustive Pair, the Local Search Lands Back on it (in Small Batches Too), and Rows Without a Peak
+    or Seed Get -1.
+    """
+    baselineObject, filteredMatrix, peakWavelengthBounds = getFilteredSpectra(caseName)
+    peakInds = baselineObject.findPeaks(wavelength, filteredMatrix, peakWavelengthBounds)
+    exhaustivePairs = np.array([baselineObject.findLinearBaseline_Exhaustive(wavelength, filteredData, peakInd) if peakInd >= 0 else (None, None)
+                                for filteredData, peakInd in zip(filteredMatrix, peakInds)], dtype=float)
+    exhaustivePairs = np.nan_to_num(exhaustivePairs, nan = -1).astype(np.int64)
+    seedLefts = np.where(exhaustivePairs[:, 0] >= 0, exhaustivePairs[:, 0] + 2, -1); seedRights = np.where(exhaustivePairs[:, 1] >= 0, exhaustivePairs[:, 1] - 3, -1)
+    for maxWindowPoints in [2**20, 1]:
+        leftCutInds, rightCutInds = baselineObject.findLinearBaselines_Local(wavelength, filteredMatrix, peakInds, seedLefts, seedRights, maxWindowPoints = maxWindowPoints)
+        np.testing.assert_array_equal(np.column_stack((leftCutInds, rightCutInds)), exhaustivePairs)
+    leftCutInds, rightCutInds = baselineObject.findLinearBaselines_Local(wavelength, filteredMatrix, np.full(len(peakInds), -1), seedLefts, seedRights)
+    assert (leftCutInds == -1).all() and (rightCutInds == -1).all()
+
+def test_estimateUncertainty():
+    """
+    The Bootstrap Intervals are Ordered, Hold the Sample's Own Estimate, and Do Not Depend on How the Replicates are Batched.
+    """
+    peakCenters, peakHeights, isPeakPositive, peakWavelengthBounds = spectrumCases["singlePeak"]
+    absorbanceMatrix = np.array([makeSpectrum(wavelength, peakCenters, peakHeights, noiseLevel = 0.01, randomSeed = sampleNum) for sampleNum in range(3)])
+    samplePipeline = batchProcessing.batchProcessing()
+    samplePipeline.numReplicates = 50
+    results, filteredMatrix, _ = samplePipeline.analyzeSamples(wavelength, absorbanceMatrix, ["Sample 1", "Sample 2", "Sample 3"], peakWavelengthBounds)
+    for fieldName in ["peakWavelength", "peakHeight_Baseline"]:
+        assert np.isfinite(results[fieldName + "_Low"]).all()
+        assert (results[fieldName + "_Low"] <= results[fieldName]).all() and (results[fieldName] <= results[fieldName + "_High"]).all()
+    assert (results["peakHeight_Baseline_Low"] < results["peakHeight_Baseline_High"]).all()
+
+    # One Sample's Replicates Per Batch
+    batchedResults = samplePipeline.estimateUncertainty(wavelength, absorbanceMatrix, filteredMatrix, results.copy(), peakWavelengthBounds, maxReplicateRows = 1)
+    np.testing.assert_array_equal(batchedResults, results)
+
+def test_findPeaks_NoBounds():
+    """
+    The Pipeline Takes None Bounds as the Whole Spectrum, the Same as multiPeak.findAllPeaks.
+    """
+    baselineObject, filteredMatrix, _ = getFilteredSpectra("unbounded")
+    samplePipeline = batchProcessing.batchProcessing(baselineObject)
+    peakInds = samplePipeline.findPeaks(wavelength, filteredMatrix, None)
+    assert (peakInds >= 0).all()
+    np.testing.assert_array_equal(peakInds, baselineObject.findPeaks(wavelength, filteredMatrix, [wavelength[0] - 1, wavelength[-1] + 1]))
+
+def test_findLinearBaseline_NoPeak():
+    """
+    A Flat Spectrum Has No Peak, and the Default (Empty) Bounds Never Find One.
+    """
+    baselineObject = calculateBaseline.bestLinearFit()
+    assert baselineObject.findPeak(wavelength, np.zeros(len(wavelength)) + 0.5, [240, 300]) == None
+    assert (baselineObject.findPeaks(wavelength, np.atleast_2d(makeSpectrum(wavelength))) == -1).all()
+
+def getWarmBaselines(warmStart, verifyWarmStart = False):
+    """
+    The 05-06 Export's Baselines (None if the Export is Not in Data/), and its Pipeline.
+    """
+    dataFile = os.path.join(dataFolder, "05-06-2022 DA Monomer 27 Crosslinker 42 Template 10 Vary Solvent", "UV-Vis 5_6_2022 2_22_15 PM.tsv")
+    if not os.path.isfile(dataFile):
+        pytest.skip("The 05-06 Export is Not in Data/")
+    wavelength, absorbanceMatrix = sampleSet.sampleSet.fromFile(dataFile).resample().getMatrix()
+    samplePipeline = batchProcessing.batchProcessing()
+    samplePipeline.warmStart = warmStart
+    samplePipeline.verifyWarmStart = verifyWarmStart
+    filteredMatrix = samplePipeline.filterSamples(wavelength, absorbanceMatrix)
+    baselinePairs = samplePipeline.findBaselines(wavelength, filteredMatrix, samplePipeline.findPeaks(wavelength, filteredMatrix, [240, 320]))
+    return wavelength, filteredMatrix, np.array(baselinePairs), samplePipeline
+
+def test_findBaselines_WarmMatchesCold():
+    """
+    Verified Warm Starts on a Real Time Series Find the Same Baselines as the Full Search (This Export Had One Sample
+    Where the Unverified Local Best Was a Different Pair).
+    """
+    _, _, coldPairs, _ = getWarmBaselines(False)
+    _, _, warmPairs, samplePipeline = getWarmBaselines(True, verifyWarmStart = True)
+    assert samplePipeline.numWarmAttempted != 0
+    np.testing.assert_array_equal(warmPairs, coldPairs)
+
+def test_findBaselines_WarmSkipsFullSearch(monkeypatch):
+    """
+    Unverified Warm Starts Skip the Full Search (Reported in the Metrics) When the Local Best Has No Points Below its
+    Line; Every Pair Then Either Matches the Full Search or is Just as Good (a Tie on the Points Below the Line).
+    Unverified Warm Starts are Part of the Cache Key.
+    """
+    stageRecords = []
+    monkeypatch.setattr(pipelineMetrics, "activeSink", stageRecords.append)
+    wavelength, filteredMatrix, warmPairs, samplePipeline = getWarmBaselines(True)
+    monkeypatch.setattr(pipelineMetrics, "activeSink", None)
+    _, _, coldPairs, _ = getWarmBaselines(False)
+    warmRecords = [stageRecord for stageRecord in stageRecords if stageRecord["stage"] == "findLinearBaseline_Warm"]
+    assert any(stageRecord["fullSearchSkipped"] for stageRecord in warmRecords)
+    assert sum(stageRecord["fullSearchSkipped"] for stageRecord in warmRecords) <= samplePipeline.numWarmAccepted
+
+    baselineObject = samplePipeline.baselineObject
+    for sampleNum in np.flatnonzero((warmPairs != coldPairs).any(axis=0)):
+        assert baselineObject.countWrongSideOfTangent(wavelength, filteredMatrix[sampleNum], warmPairs[0, [sampleNum]], warmPairs[1, [sampleNum]])[0] == 0
+        assert warmPairs[1, sampleNum] - warmPairs[0, sampleNum] <= coldPairs[1, sampleNum] - coldPairs[0, sampleNum]
+    assert samplePipeline.getAnalysisParams()["warmStart"] == True
+    samplePipeline.verifyWarmStart = True
+    assert "warmStart" not in samplePipeline.getAnalysisParams()
+
+@pytest.mark.slow
+def test_findLinearBaseline_MatchesExhaustive_Data():
+    """
+    The Same Check on Every Spectrum in Data/ (About 2 Minutes): $ python -m pytest -m slow
+    """
+    samplePipeline = batchProcessing.batchProcessing()
+    baselineObject = samplePipeline.baselineObject
+    numChecked = 0
+    for dataFile in sorted(glob.glob(dataFolder + "/*/*.tsv")):
+        wavelengthList, absorbanceList, sampleNames = excelProcessing.processFiles().readData_UVVis(dataFile)
+        for sampleName, dataWavelength, absorbance in zip(sampleNames, wavelengthList, absorbanceList):
+            filteredData = samplePipeline.filterSamples(dataWavelength, np.atleast_2d(absorbance))[0]
+            peakInd = baselineObject.findPeak(dataWavelength, filteredData, [240, 320])
+            if peakInd == None:
+                continue
+            assert tuple(baselineObject.findLinearBaseline(dataWavelength, filteredData, peakInd)) == tuple(baselineObject.findLinearBaseline_Exhaustive(dataWavelength, filteredData, peakInd)), dataFile + " " + sampleName
+            numChecked += 1
+    assert numChecked != 0
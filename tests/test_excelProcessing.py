@@ -0,0 +1,74 @@
+
+# Basic Modules
+import os
+import csv
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import excelProcessing
+from conftest import makeSpectrum, writeExport, dataFolder
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def test_excelRoundTrip(shortExport, tmp_path):
+    """
+    getData(..., saveExcel = True) Writes a (Write-Only) Excel Copy That getData Can Read Back to the Same Samples.
+    """
+    pytest.importorskip("openpyxl")
+    fileProcessor = excelProcessing.processFiles()
+    outputFolder = str(tmp_path) + "/"
+    wavelengthList, absorbanceList, sampleNames = fileProcessor.getData(shortExport, outputFolder, saveExcel = True)
+    excelFile = outputFolder + "Excel Files/" + os.path.splitext(os.path.basename(shortExport))[0] + ".xlsx"
+    assert os.path.isfile(excelFile)
+
+    excelWavelengths, excelAbsorbances, excelNames = fileProcessor.getData(excelFile, outputFolder)
+    assert excelNames == sampleNames == ["Sample 1", "Sample 2", "Sample 3"]
+    assert len(excelWavelengths) == len(wavelengthList)
+    for sampleNum in range(len(sampleNames)):
+        np.testing.assert_array_equal(excelWavelengths[sampleNum], wavelengthList[sampleNum])
+        np.testing.assert_array_equal(excelAbsorbances[sampleNum], absorbanceList[sampleNum])
+
+def getBaselineSheet(inputFile, excelDelimiter = "\t"):
+    """
+    The Worksheet the Original convertToExcel Built: Every CSV Row Appended to a Normal (In-Memory) WorkBook.
+    """
+    xl = pytest.importorskip("openpyxl")
+    xlWorksheet = xl.Workbook().active
+    with open(inputFile, "r") as inputData:
+        for row in csv.reader(inputData, delimiter = excelDelimiter):
+            xlWorksheet.append(row)
+    return xlWorksheet
+
+def assertSameSamples(fileProcessor, inputFile):
+    excelWavelengths, excelAbsorbances, excelNames = fileProcessor.extractData_UVVis(getBaselineSheet(inputFile))
+    wavelengthList, absorbanceList, sampleNames = fileProcessor.readData_UVVis(inputFile)
+    assert excelNames == sampleNames
+    assert len(excelWavelengths) == len(wavelengthList) == len(sampleNames)
+    for sampleNum in range(len(sampleNames)):
+        np.testing.assert_array_equal(excelWavelengths[sampleNum], wavelengthList[sampleNum])
+        np.testing.assert_array_equal(excelAbsorbances[sampleNum], absorbanceList[sampleNum])
+    return sampleNames
+
+@pytest.mark.parametrize("blankRow", ["", "\t"])
+def test_readData_MatchesExcel(blankRow, tmp_path):
+    """
+    readData_UVVis Parses the Same Samples as the Excel Path, Whether Blank Rows are Empty or a Lone Tab.
+    """
+    wavelength = np.arange(190, 400.5, 0.5)
+    absorbanceList = [makeSpectrum(wavelength, randomSeed = sampleNum) for sampleNum in range(3)]
+    exportFile = writeExport(str(tmp_path / "UV-Vis Parity.tsv"), [wavelength]*3, absorbanceList, wlCalib = {"Shift": 0.17333}, blankRow = blankRow)
+    assert assertSameSamples(excelProcessing.processFiles(), exportFile) == ["Sample 1", "Sample 2", "Sample 3"]
+
+def test_readData_MatchesExcel_04_27():
+    """
+    The 04-27 Export Writes its Blank Rows as a Lone Tab. The Original Excel Path Only Split Samples on Empty Cells,
+    so it Found 20 Sample Names but Put Every Spectrum in One Data List; Both Parsers Now Give 20 Samples.
+    """
+    dataFile = os.path.join(dataFolder, "04-27-2022 DA Monomer 15 Crosslinker 39", "UV-Vis 4_27_2022 3_56_28 PM.tsv")
+    if not os.path.isfile(dataFile):
+        pytest.skip("The 04-27 Export is Not in Data/")
+    sampleNames = assertSameSamples(excelProcessing.processFiles(), dataFile)
+    assert len(sampleNames) == 20
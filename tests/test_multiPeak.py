@@ -0,0 +1,124 @@
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import batchProcessing
+import batchRunner
+import multiPeak
+import pipelineMetrics
+from conftest import makeSpectrum
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def test_fileReportPeaksSheet(shortExport):
+    """
+    Multi-Peak Mode Writes Every Peak to a 'Peaks' Sheet of Each File's Report.
+    """
+    xl = pytest.importorskip("openpyxl")
+    analysisParams = batchRunner.getDefaultParams()
+    analysisParams.update(peakWavelengthBounds = [240, 320], multiPeak = True, saveFileReports = True, makePlots = False)
+    summary, fileReports = batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+    assert fileReports[0]["error"] == None and len(fileReports[0]["peaks"]) != 0
+
+    fileName = os.path.splitext(os.path.basename(shortExport))[0]
+    reportFile = os.path.join(os.path.dirname(shortExport), "Analysis", fileName, fileName + " Analysis.xlsx")
+    excelWorkbook = xl.load_workbook(reportFile, read_only = True)
+    assert excelWorkbook.sheetnames == ["UV-Vis Analysis", "Peaks"]
+    peakRows = list(excelWorkbook["Peaks"].iter_rows(values_only = True))
+    excelWorkbook.close()
+    peakHeaders, tableRows = multiPeak.getTableRows(fileReports[0]["peaks"][list(multiPeak.peaksType.names)])
+    assert list(peakRows[0]) == peakHeaders
+    assert len(peakRows) - 1 == len(tableRows) == len(fileReports[0]["peaks"])
+    np.testing.assert_allclose([row[peakHeaders.index("Wavelength (nm)")] for row in peakRows[1:]], fileReports[0]["peaks"]["peakWavelength"])
+
+def test_findBaselines_MatchesFindLinearBaseline(monkeypatch):
+    """
+    Searching a Sample's Peaks Together (Peaks in the Same Band Only Search the Pairs They Do Not Share) Finds the
+    Same Pair Under Every Peak as findLinearBaseline.
+    """
+    wavelength = np.arange(190, 320.5, 0.5)
+    absorbanceMatrix = np.array([makeSpectrum(wavelength, (235, 250, 268, 300), (0.4, 0.7, 1.0, 0.3), peakWidth = 5.0, randomSeed = sampleNum) for sampleNum in range(3)])
+    samplePipeline = batchProcessing.batchProcessing()
+    filteredMatrix = samplePipeline.filterSamples(wavelength, absorbanceMatrix)
+    peakAnalysis = multiPeak.multiPeakAnalysis(samplePipeline.baselineObject)
+    peakAnalysis.minRelativeProminence = 0; peakAnalysis.maxPeaks = None
+    sampleInds, peakInds, _ = peakAnalysis.findAllPeaks(wavelength, filteredMatrix)
+    assert len(peakInds) >= 3*len(filteredMatrix)
+
+    stageRecords = []
+    monkeypatch.setattr(pipelineMetrics, "activeSink", stageRecords.append)
+    leftCutInds, rightCutInds = peakAnalysis.findBaselines(wavelength, filteredMatrix, sampleInds, peakInds)
+    monkeypatch.setattr(pipelineMetrics, "activeSink", None)
+    assert sum(stageRecord["fullSearches"] for stageRecord in stageRecords if stageRecord["stage"] == "findLinearBaselines_Peaks") < len(peakInds)
+    for peakNum, (sampleInd, peakInd) in enumerate(zip(sampleInds, peakInds)):
+        leftCutInd, rightCutInd = samplePipeline.baselineObject.findLinearBaseline(wavelength, filteredMatrix[sampleInd], peakInd)
+        assert (leftCutInds[peakNum], rightCutInds[peakNum]) == ((leftCutInd, rightCutInd) if leftCutInd != None else (-1, -1))
+
+@pytest.mark.parametrize("peakShape", list(multiPeak.peakShapes))
+def test_fitPeakGroup_OverlappingBands(peakShape):
+    """
+    Two Overlapping Bands on a Sloped Background are Deconvolved Into Their Centers, FWHMs, and Areas.
+    """
+    wavelength = np.arange(200, 400.5, 0.5)
+    fwhmFactor, areaFactor = multiPeak.peakShapes[peakShape]
+    centers = np.array([270.0, 290.0]); amplitudes = np.array([1.0, 0.6]); fwhms = np.array([14.0, 18.0])
+    components = multiPeak.getComponents(peakShape, wavelength, centers, amplitudes, fwhms/fwhmFactor)[0]
+    absorbance = 0.3 - 0.0005*(wavelength - 200) + components.sum(axis = 1) + 0.002*np.random.default_rng(1).standard_normal(len(wavelength))
+
+    peakAnalysis = multiPeak.multiPeakAnalysis()
+    peakAnalysis.peakShape = peakShape
+    fitParams, fitRMSE = peakAnalysis.fitPeakGroup(wavelength, absorbance, np.searchsorted(wavelength, centers), np.searchsorted(wavelength, 230), np.searchsorted(wavelength, 340))
+    assert fitParams is not None and fitRMSE < 0.004
+    np.testing.assert_allclose(fitParams[:, 0], centers, atol = 0.1)
+    np.testing.assert_allclose(fitParams[:, 1], amplitudes, rtol = 0.01)
+    np.testing.assert_allclose(fitParams[:, 2], fwhms, rtol = 0.01)
+    np.testing.assert_allclose(fitParams[:, 3], areaFactor*amplitudes*fwhms/fwhmFactor, rtol = 0.01)
+
+@pytest.mark.parametrize("peakShape", list(multiPeak.peakShapes))
+def test_getComponents_Derivatives(peakShape):
+    """
+    The Analytic Derivatives Match Central Finite Differences.
+    """
+    xData = np.linspace(240, 320, 161)
+    centers = np.array([265.0, 281.5]); amplitudes = np.array([0.8, 0.5]); widths = np.array([6.0, 9.0])
+    components, dAmplitude, dCenter, dWidth = multiPeak.getComponents(peakShape, xData, centers, amplitudes, widths)
+    stepSize = 1E-6
+    for paramNum, analyticDerivative in enumerate([dAmplitude, dCenter, dWidth]):
+        componentParams = [amplitudes, centers, widths]
+        upperParams = list(componentParams); upperParams[paramNum] = componentParams[paramNum] + stepSize
+        lowerParams = list(componentParams); lowerParams[paramNum] = componentParams[paramNum] - stepSize
+        upperComponents = multiPeak.getComponents(peakShape, xData, upperParams[1], upperParams[0], upperParams[2])[0]
+        lowerComponents = multiPeak.getComponents(peakShape, xData, lowerParams[1], lowerParams[0], lowerParams[2])[0]
+        np.testing.assert_allclose(analyticDerivative, (upperComponents - lowerComponents)/(2*stepSize), rtol = 1E-5, atol = 1E-8)
+
+def test_findAllPeaks_Thresholds():
+    """
+    minRelativeProminence Drops the Peaks Less Prominent Than a Fraction of Each Sample's Most Prominent, and maxPeaks
+    Keeps Each Sample's Most Prominent Peaks (Both Still in Wavelength Order).
+    """
+    wavelength = np.arange(190, 400.5, 0.5)
+    peakCenters = (230, 260, 290, 320, 350)
+    absorbanceMatrix = np.array([makeSpectrum(wavelength, peakCenters, (0.2, 1.0, 0.5, 0.08, 0.7), peakWidth = 5.0, baselineSlope = 0, noiseLevel = 0),
+                                 makeSpectrum(wavelength, peakCenters, (0.9, 0.3, 0.6, 0.4, 0.05), peakWidth = 5.0, baselineSlope = 0, noiseLevel = 0)])
+    peakAnalysis = multiPeak.multiPeakAnalysis()
+    peakAnalysis.minRelativeProminence = 0; peakAnalysis.maxPeaks = None
+    sampleInds, peakInds, prominences = peakAnalysis.findAllPeaks(wavelength, absorbanceMatrix)
+    for sampleInd in range(len(absorbanceMatrix)):
+        np.testing.assert_array_equal(wavelength[peakInds[sampleInds == sampleInd]], peakCenters)
+
+    peakAnalysis.minRelativeProminence = 0.4
+    keptInds, keptPeaks, _ = peakAnalysis.findAllPeaks(wavelength, absorbanceMatrix)
+    maxProminences = np.array([prominences[sampleInds == sampleInd].max() for sampleInd in range(len(absorbanceMatrix))])
+    keepPeaks = prominences >= 0.4*maxProminences[sampleInds]
+    np.testing.assert_array_equal(keptInds, sampleInds[keepPeaks])
+    np.testing.assert_array_equal(keptPeaks, peakInds[keepPeaks])
+    np.testing.assert_array_equal(wavelength[keptPeaks], [260, 290, 350, 230, 290, 320])
+
+    peakAnalysis.minRelativeProminence = 0; peakAnalysis.maxPeaks = 2
+    keptInds, keptPeaks, _ = peakAnalysis.findAllPeaks(wavelength, absorbanceMatrix)
+    np.testing.assert_array_equal(keptInds, [0, 0, 1, 1])
+    np.testing.assert_array_equal(wavelength[keptPeaks], [260, 350, 230, 290])
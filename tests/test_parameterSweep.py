@@ -0,0 +1,79 @@
+# Basic Modules
+import shutil
+import numpy as np
+
+# Import Python Helper Files
+import batchProcessing
+import parameterSweep
+import sampleSet
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def test_sweepReusesStages(shortExport, monkeypatch):
+    """
+    Sweeping Only the Peak Bounds Filters the Spectra Once, and Sweeping Only the Baseline Threshold Finds the Peaks Once.
+    """
+    # Each Sweep Starts a New Engine (the Worker's Engine Keeps the Last File's Stages)
+    monkeypatch.setattr(parameterSweep, "workerEngine", None)
+    _, _, taskReports = parameterSweep.runSweep([shortExport], {"peakWavelengthBounds": [[240, 320], [250, 300], [260, 290]]}, numWorkers = 1)
+    assert taskReports[0]["errors"] == []
+    assert taskReports[0]["numRuns"]["filtered"] == 1
+    assert taskReports[0]["numRuns"]["peaks"] == 3
+
+    monkeypatch.setattr(parameterSweep, "workerEngine", None)
+    _, _, taskReports = parameterSweep.runSweep([shortExport], {"minPeakDuration": [10, 20, 40], "peakWavelengthBounds": [[240, 320]]}, numWorkers = 1)
+    assert taskReports[0]["errors"] == []
+    assert (taskReports[0]["numRuns"]["peaks"], taskReports[0]["numReused"]["peaks"]) == (1, 2)
+    assert taskReports[0]["numRuns"]["baselines"] == 3
+
+def test_sweepMatchesAnalyzeSamples(shortExport):
+    """
+    Each Combination's Rows are the Results of batchProcessing.analyzeSamples With the Same Settings.
+    """
+    paramGrid = {"savgolWindow": [11, 21], "peakWavelengthBounds": [[240, 320], [250, 310]], "minPeakDuration": [30]}
+    sweepTable, combinations, _ = parameterSweep.runSweep([shortExport], paramGrid, numWorkers = 1)
+    assert len(combinations) == 4
+
+    fileSamples = sampleSet.sampleSet.fromFile(shortExport)
+    wavelength, absorbanceMatrix = fileSamples.resample().getMatrix()
+    for combinationNum, sweepParams in enumerate(combinations):
+        samplePipeline = batchProcessing.batchProcessing()
+        for paramName in ["cutoffFreq", "filterOrder", "savgolWindow", "savgolOrder", "warmStart"]:
+            setattr(samplePipeline, paramName, sweepParams[paramName])
+        samplePipeline.baselineObject.minLeftBoundaryInd = sweepParams["minLeftBoundaryInd"]
+        samplePipeline.baselineObject.minPeakDuration = sweepParams["minPeakDuration"]
+        results, _, _ = samplePipeline.analyzeSamples(wavelength, absorbanceMatrix, fileSamples.sampleNames, sweepParams["peakWavelengthBounds"], sweepParams["isPeakPositive"])
+
+        combinationRows = sweepTable[sweepTable["combinationNum"] == combinationNum]
+        for fieldName in batchProcessing.resultsType.names:
+            if results.dtype[fieldName].kind == "f":
+                np.testing.assert_allclose(combinationRows[fieldName], results[fieldName], equal_nan = True)
+            else:
+                np.testing.assert_array_equal(combinationRows[fieldName], results[fieldName])
+
+def test_sweepTableLayout(shortExport, tmp_path):
+    """
+    The Tidy Table Has a Column Per Swept Parameter (the Peak Bounds as Two), and its Rows Follow the Files as Given,
+    Then the Combinations, Then the Samples.
+    """
+    secondExport = str(tmp_path / "A Second Export.tsv")
+    shutil.copy(shortExport, secondExport)
+    dataFiles = [shortExport, secondExport]
+    paramGrid = {"minPeakDuration": [10, 30], "peakWavelengthBounds": [[240, 320], None], "cutoffFreq": [0.1]}
+    sweepTable, combinations, _ = parameterSweep.runSweep(dataFiles, paramGrid, numWorkers = 1)
+
+    assert sweepTable.dtype == parameterSweep.getSweepType(combinations)
+    assert list(sweepTable.dtype.names) == ["fileName", "combinationNum", "minPeakWavelength", "maxPeakWavelength", "minPeakDuration"] + list(batchProcessing.resultsType.names)
+    sampleNames = sampleSet.sampleSet.fromFile(shortExport).sampleNames
+    assert list(sweepTable["fileName"]) == [dataFile for dataFile in dataFiles for _ in range(len(combinations)*len(sampleNames))]
+    assert list(sweepTable["combinationNum"]) == [combinationNum for _ in dataFiles for combinationNum in range(len(combinations)) for _ in sampleNames]
+    assert list(sweepTable["sampleName"]) == sampleNames*len(dataFiles)*len(combinations)
+    for row in sweepTable:
+        sweepParams = combinations[row["combinationNum"]]
+        assert row["minPeakDuration"] == sweepParams["minPeakDuration"]
+        if sweepParams["peakWavelengthBounds"] == None:
+            assert np.isnan(row["minPeakWavelength"]) and np.isnan(row["maxPeakWavelength"])
+        else:
+            assert [row["minPeakWavelength"], row["maxPeakWavelength"]] == sweepParams["peakWavelengthBounds"]
@@ -0,0 +1,43 @@
+
+# Basic Modules
+import json
+import threading
+
+# Import Python Helper Files
+import pipelineMetrics
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def test_jsonSink_Threads(tmp_path, monkeypatch):
+    """
+    Threads Sharing One jsonSink Write Whole Lines, Each Tagged With its Own Thread's Context.
+    """
+    metricsSink = pipelineMetrics.jsonSink(str(tmp_path / "Metrics.jsonl"))
+    monkeypatch.setattr(pipelineMetrics, "activeSink", metricsSink)
+    numThreads, numRecords = 8, 200
+
+    def recordStages(threadNum):
+        pipelineMetrics.setContext(dataFile = "File " + str(threadNum))
+        for recordNum in range(numRecords):
+            with pipelineMetrics.timeStage("testStage", 1, threadNum = threadNum, padding = "x"*recordNum):
+                pass
+        pipelineMetrics.setContext(dataFile = None)
+
+    workerThreads = [threading.Thread(target = recordStages, args = (threadNum,)) for threadNum in range(numThreads)]
+    for workerThread in workerThreads:
+        workerThread.start()
+    for workerThread in workerThreads:
+        workerThread.join()
+    metricsSink.close()
+
+    with open(metricsSink.metricsFile) as metricsData:
+        records = [json.loads(line) for line in metricsData]
+    assert len(records) == numThreads*numRecords
+    assert all(record["dataFile"] == "File " + str(record["threadNum"]) for record in records)
+    # A New Thread Starts Without the Others' Tags
+    newThreadTags = []
+    newThread = threading.Thread(target = lambda: newThreadTags.append(dict(pipelineMetrics.metricContext.tags)))
+    newThread.start(); newThread.join()
+    assert newThreadTags == [{}]
@@ -0,0 +1,48 @@
+
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import batchProcessing
+import plotResults
+from conftest import makeSpectrum
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getRenderJob(outputDirectory, numSamples = 5):
+    """
+    One File's Analyzed Samples, as uvVisAnalysis.py Queues Them for Plotting.
+    """
+    wavelength = np.arange(190, 320.5, 0.5)
+    absorbanceMatrix = np.array([makeSpectrum(wavelength, (270,), (1.0,), randomSeed = sampleNum) for sampleNum in range(numSamples)])
+    sampleNames = ["Sample " + str(sampleNum + 1) for sampleNum in range(numSamples)]
+    results, filteredMatrix, baselineMatrix = batchProcessing.batchProcessing().analyzeSamples(wavelength, absorbanceMatrix, sampleNames, [240, 300])
+    return {"outputDirectory": outputDirectory, "wavelength": wavelength, "absorbanceMatrix": absorbanceMatrix, "filteredMatrix": filteredMatrix,
+            "baselineMatrix": baselineMatrix, "results": results, "renderSamples": np.array([True, False, True, True, True])}
+
+def test_splitRenderJob(tmp_path):
+    """
+    The Chunks Hold Every Sample to Plot Once, With Each Sample's Own Rows.
+    """
+    renderJob = getRenderJob(str(tmp_path))
+    chunkJobs = plotResults.splitRenderJob(renderJob, 3)
+    assert [len(chunkJob["results"]) for chunkJob in chunkJobs] == [3, 1]
+    chunkNames = [str(sampleName) for chunkJob in chunkJobs for sampleName in chunkJob["results"]["sampleName"]]
+    assert chunkNames == ["Sample 1", "Sample 3", "Sample 4", "Sample 5"]
+    for chunkJob in chunkJobs:
+        for sampleNum, sampleName in enumerate(chunkJob["results"]["sampleName"]):
+            fileNum = int(str(sampleName).split()[-1]) - 1
+            np.testing.assert_array_equal(chunkJob["filteredMatrix"][sampleNum], renderJob["filteredMatrix"][fileNum])
+            np.testing.assert_array_equal(chunkJob["absorbanceMatrix"][sampleNum], renderJob["absorbanceMatrix"][fileNum])
+
+def test_renderFiles_OneFileInParallel(tmp_path):
+    """
+    One File's Plots are Spread Over the Workers and Each is Saved Once.
+    """
+    pytest.importorskip("matplotlib")
+    assert plotResults.renderFiles([getRenderJob(str(tmp_path))], numWorkers = 2, dpi = 30, thumbnail = True) == 4
+    assert sorted(os.listdir(tmp_path)) == ["Sample 1.png", "Sample 3.png", "Sample 4.png", "Sample 5.png"]
@@ -0,0 +1,154 @@
+
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import batchProcessing
+import batchRunner
+import resultStore
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getStoredRows(sampleNames, peakWavelengths, numWavelengths = 5, wavelength = None):
+    wavelength = np.arange(numWavelengths, dtype=float) if wavelength is None else np.asarray(wavelength, dtype=float)
+    results = np.zeros(len(sampleNames), dtype=batchProcessing.resultsType)
+    results["sampleName"] = sampleNames
+    results["peakWavelength"] = peakWavelengths
+    spectraMatrix = np.outer(peakWavelengths, np.ones(len(wavelength)))
+    return wavelength, results, spectraMatrix, -spectraMatrix
+
+def test_appendLoadCompact(tmp_path):
+    """
+    The Newest Row of Each Sample Wins, and compact() Keeps Those Rows (and the Newest Settings Key) in One Chunk Per File.
+    """
+    analysisStore = resultStore.resultStore(str(tmp_path / "Store"))
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 1", "Sample 2"], [280.0, 281.0]), paramsKey = "old")
+    analysisStore.append("b.tsv", *getStoredRows(["Sample 1"], [300.0]))
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 2", "Sample 3"], [290.0, 291.0]), paramsKey = "new")
+
+    summary = analysisStore.loadResults()
+    # In the Order Each Sample Was First Stored
+    assert summary["fileName"].tolist() == ["a.tsv", "a.tsv", "b.tsv", "a.tsv"]
+    assert summary["sampleName"].tolist() == ["Sample 1", "Sample 2", "Sample 1", "Sample 3"]
+    assert summary["peakWavelength"].tolist() == [280.0, 290.0, 300.0, 291.0]
+    wavelength, results, filteredMatrix, baselineMatrix = analysisStore.loadSpectra("a.tsv")
+    np.testing.assert_array_equal(filteredMatrix[:, 0], [280.0, 290.0, 291.0])
+    np.testing.assert_array_equal(baselineMatrix, -filteredMatrix)
+    assert analysisStore.getStoredKeys() == {"a.tsv": "new", "b.tsv": ""}
+
+    # Compact Down to One Chunk Per File Without Changing What is Loaded
+    assert analysisStore.compact() == 1
+    assert len(analysisStore.getChunkFiles()) == 2
+    for dataFile in ["a.tsv", "b.tsv"]:
+        np.testing.assert_array_equal(analysisStore.loadResults(dataFile), summary[summary["fileName"] == dataFile])
+    assert analysisStore.getStoredKeys() == {"a.tsv": "new", "b.tsv": ""}
+
+def test_storeAgainOnNewGrid(tmp_path):
+    """
+    Storing a File Again on a Different Grid (e.g. Re-Run With Calibration) Replaces the Old Rows Without Breaking
+    loadSpectra, compact, or the Spectra Export. Old Rows That Were Not Replaced are Resampled Onto the Newest Grid.
+    """
+    analysisStore = resultStore.resultStore(str(tmp_path / "Store"))
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 1", "Sample 2"], [280.0, 281.0], wavelength = [0, 1, 2, 3, 4]))
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 1", "Sample 2"], [290.0, 291.0], wavelength = [0.5, 1.5, 2.5, 3.5]))
+    wavelength, results, filteredMatrix, baselineMatrix = analysisStore.loadSpectra("a.tsv")
+    np.testing.assert_array_equal(wavelength, [0.5, 1.5, 2.5, 3.5])
+    np.testing.assert_array_equal(filteredMatrix[:, 0], [290.0, 291.0])
+
+    # Only Sample 2 is Stored on the Third Grid: Sample 1 Comes From the Second Chunk
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 2"], [301.0], wavelength = [1, 2, 3, 4]))
+    wavelength, results, filteredMatrix, baselineMatrix = analysisStore.loadSpectra("a.tsv")
+    assert results["sampleName"].tolist() == ["Sample 1", "Sample 2"]
+    np.testing.assert_array_equal(wavelength, [1, 2, 3, 4])
+    np.testing.assert_array_equal(filteredMatrix, [[290.0, 290.0, 290.0, np.nan], [301.0]*4])
+    np.testing.assert_array_equal(baselineMatrix, -filteredMatrix)
+
+    assert analysisStore.compact() == 2
+    np.testing.assert_array_equal(analysisStore.loadSpectra("a.tsv")[2], filteredMatrix)
+    pytest.importorskip("openpyxl")
+    analysisStore.exportExcel(str(tmp_path) + "/", "Store.xlsx", includeSpectra = True)
+    assert os.path.isfile(str(tmp_path / "Store.xlsx"))
+
+def test_cachedRunStoresNewSettings(shortExport, tmp_path):
+    """
+    Re-Running With Settings That are Already Cached (but Not the Last Ones Stored) Stores Their Results Again.
+    """
+    def runBatch(peakWavelengthBounds):
+        analysisParams = batchRunner.getDefaultParams()
+        analysisParams.update(peakWavelengthBounds = peakWavelengthBounds, cacheFolder = str(tmp_path / "Cache"), storeFolder = str(tmp_path / "Store"), makePlots = False)
+        analysisParams["storedKeys"] = resultStore.resultStore(analysisParams["storeFolder"]).getStoredKeys(both = True)
+        summary, fileReports = batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+        assert fileReports[0]["error"] == None
+        return summary, fileReports[0]["numCached"]
+
+    firstSummary, _ = runBatch([240, 320])
+    secondSummary, _ = runBatch([200, 260])
+    assert not np.array_equal(firstSummary["peakInd"], secondSummary["peakInd"])
+    # Every Sample Comes From the Cache, but the Store Holds the Second Settings' Rows
+    thirdSummary, numCached = runBatch([240, 320])
+    assert numCached == len(thirdSummary)
+    analysisStore = resultStore.resultStore(str(tmp_path / "Store"))
+    np.testing.assert_array_equal(analysisStore.loadResults()["peakInd"], firstSummary["peakInd"])
+    # Nothing New to Store the Next Time
+    numChunks = len(analysisStore.getChunkFiles())
+    runBatch([240, 320])
+    assert len(analysisStore.getChunkFiles()) == numChunks
+
+def test_defaultBoundsFindPeaks(shortExport, capsys):
+    """
+    The Default Parameters (No Peak Bounds) Search the Whole Spectrum, and a File Without Peaks is Reported.
+    """
+    analysisParams = batchRunner.getDefaultParams()
+    analysisParams["makePlots"] = False
+    summary, fileReports = batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+    assert (summary["peakInd"] >= 0).all()
+
+    analysisParams["peakWavelengthBounds"] = [500, 600]
+    summary, fileReports = batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+    assert (summary["peakInd"] < 0).all()
+    batchRunner.printRunReport(fileReports, 0.0)
+    assert "No Peaks Found" in capsys.readouterr().out
+
+def test_sameSpectraNotStoredAgain(shortExport, tmp_path):
+    """
+    Re-Running on the Same File With the Same Settings (No Cache) Does Not Store its Spectra Again.
+    """
+    analysisParams = batchRunner.getDefaultParams()
+    analysisParams.update(peakWavelengthBounds = [240, 320], storeFolder = str(tmp_path / "Store"), makePlots = False)
+    analysisStore = resultStore.resultStore(analysisParams["storeFolder"])
+    for _ in range(3):
+        analysisParams["storedKeys"] = analysisStore.getStoredKeys(both = True)
+        batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+    assert len(analysisStore.getChunkFiles()) == 1
+    # New Settings are Stored
+    analysisParams.update(peakWavelengthBounds = [200, 260], storedKeys = analysisStore.getStoredKeys(both = True))
+    batchRunner.runFiles([shortExport], analysisParams, numWorkers = 1)
+    assert len(analysisStore.getChunkFiles()) == 2
+
+def test_manifest(tmp_path):
+    """
+    The Manifest Lists Each Chunk's Data File, so One File's Reads Only Open its Own Chunks. Chunks Written Before
+    the Manifest are Added to it, and compact() Leaves Only the Chunks That Remain.
+    """
+    analysisStore = resultStore.resultStore(str(tmp_path / "Store"))
+    firstChunk = analysisStore.append("a.tsv", *getStoredRows(["Sample 1"], [280.0]), paramsKey = "p", dataKey = "d")
+    analysisStore.append("b.tsv", *getStoredRows(["Sample 1"], [300.0]))
+    analysisStore.append("a.tsv", *getStoredRows(["Sample 2"], [290.0]))
+    assert len(analysisStore.getChunkFiles("a.tsv")) == 2 and len(analysisStore.getChunkFiles("b.tsv")) == 1
+    assert analysisStore.getStoredKeys(both = True) == {"a.tsv": ("", ""), "b.tsv": ("", "")}
+    assert analysisStore.getManifest()[firstChunk] == {"dataFile": "a.tsv", "paramsKey": "p", "dataKey": "d"}
+
+    # A Store Without a Manifest
+    os.remove(analysisStore.manifestFile)
+    assert analysisStore.getDataFiles() == ["a.tsv", "b.tsv"]
+    assert os.path.isfile(analysisStore.manifestFile)
+    assert analysisStore.loadResults("a.tsv")["peakWavelength"].tolist() == [280.0, 290.0]
+
+    analysisStore.compact()
+    with open(analysisStore.manifestFile) as manifestData:
+        assert len(manifestData.readlines()) == 2
+    assert analysisStore.getChunkFiles() == list(analysisStore.getManifest())
@@ -0,0 +1,88 @@
+
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import sampleStream
+from conftest import makeSpectrum, writeExport
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+wavelength = np.arange(190, 320.5, 0.5)
+
+
+def writeSamples(exportFile, randomSeeds):
+    return writeExport(exportFile, [wavelength]*len(randomSeeds), [makeSpectrum(wavelength, randomSeed = randomSeed) for randomSeed in randomSeeds])
+
+def test_readNewSamples_Appended(tmp_path):
+    """
+    Samples Appended to the File are Read Once Each, Without Starting Over.
+    """
+    exportFile = str(tmp_path / "UV-Vis Stream.tsv")
+    dataStream = sampleStream.sampleStream(writeSamples(exportFile, [0, 1]))
+    assert dataStream.readNewSamples()[2] == ["Sample 1", "Sample 2"]
+    # The Spectrometer Adds a Sample
+    writeSamples(exportFile, [0, 1, 2])
+    assert not dataStream.wasRewritten()
+    wavelengthList, absorbanceList, sampleNames = dataStream.readNewSamples()
+    assert sampleNames == ["Sample 3"]
+    np.testing.assert_array_equal(absorbanceList[0], makeSpectrum(wavelength, randomSeed = 2))
+    assert dataStream.readNewSamples()[2] == []
+
+def test_wasRewritten_SameSizeOrLarger(tmp_path):
+    """
+    A File Replaced by a Different Export of the Same or Larger Size is Noticed, Not Read From the Old Offset.
+    """
+    exportFile = str(tmp_path / "UV-Vis Stream.tsv")
+    dataStream = sampleStream.sampleStream(writeSamples(exportFile, [0, 1]))
+    dataStream.readNewSamples()
+    writeSamples(exportFile, [5, 6, 7])
+    assert dataStream.wasRewritten()
+
+    dataStream.reset()
+    wavelengthList, absorbanceList, sampleNames = dataStream.readNewSamples()
+    assert sampleNames == ["Sample 1", "Sample 2", "Sample 3"]
+    np.testing.assert_array_equal(absorbanceList[0], makeSpectrum(wavelength, randomSeed = 5))
+    assert not dataStream.wasRewritten()
+    # A Shorter File is a Rewrite Too
+    writeSamples(exportFile, [5])
+    assert dataStream.wasRewritten()
+
+def test_readNewSamples_PartialLastRow(tmp_path):
+    """
+    When the Run Ends Mid-Row (a Wavelength Without its Absorbance), the Cut Off Row is Dropped, Not Parsed.
+    """
+    exportFile = writeSamples(str(tmp_path / "UV-Vis Stream.tsv"), [0, 1])
+    with open(exportFile, "a", newline = "") as exportData:
+        exportData.write("Sample 3\r\n4/28/2022 1:25 PM\r\n//QSpecEnd: \r\n190.0\t0.5\r\n190.5\t0.5\r\n191.0\t\r\n191.5")
+    dataStream = sampleStream.sampleStream(exportFile)
+    assert dataStream.readNewSamples()[2] == ["Sample 1", "Sample 2"]
+    wavelengthList, absorbanceList, sampleNames = dataStream.readNewSamples(includeUnfinished = True)
+    assert sampleNames == ["Sample 3"]
+    np.testing.assert_array_equal(wavelengthList[0], [190.0, 190.5])
+
+def test_sampleWatcher(tmp_path):
+    """
+    The Watcher Analyzes and Stores Only the New Samples, and Writes the Report Once New Rows are Pending.
+    """
+    pytest.importorskip("openpyxl")
+    exportFile = str(tmp_path / "UV-Vis Stream.tsv")
+    writeSamples(exportFile, [0, 1])
+    sampleWatcher = sampleStream.sampleWatcher(exportFile, peakWavelengthBounds = [240, 300], makePlots = False, makeReport = True, reportInterval = 3600)
+    assert sampleWatcher.analyzeNewSamples() == 2
+    writeSamples(exportFile, [0, 1, 2])
+    assert sampleWatcher.analyzeNewSamples() == 1
+    assert sampleWatcher.analyzeNewSamples() == 0
+    assert sampleWatcher.analyzeNewSamples(includeUnfinished = True) == 0
+    assert sampleWatcher.analysisStore.loadResults()["sampleName"].tolist() == ["Sample 1", "Sample 2", "Sample 3"]
+
+    # Not Written Until the Interval Passes or the Run Ends
+    reportFile = sampleWatcher.outputDirectory + sampleWatcher.fileName + " Analysis.xlsx"
+    sampleWatcher.updateReport()
+    assert sampleWatcher.reportPending and not os.path.isfile(reportFile)
+    sampleWatcher.exportReport()
+    assert not sampleWatcher.reportPending and os.path.isfile(reportFile)
+    assert sampleWatcher.getReportSummary()["sampleName"].tolist() == ["Sample 1", "Sample 2", "Sample 3"]
@@ -0,0 +1,53 @@
+
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import sampleSet
+import spectralArchive
+from conftest import dataFolder
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def test_archiveCalibration(shortExport, tmp_path):
+    """
+    A File's Samples Read From the Archive Keep Their '//WLCalib' Values, so Calibrating Them Gives the Same
+    Wavelengths as Calibrating the File Itself.
+    """
+    sampleArchive = spectralArchive.spectralArchive(str(tmp_path / "Archive"))
+    sampleArchive.compileArchive([shortExport])
+    archiveSamples = sampleArchive.getSampleSet(shortExport)
+    fileSamples = sampleSet.sampleSet.fromFile(shortExport)
+    assert [sampleHeader["wlCalib"] for sampleHeader in archiveSamples.sampleHeaders] == [sampleHeader["wlCalib"] for sampleHeader in fileSamples.sampleHeaders]
+
+    archiveCalibrated = archiveSamples.calibrate(); fileCalibrated = fileSamples.calibrate()
+    assert not np.allclose(archiveCalibrated.getWavelengths(), archiveSamples.getWavelengths())
+    np.testing.assert_allclose(archiveCalibrated.getWavelengths(), fileCalibrated.getWavelengths())
+
+def test_parseTimestamp():
+    """
+    The Exports Write 12-Hour Timestamps ('5/20/2022 2:11 PM'); Older Ones Use a 24-Hour Clock.
+    """
+    sampleArchive = spectralArchive.spectralArchive("")
+    assert sampleArchive.parseTimestamp("5/20/2022 2:11 PM") == np.datetime64("2022-05-20T14:11:00")
+    assert sampleArchive.parseTimestamp("5/20/22 12:05:30 AM") == np.datetime64("2022-05-20T00:05:30")
+    assert sampleArchive.parseTimestamp("5/20/2022 14:11") == np.datetime64("2022-05-20T14:11:00")
+    assert np.isnat(sampleArchive.parseTimestamp("Not a Time"))
+
+def test_archiveTimes(tmp_path):
+    """
+    Every Sample Archived From a Real Export Gets a Time, in the Order the Samples Were Taken.
+    """
+    dataFile = os.path.join(dataFolder, "05-20-2022 DA MIP 5 Hours", "UV-Vis 5_20_2022 2_11_45 PM.tsv")
+    if not os.path.isfile(dataFile):
+        pytest.skip("The 05-20 Export is Not in Data/")
+    sampleArchive = spectralArchive.spectralArchive(str(tmp_path / "Archive"))
+    sampleArchive.compileArchive([dataFile])
+    sampleTimes = sampleArchive.sampleIndex["time"]
+    assert not np.isnat(sampleTimes).any()
+    assert sampleTimes[0] == np.datetime64("2022-05-20T14:11:00")
+    assert (np.diff(sampleTimes) >= np.timedelta64(0, "s")).all()
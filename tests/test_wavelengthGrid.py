@@ -0,0 +1,83 @@
+
+# Basic Modules
+import numpy as np
+import pytest
+
+# Import Python Helper Files
+import sampleSet
+import wavelengthGrid
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+wlCalib = {"Shift": 0.17333, "261S": -0.08, "362S": -0.3, "484S": 0.09, "Note": "Ignored"}
+
+
+def getRaggedSamples():
+    """
+    Three Samples on Different Grids (Different Starts, Ends, and Spacings), Back to Back.
+    """
+    wavelengthList = [np.arange(190, 400.5, 0.5), np.arange(195.25, 390, 0.75), np.linspace(200, 395, 301)]
+    absorbanceList = [np.sin(wavelength/20) + sampleNum for sampleNum, wavelength in enumerate(wavelengthList)]
+    offsets = np.cumsum([0] + [len(wavelength) for wavelength in wavelengthList])
+    return wavelengthList, absorbanceList, offsets
+
+def test_parseCalibration():
+    wavelengthShift, lineWavelengths, lineCorrections = wavelengthGrid.parseCalibration(wlCalib)
+    assert wavelengthShift == 0.17333
+    np.testing.assert_array_equal(lineWavelengths, [261, 362, 484])
+    np.testing.assert_array_equal(lineCorrections, [-0.08, -0.3, 0.09])
+    assert wavelengthGrid.parseCalibration(None)[0] == 0
+
+def test_getCalibrationCorrection():
+    """
+    The Shift Plus the Line Corrections: Interpolated Between the Lines and Held Past the First and Last.
+    """
+    correction = wavelengthGrid.getCalibrationCorrection([200, 261, 311.5, 484, 600], wlCalib)
+    np.testing.assert_allclose(correction, 0.17333 + np.array([-0.08, -0.08, -0.19, 0.09, 0.09]))
+    np.testing.assert_allclose(wavelengthGrid.getCalibrationCorrection([200, 300], {"Shift": 0.5}), [0.5, 0.5])
+
+def test_calibrateWavelengths_MatchesPerSample():
+    wavelengthList, _, offsets = getRaggedSamples()
+    wlCalibs = [wlCalib, {"Shift": -0.2}, wlCalib]
+    calibratedData = wavelengthGrid.calibrateWavelengths(np.concatenate(wavelengthList), offsets, wlCalibs)
+    for sampleNum, wavelength in enumerate(wavelengthList):
+        np.testing.assert_allclose(calibratedData[offsets[sampleNum]:offsets[sampleNum + 1]], wavelength + wavelengthGrid.getCalibrationCorrection(wavelength, wlCalibs[sampleNum]))
+
+def test_getCommonGrid():
+    wavelengthList, _, offsets = getRaggedSamples()
+    commonGrid = wavelengthGrid.getCommonGrid(np.concatenate(wavelengthList), offsets, gridStep = 0.5)
+    # Only Where Every Sample Has Data, on Multiples of the Step
+    assert commonGrid[0] == 200 and commonGrid[-1] == 389.5
+    np.testing.assert_allclose(np.diff(commonGrid), 0.5)
+    with pytest.raises(ValueError):
+        wavelengthGrid.getCommonGrid(np.array([190.0, 200, 300, 310]), [0, 2, 4])
+
+def test_resampleSamples_MatchesInterp():
+    """
+    The Batched Interpolation Matches np.interp Sample by Sample, and Grid Points Outside a Sample are Filled.
+    """
+    wavelengthList, absorbanceList, offsets = getRaggedSamples()
+    commonGrid = np.arange(185, 405, 0.4)
+    absorbanceMatrix = wavelengthGrid.resampleSamples(np.concatenate(wavelengthList), np.concatenate(absorbanceList), offsets, commonGrid)
+    assert absorbanceMatrix.shape == (3, len(commonGrid))
+    for sampleNum, (wavelength, absorbance) in enumerate(zip(wavelengthList, absorbanceList)):
+        insideSample = (wavelength[0] <= commonGrid) & (commonGrid <= wavelength[-1])
+        np.testing.assert_allclose(absorbanceMatrix[sampleNum, insideSample], np.interp(commonGrid[insideSample], wavelength, absorbance))
+        assert np.isnan(absorbanceMatrix[sampleNum, ~insideSample]).all()
+
+def test_sampleSet_CalibrateResample():
+    """
+    Samples on One Grid With One Calibration Stay on One (Shifted) Grid; Ragged Samples are Resampled Onto a Shared One.
+    """
+    wavelength = np.arange(190, 400.5, 0.5)
+    sharedSamples = sampleSet.sampleSet.fromMatrix(wavelength, np.ones((2, len(wavelength))), ["Sample 1", "Sample 2"], [{"wlCalib": wlCalib}]*2)
+    calibratedSamples = sharedSamples.calibrate()
+    assert calibratedSamples.hasSharedGrid
+    np.testing.assert_allclose(calibratedSamples.getMatrix()[0], wavelength + wavelengthGrid.getCalibrationCorrection(wavelength, wlCalib))
+
+    wavelengthList, absorbanceList, _ = getRaggedSamples()
+    raggedSamples = sampleSet.sampleSet.fromArrays(wavelengthList, absorbanceList)
+    commonGrid, absorbanceMatrix = raggedSamples.resample(gridStep = 0.5).getMatrix()
+    assert absorbanceMatrix.shape == (3, len(commonGrid)) and not np.isnan(absorbanceMatrix).any()
+    np.testing.assert_allclose(absorbanceMatrix[1], np.interp(commonGrid, wavelengthList[1], absorbanceList[1]))
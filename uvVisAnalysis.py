@@ -18,15 +18,16 @@ import numpy as np
 from pathlib import Path
 # Module to Sort Files in Order
 from natsort import natsorted
-# Modules to Plot
-import matplotlib.pyplot as plt
-# Modules for Filtering
-from scipy.signal import savgol_filter
 
 # Import Python Helper Files
-sys.path.append('./Helper Files/')  # Folder with All the Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
 import excelProcessing
 import calculateBaseline
+import batchProcessing
+import resultCache
+import resultStore
+import plotResults
+import pipelineMetrics
 
 # ---------------------------------------------------------------------------#
 # ---------------------------------------------------------------------------#
@@ -50,8 +51,29 @@ if __name__ == "__main__":
         # Else, Specify the File Names
         dpvFiles = ['UV-Vis 4_27_2022 3_56_28 PM.tsv']
 
+    # Save an Excel Copy of Each TXT/CSV/TSV File's Raw Data
+    saveExcelCopy = False
+    
+    # Save the Results and Spectra to the Results Store; the Excel Report is Exported From it
+    storeFolder = dataDirectory + "Analysis/Results Store/"   # Export With: python "Helper Files/resultStore.py" export <storeFolder> <excelFile>
+    exportExcelReport = False   # Also Write 'Analysis/<File>/<File> Analysis.xlsx'
+    exportSpectraSheets = False # Add a Sheet Per Sample With its Spectrum to the Excel Report
+    
+    # Reuse the Results of Samples Already Analyzed With the Same Parameters (Opt-In, Like uvVisBatchAnalysis.py --cache)
+    useResultCache = False
+    cacheFolder = "./Analysis Cache/"   # Clear With: python "Helper Files/resultCache.py" invalidate "./Analysis Cache/"
+    
+    # Record Each Stage's Timings and Counters (Summarize With: python "Helper Files/pipelineMetrics.py" <metricsFile>)
+    metricsFile = None      # JSON Lines File to Append the Records To; None to Not Save Them
+    logMetrics = False      # Print Each Record
+    
     # Specify the Plotting Extent
     plotBaselineSteps = False # Display the Baseline as Well as the Final Current After Baseline Subtraction
+    makePlots = True          # Save a Plot of Each Sample; False Saves Only the Numerical Results
+    plotDPI = 300             # Resolution of the Saved Plots
+    plotThumbnails = False    # Save Small, Low Resolution Plots Instead
+    plotWorkers = 1           # Number of Processes Rendering the Plots
+    plotBatchFiles = 4        # With Several plotWorkers, Render the Queued Plots Every This Many Files (Their Spectra are Kept Until Then)
     
     # Apply bounds for peak detection
     applyBoundsForPeak = False
@@ -60,11 +82,38 @@ if __name__ == "__main__":
     # Are we Looking for a Positive Peak?
     isPeakPositive = True
     
+    # Seed Each Sample's Baseline Search With the Previous Sample's (Faster on Time Series)
+    warmStartBaseline = False
+    verifyWarmStart = False   # Check Each Warm Baseline Against the Full Search (Always the Same Baseline, but Slower)
+    
+    # Confidence Intervals of the Peak From Noise Resampled Replicates (Added to the Results and Excel Report)
+    numReplicates = 0         # Replicates Per Sample (e.g. 200); 0 to Skip
+    confidenceLevel = 0.95
+    
     # ---------------------------------------------------------------------- #
     # ------------------------- Preparation Steps -------------------------- #
     
+    # Turn On the Instrumentation
+    if metricsFile != None:
+        pipelineMetrics.setSink(pipelineMetrics.jsonSink(metricsFile))
+    elif logMetrics:
+        pipelineMetrics.setSink(pipelineMetrics.logSink())
+    
     # Define the Baseline Remover Class
     baselineObject = calculateBaseline.bestLinearFit()
+    # Define the Batch Analysis Class (Shares the Filter Coefficients with the Baseline Class)
+    samplePipeline = batchProcessing.batchProcessing(baselineObject)
+    samplePipeline.warmStart = warmStartBaseline
+    samplePipeline.verifyWarmStart = verifyWarmStart
+    samplePipeline.numReplicates = numReplicates
+    samplePipeline.confidenceLevel = confidenceLevel
+    # Define the Result Cache
+    if useResultCache:
+        analysisCache = resultCache.resultCache(cacheFolder)
+    # Define the Results Store
+    analysisStore = resultStore.resultStore(storeFolder)
+    storedKeys = analysisStore.getStoredKeys(both = True)
+    paramsKey = resultStore.getParamsKey(samplePipeline.getAnalysisParams(peakWavelengthBounds if applyBoundsForPeak else None, isPeakPositive))
     
     # Get File Information
     extractData = excelProcessing.processFiles()
@@ -77,98 +126,62 @@ if __name__ == "__main__":
     # ----------------------------- DPV Program ---------------------------- #
     
     # For Each File, Extract the Important Data ,and Plot
+    renderJobs = []; numPlots = 0
+    plotBatchSize = 1 if plotWorkers == 1 else plotBatchFiles
     for fileNum, currentFile in enumerate(sorted(dpvFiles)):
         # Create Output Folder if the One Given Does Not Exist
         outputDirectory = dataDirectory + "Analysis/" + Path(currentFile).stem + "/"
         os.makedirs(outputDirectory, exist_ok = True)
         
+        pipelineMetrics.setContext(dataFile = currentFile)
+        
         # ----------------------- Extract the Data --------------------------#
         # Extract the Data/File Information from the File (Potential, Current)
         dataFile = dataDirectory + currentFile
         fileName = os.path.splitext(currentFile)[0]
-        wavelengthList, absorbanceList, sampleNames = extractData.getData(dataFile, outputDirectory, testSheetNum = 0)
+        wavelengthList, absorbanceList, sampleNames = extractData.getData(dataFile, outputDirectory, testSheetNum = 0, saveExcel = saveExcelCopy)
         # ------------------------------------------------------------------ # 
         
-        analyzedData = []
-        for sampleNum in range(len(sampleNames)):
-            # Extract the Current Run
-            sampleName = sampleNames[sampleNum]
-            wavelength = np.array(wavelengthList[sampleNum])
-            absorbance = np.array(absorbanceList[sampleNum])
-            
-            if not isPeakPositive:
-                absorbance = -absorbance
-            # ----------------------- Filter the Data ---------------------- #
-            # Low Pass Filter
-            samplingFreq = len(wavelength)/(wavelength[-1] - wavelength[0])
-            filteredData = baselineObject.butterFilter(absorbance, 0.1, samplingFreq, order = 3, filterType = 'low')
-            # Apply a Savgol Filter
-            filteredData = savgol_filter(filteredData, 15, 2, mode='nearest')
-            # -------------------------------------------------------------- #
+        # ------------------- Analyze All the Samples ---------------------- #
+        # Stack the Samples and Filter, Find the Peaks, and Remove the Baselines Together
+        wavelength, absorbanceMatrix = samplePipeline.stackSamples(wavelengthList, absorbanceList)
+        dataKey = resultStore.getDataKey(wavelength, absorbanceMatrix)
+        samplePipeline.resetWarmStart()
+        if useResultCache:
+            results, filteredMatrix, baselineMatrix, fromCache = samplePipeline.analyzeSamples_Cached(wavelength, absorbanceMatrix, sampleNames, analysisCache, peakWavelengthBounds if applyBoundsForPeak else None, isPeakPositive)
+        else:
+            results, filteredMatrix, baselineMatrix = samplePipeline.analyzeSamples(wavelength, absorbanceMatrix, sampleNames, peakWavelengthBounds if applyBoundsForPeak else None, isPeakPositive)
+            fromCache = np.zeros(len(sampleNames), dtype=bool)
+        if not isPeakPositive:
+            absorbanceMatrix = -absorbanceMatrix
+        # ------------------------------------------------------------------ #
         
-            # ------------------------ Find the Peak ----------------------- #
-            # Find Peaks in the Data
-            if applyBoundsForPeak:
-                peakInd = baselineObject.findPeak(wavelength, filteredData, peakWavelengthBounds)
+        # Print the Results
+        for sampleNum, sampleResult in enumerate(results):
+            if sampleResult["leftCutInd"] < 0:
+                print("No Peak or Baseline Found in " + sampleNames[sampleNum] + " Data")
             else:
-                peakInd = baselineObject.findPeak(wavelength, filteredData)
-            # Return None if No Peak Found
-            if peakInd == None:
-                print("No Peak Found in " + sampleName + " Data")
-                continue
-            # -------------------------------------------------------------- #
-    
-            # ---------------- Find and Remove the Baseline ---------------- #
-            # Get Baseline from Best Linear Fit
-            leftCutInd, rightCutInd = baselineObject.findLinearBaseline(wavelength, filteredData, peakInd)
-            if None in [leftCutInd, rightCutInd]:
-                print("No Baseline Found in " + sampleName + " Data")
-                continue
-            
-            # Fit Lines to Ends of Graph
-            lineSlope, slopeIntercept = np.polyfit(wavelength[[leftCutInd, rightCutInd]], filteredData[[leftCutInd, rightCutInd]], 1)
-            linearFit = lineSlope*wavelength + slopeIntercept
-
-            # Piece Together absorbance's Baseline
-            baseline = np.concatenate((filteredData[0:leftCutInd], linearFit[leftCutInd: rightCutInd+1], filteredData[rightCutInd+1:len(filteredData)]))
-            # Find absorbance After Baseline Subtraction
-            baselineData = filteredData - baseline
-            
-            # Get the Results
-            peakInd = np.argmax(baselineData[leftCutInd:rightCutInd])
-            peakWavelength = wavelength[leftCutInd:rightCutInd][peakInd]
-            peakHeight = filteredData[leftCutInd:rightCutInd][peakInd]
-            peakHeight_Baseline = baselineData[leftCutInd:rightCutInd][peakInd]
-            analyzedData.append([sampleName, peakWavelength, peakHeight, peakHeight_Baseline])
-            
-            print(sampleName + ": Peak at (" + str(peakWavelength) + ", " + str(np.round(peakHeight_Baseline, 4)) + ")")
-            # -------------------------------------------------------------- #
-            
-            # ------------------ Plot and Save the Results ----------------- #
-            # Create a new figure
-            figure = plt.figure()
-            # Plot the Data
-            plt.plot(wavelength, absorbance, linewidth=2, label = "Raw Data")
-            plt.plot(wavelength, filteredData, linewidth=2, label = "Filtered Data")
-            plt.plot(wavelength, baselineData, linewidth=2, label = "Baseline Subtracted")
-            plt.plot(wavelength[[leftCutInd,rightCutInd]], filteredData[[leftCutInd,rightCutInd]], linewidth=2)
-            # Set the Labels
-            plt.title(sampleName + ": Peak at (" + str(peakWavelength) + ", " + str(np.round(peakHeight_Baseline, 4)) + ")")
-            plt.xlabel("Wavelength (nm)")
-            plt.ylabel("Absorbance (AU)")
-            # Add the Legend
-            legend = plt.legend()
-            # Set the Figure Boundaries
-            plt.xlim(wavelength[leftCutInd] - 20, wavelength[rightCutInd ]+ 20)
-            plt.ylim(min(min(filteredData[leftCutInd:rightCutInd]), 0)*1.1,max(peakHeight_Baseline, peakHeight)*1.1)
-            # Save the Data
-            plt.savefig(outputDirectory + sampleName + ".png", dpi=300, bbox_extra_artists=(legend,), bbox_inches='tight')
-            plt.show()
-            # -------------------------------------------------------------- #
+                print(sampleNames[sampleNum] + ": Peak at (" + str(sampleResult["peakWavelength"]) + ", " + str(np.round(sampleResult["peakHeight_Baseline"], 4)) + ")")
         
-        # Save the Data
-        saveData = excelProcessing.saveData()
-        saveData.saveData(analyzedData, outputDirectory, fileName + " Analysis.xlsx")
-            
-
-
+        # Queue the Plots (Cached Samples Were Already Plotted)
+        if makePlots:
+            renderSamples = np.array([not fromCache[sampleNum] or not os.path.isfile(outputDirectory + sampleName + ".png") for sampleNum, sampleName in enumerate(sampleNames)], dtype=bool)
+            renderJobs.append({"outputDirectory": outputDirectory, "wavelength": wavelength, "absorbanceMatrix": absorbanceMatrix, "filteredMatrix": filteredMatrix,
+                               "baselineMatrix": baselineMatrix, "results": results, "renderSamples": renderSamples})
+            # Render Every Few Files, so the Spectra of the Whole Folder are Not Held at Once
+            if len(renderJobs) >= plotBatchSize:
+                numPlots += plotResults.renderFiles(renderJobs, plotWorkers, plotDPI, plotThumbnails, metricsFile)
+                renderJobs = []
+        
+        # Save the Data (Unless the Same Spectra, or Samples That All Came From the Cache, Were Already Stored With the Same Settings)
+        if not (analysisStore.isStored(currentFile, paramsKey, dataKey, storedKeys) or (fromCache.all() and storedKeys.get(currentFile, ("",))[0] == paramsKey)):
+            analysisStore.append(currentFile, wavelength, results, filteredMatrix, baselineMatrix, paramsKey, dataKey)
+        if exportExcelReport:
+            analysisStore.exportExcel(outputDirectory, fileName + " Analysis.xlsx", currentFile, exportSpectraSheets)
+    
+    # ------------------ Plot the Results ------------------ #
+    # Render the Plots Still Queued
+    if makePlots:
+        pipelineMetrics.setContext(dataFile = None)
+        numPlots += plotResults.renderFiles(renderJobs, plotWorkers, plotDPI, plotThumbnails, metricsFile)
+        print("Saved " + str(numPlots) + " Plots")
@@ -0,0 +1,159 @@
+"""
+Analyze Every UV-Vis Export Under a Folder in Parallel:
+    $ python uvVisBatchAnalysis.py ./Data/ --workers 4 --peakBounds 240 320 --summary "./Data/Batch Summary.xlsx"
+Skip the Plots With --noPlots, or Save Quick Low Resolution Ones With --thumbnails.
+Record Where the Time Goes With --metrics "./Analysis Metrics.jsonl" (Summarize With python "Helper Files/pipelineMetrics.py").
+Keep Every Result and Spectrum in a Results Store With --store "./Data/Analysis/Results Store/".
+Put Files From Different Days or Instruments on One Grid With --calibrate --gridStep 0.5 (Applies Each Sample's //WLCalib Values).
+Table Every Peak of Every Sample (and Deconvolve Overlapping Bands) With --multiPeak --peakShape gaussian --peaksTable "./Data/Peaks.csv"
+(or as a 'Peaks' Sheet of the --summary Workbook and of Each --fileReports Report).
+Re-Runs Only Analyze New or Changed Samples With:
+    $ python uvVisBatchAnalysis.py ./Data/ --cache "./Analysis Cache/"
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import csv
+import time
+import argparse
+import numpy as np
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import excelProcessing
+import batchRunner
+import batchProcessing
+import multiPeak
+import resultCache
+import resultStore
+import plotResults
+import pipelineMetrics
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getArgumentParser():
+    defaultParams = batchRunner.getDefaultParams()
+    parser = argparse.ArgumentParser(description = "Analyze every UV-Vis .tsv export under a folder with a pool of worker processes.")
+    parser.add_argument("rootDirectory", help = "Folder to search (recursively) for .tsv files")
+    parser.add_argument("--workers", type = int, default = None, help = "Number of worker processes (default: one per CPU)")
+    parser.add_argument("--peakBounds", type = float, nargs = 2, default = None, metavar = ("MIN_NM", "MAX_NM"), help = "Only look for peaks between these wavelengths (default: the whole spectrum)")
+    parser.add_argument("--negativePeak", action = "store_true", help = "Look for a negative peak")
+    parser.add_argument("--cutoffFreq", type = float, default = defaultParams["cutoffFreq"], help = "Butterworth low pass cutoff")
+    parser.add_argument("--savgolWindow", type = int, default = defaultParams["savgolWindow"], help = "Savitzky-Golay window length (points)")
+    parser.add_argument("--savgolOrder", type = int, default = defaultParams["savgolOrder"], help = "Savitzky-Golay polynomial order")
+    parser.add_argument("--warmStart", action = "store_true", help = "Seed each sample's baseline search with the previous sample's (time series files)")
+    parser.add_argument("--verifyWarmStart", action = "store_true", help = "Check each warm started baseline against the full search (same baselines as without --warmStart)")
+    parser.add_argument("--calibrate", action = "store_true", help = "Apply each sample's //WLCalib header to its wavelengths")
+    parser.add_argument("--gridStep", type = float, default = None, metavar = "NM", help = "Resample every file onto a grid of this step (lines files up across days and instruments)")
+    parser.add_argument("--replicates", type = int, default = 0, help = "Estimate confidence intervals from this many noise resampled replicates per sample")
+    parser.add_argument("--confidence", type = float, default = defaultParams["confidenceLevel"], help = "Confidence level of the intervals")
+    parser.add_argument("--multiPeak", action = "store_true", help = "Also find every peak of each sample (not just the most prominent); saved by --peaksTable, --summary, or --fileReports")
+    parser.add_argument("--peakShape", choices = list(multiPeak.peakShapes), default = None, help = "Deconvolve the peaks sharing a baseline into these components (implies --multiPeak)")
+    parser.add_argument("--minProminence", type = float, default = defaultParams["minRelativeProminence"], help = "Smallest peak kept, as a fraction of the sample's most prominent")
+    parser.add_argument("--maxPeaks", type = int, default = defaultParams["maxPeaks"], help = "Most peaks kept per sample")
+    parser.add_argument("--peaksTable", default = None, metavar = "TABLE_FILE", help = "Save every peak of every sample to this .csv or .xlsx file (implies --multiPeak)")
+    parser.add_argument("--fileReports", action = "store_true", help = "Also write 'Analysis/<file>/<file> Analysis.xlsx' next to each file")
+    parser.add_argument("--summary", default = None, help = "Excel file to save the merged results to")
+    parser.add_argument("--store", default = None, metavar = "STORE_FOLDER", help = "Results store to append every file's results and spectra to")
+    parser.add_argument("--noPlots", "--no-plots", action = "store_true", help = "Only save the numerical results (no PNG per sample)")
+    parser.add_argument("--plotDPI", type = int, default = 300, help = "Resolution of the saved plots")
+    parser.add_argument("--thumbnails", action = "store_true", help = "Save small, low resolution plots")
+    parser.add_argument("--metrics", default = None, metavar = "METRICS_FILE", help = "Record each stage's timings and counters (JSON lines)")
+    parser.add_argument("--cache", default = None, metavar = "CACHE_FOLDER", help = "Reuse the results of samples already analyzed with the same parameters")
+    parser.add_argument("--clearCache", action = "store_true", help = "Empty the --cache folder before running")
+    return parser
+
+def getAnalysisParams(args):
+    analysisParams = batchRunner.getDefaultParams()
+    analysisParams["peakWavelengthBounds"] = list(args.peakBounds) if args.peakBounds != None else None
+    analysisParams["isPeakPositive"] = not args.negativePeak
+    analysisParams["cutoffFreq"] = args.cutoffFreq
+    analysisParams["savgolWindow"] = args.savgolWindow
+    analysisParams["savgolOrder"] = args.savgolOrder
+    analysisParams["warmStart"] = args.warmStart
+    analysisParams["verifyWarmStart"] = args.verifyWarmStart
+    analysisParams["applyCalibration"] = args.calibrate
+    analysisParams["gridStep"] = args.gridStep
+    analysisParams["numReplicates"] = args.replicates
+    analysisParams["confidenceLevel"] = args.confidence
+    analysisParams["multiPeak"] = args.multiPeak or args.peakShape != None or args.peaksTable != None
+    analysisParams["peakShape"] = args.peakShape
+    analysisParams["minRelativeProminence"] = args.minProminence
+    analysisParams["maxPeaks"] = args.maxPeaks
+    analysisParams["saveFileReports"] = args.fileReports
+    analysisParams["cacheFolder"] = args.cache
+    analysisParams["makePlots"] = not args.noPlots
+    analysisParams["metricsFile"] = args.metrics
+    if args.store != None:
+        analysisParams["storeFolder"] = args.store
+        analysisParams["storedKeys"] = resultStore.resultStore(args.store).getStoredKeys(both = True)
+    return analysisParams
+
+
+if __name__ == "__main__":
+    parser = getArgumentParser()
+    args = parser.parse_args()
+    analysisParams = getAnalysisParams(args)
+    if analysisParams["multiPeak"] and args.peaksTable == None and args.summary == None and not args.fileReports:
+        parser.error("--multiPeak and --peakShape need --peaksTable, --summary, or --fileReports to save the peaks to")
+
+    # Find the Files
+    dataFiles = batchRunner.findDataFiles(args.rootDirectory)
+    if len(dataFiles) == 0:
+        print("No TSV Files Found Under:", args.rootDirectory)
+        sys.exit(1)
+    print("Found " + str(len(dataFiles)) + " Files Under " + args.rootDirectory)
+
+    # Clear the Result Cache
+    if args.clearCache and args.cache != None:
+        print("Deleted " + str(resultCache.resultCache(args.cache).invalidate()) + " Cached Samples")
+    
+    # Analyze the Files
+    startTime = time.time()
+    summary, fileReports = batchRunner.runFiles(dataFiles, analysisParams, args.workers)
+    batchRunner.printRunReport(fileReports, time.time() - startTime)
+    
+    # Render the Plots
+    if not args.noPlots:
+        startTime = time.time()
+        pipelineMetrics.setContext(dataFile = None)
+        renderJobs = [fileReport["renderJob"] for fileReport in fileReports if "renderJob" in fileReport]
+        numPlots = plotResults.renderFiles(renderJobs, args.workers, args.plotDPI, args.thumbnails, args.metrics)
+        print("Saved " + str(numPlots) + " Plots in " + str(round(time.time() - startTime, 2)) + " s")
+
+    # Every Peak of Every Sample
+    if analysisParams["multiPeak"]:
+        peaksTable = np.concatenate([fileReport["peaks"] for fileReport in fileReports])
+        peakHeaders, peakRows = multiPeak.getTableRows(peaksTable, args.rootDirectory)
+
+    # Save the Merged Results
+    if args.summary != None:
+        summaryHeaders = ["File", "Sample Name", "Wavelength (nm)", "Absorbance (AU)", "Baseline Subtracted (AU)"] + (batchProcessing.uncertaintyHeaders if args.replicates > 0 else [])
+        summaryFields = ["peakWavelength", "peakHeight", "peakHeight_Baseline"] + (batchProcessing.uncertaintyFields if args.replicates > 0 else [])
+        summaryRows = [[os.path.relpath(row["fileName"], args.rootDirectory), str(row["sampleName"])] + [float(row[fieldName]) for fieldName in summaryFields] for row in summary if row["peakInd"] >= 0]
+        summaryFolder, summaryName = os.path.split(os.path.abspath(args.summary))
+        excelProcessing.saveData().saveData(summaryRows, summaryFolder + "/", summaryName, headers = summaryHeaders)
+        if analysisParams["multiPeak"]:
+            excelProcessing.saveData().saveData(peakRows, summaryFolder + "/", summaryName, sheetName = "Peaks", headers = peakHeaders)
+
+    # Save Every Peak of Every Sample
+    if args.peaksTable != None:
+        if args.peaksTable.endswith(".xlsx"):
+            peaksFolder, peaksName = os.path.split(os.path.abspath(args.peaksTable))
+            excelProcessing.saveData().saveData(peakRows, peaksFolder + "/", peaksName, headers = peakHeaders)
+        else:
+            with open(args.peaksTable, "w", newline = "") as peaksFile:
+                tableWriter = csv.writer(peaksFile)
+                tableWriter.writerow(peakHeaders)
+                tableWriter.writerows(peakRows)
+        print("Saved " + str(len(peakRows)) + " Peaks to " + args.peaksTable)
+
+    # Flag the Batch if Any File Failed
+    if any(fileReport["error"] != None for fileReport in fileReports):
+        sys.exit(1)
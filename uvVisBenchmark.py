@@ -0,0 +1,282 @@
+"""
+Time Each Stage of the Analysis (Parse -> Stack -> Filter -> Peak -> Baseline -> Subtract -> Results -> Save) on the Bundled Data
+and on Synthetic Spectra, and Save the Timings as JSON:
+    $ python uvVisBenchmark.py --output "Benchmark Baseline.json"
+Compare a Later Run Against the Saved Timings (Exits With 1 if Any Stage Got Slower Than --tolerance Allows):
+    $ python uvVisBenchmark.py --compare "Benchmark Baseline.json"
+The Start Up of the Scripts and Worker Processes is Timed in a Fresh Interpreter, Next to a Bare 'import numpy, scipy.signal'
+Timed the Same Way. Scripts Taking More Than --importBudget Seconds Longer Than That are Flagged, and the Run Exits With 1
+if the Analysis Loads matplotlib/openpyxl/pyexcel Before a Plot or Excel File is Made.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import scipy
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import excelProcessing
+import batchProcessing
+import batchRunner
+import resultStore
+import sampleSet
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+# The Stages in the Order They Run
+stageNames = ["parse", "stack", "filter", "peak", "baseline", "subtract", "results", "store", "excel"]
+# What Each Kind of Process Imports When it Starts
+importTargets = {
+    "core": ["sampleSet", "batchProcessing", "calculateBaseline"],         # Parsing, Filtering, Peak and Baseline
+    "worker": ["batchRunner"],                                              # A Batch Worker Process
+    "batchCLI": ["uvVisBatchAnalysis"],
+    "watchCLI": ["uvVisWatchAnalysis"],
+    "server": ["uvVisServer"],
+    "client": ["uvVisClient"],
+    "sweepCLI": ["uvVisParameterSweep"],
+}
+# What Every Analysis Process Needs: the Start Up Budget is Counted From This Machine's Time to Import These
+importFloor = ["numpy", "scipy.signal"]
+# Only Needed for Plots and Excel Files: Must Not be Loaded at Start Up
+lazyModules = ["matplotlib", "openpyxl", "pyexcel"]
+
+
+def writeSyntheticFile(outputFile, numSamples, numPoints, randomState):
+    """
+    Writes numSamples Spectra in the Spectrometer's TSV Format: a Peak Between 250 and 310 nm on a Scattering Background, Plus Noise.
+    """
+    wavelength = np.linspace(190, 850, numPoints)
+    with open(outputFile, "w", newline = "") as syntheticFile:
+        for sampleNum in range(numSamples):
+            peakCenter = randomState.uniform(250, 310); peakWidth = randomState.uniform(8, 25); peakHeight = randomState.uniform(0.05, 2)
+            absorbance = peakHeight*np.exp(-0.5*((wavelength - peakCenter)/peakWidth)**2) + randomState.uniform(0.5, 3)*(190/wavelength)**4 + randomState.uniform(0, 0.1)
+            absorbance += randomState.normal(0, 0.002, numPoints)
+            # Header Block
+            syntheticFile.write("Sample " + str(sampleNum + 1) + "\t\r\n" + "1/1/22 %d:%02d\t\r\n" % (sampleNum//60 % 24, sampleNum % 60) + "Wavelength (nm)\t10mm Absorbance\r\n")
+            syntheticFile.write("//WLCalib: Shift \t0.17333\r\n//QSpecEnd: \t\r\n")
+            # Data Rows
+            syntheticFile.write("".join("%g\t%.5f\r\n" % dataPoint for dataPoint in zip(wavelength, absorbance)))
+            syntheticFile.write("\t\r\n\t\r\n")
+
+def runStages(dataFiles, peakWavelengthBounds, outputFolder, traceMemory = False):
+    """
+    Runs Every Stage on Every File. Returns ({stageName: Seconds}, {stageName: Peak Bytes}, numSamples).
+    Peak Memory (Allocated Through Python/NumPy) is Only Measured With traceMemory, as Tracing Slows the Stages Down.
+    """
+    samplePipeline = batchProcessing.batchProcessing()
+    analysisStore = resultStore.resultStore(os.path.join(outputFolder, "Results Store"))
+    stageTimes = dict.fromkeys(stageNames, 0.0); stagePeaks = dict.fromkeys(stageNames, 0); numSamples = 0
+
+    def runStage(stageName, stageFunction, *stageArgs):
+        if traceMemory:
+            tracemalloc.reset_peak()
+            startMemory = tracemalloc.get_traced_memory()[0]
+        startTime = time.perf_counter()
+        stageOutput = stageFunction(*stageArgs)
+        stageTimes[stageName] += time.perf_counter() - startTime
+        if traceMemory:
+            stagePeaks[stageName] = max(stagePeaks[stageName], tracemalloc.get_traced_memory()[1] - startMemory)
+        return stageOutput
+
+    if traceMemory:
+        tracemalloc.start()
+    try:
+        for fileNum, dataFile in enumerate(dataFiles):
+            fileSamples = runStage("parse", sampleSet.sampleSet.fromFile, dataFile)
+            wavelength, absorbanceMatrix = runStage("stack", fileSamples.getMatrix)
+            sampleNames = fileSamples.sampleNames
+            filteredMatrix = runStage("filter", samplePipeline.filterSamples, wavelength, absorbanceMatrix)
+            peakInds = runStage("peak", samplePipeline.findPeaks, wavelength, filteredMatrix, peakWavelengthBounds)
+            leftCutInds, rightCutInds = runStage("baseline", samplePipeline.findBaselines, wavelength, filteredMatrix, peakInds)
+            baselineMatrix = runStage("subtract", samplePipeline.subtractBaselines, wavelength, filteredMatrix, leftCutInds, rightCutInds)
+            results = runStage("results", samplePipeline.getResults, wavelength, sampleNames, filteredMatrix, baselineMatrix, leftCutInds, rightCutInds)
+            # Save Like uvVisAnalysis.py
+            runStage("store", analysisStore.append, dataFile, wavelength, results, filteredMatrix, baselineMatrix)
+            runStage("excel", excelProcessing.saveData().saveData, samplePipeline.getAnalyzedRows(results), outputFolder + "/", "File " + str(fileNum) + " Analysis.xlsx")
+            numSamples += len(sampleNames)
+    finally:
+        if traceMemory:
+            tracemalloc.stop()
+
+    return stageTimes, stagePeaks, numSamples
+
+def benchmarkFiles(dataFiles, peakWavelengthBounds, numRepeats):
+    """
+    Returns the Benchmark of One Dataset: Each Stage's Best Time Over numRepeats, its Peak Memory, and its Samples per Second.
+    """
+    bestTimes = None
+    for repeatNum in range(numRepeats):
+        outputFolder = tempfile.mkdtemp(prefix = "uvVisBenchmark")
+        try:
+            stageTimes, _, numSamples = runStages(dataFiles, peakWavelengthBounds, outputFolder)
+        finally:
+            shutil.rmtree(outputFolder)
+        bestTimes = stageTimes if bestTimes == None else {stageName: min(bestTimes[stageName], stageTimes[stageName]) for stageName in stageNames}
+    outputFolder = tempfile.mkdtemp(prefix = "uvVisBenchmark")
+    try:
+        _, stagePeaks, _ = runStages(dataFiles, peakWavelengthBounds, outputFolder, traceMemory = True)
+    finally:
+        shutil.rmtree(outputFolder)
+
+    # Organize the Results
+    stageResults = {}
+    for stageName in stageNames:
+        stageResults[stageName] = {"time": bestTimes[stageName], "peakMemory": stagePeaks[stageName], "samplesPerSecond": numSamples/bestTimes[stageName] if bestTimes[stageName] > 0 else None}
+    totalTime = sum(bestTimes.values())
+    stageResults["total"] = {"time": totalTime, "peakMemory": max(stagePeaks.values()), "samplesPerSecond": numSamples/totalTime if totalTime > 0 else None}
+
+    return {"numFiles": len(dataFiles), "numSamples": numSamples, "stages": stageResults}
+
+def timeImports(moduleNames, numRepeats):
+    """
+    Imports the Modules in a Fresh Interpreter (Run Outside the Repository, so Nothing Depends on the Folder).
+    Returns {"importTime": Best Seconds to Import, "startTime": Best Seconds Until the Process Exits, "lazyLoaded": [...]}.
+    """
+    repoFolder = os.path.dirname(os.path.abspath(__file__))
+    importScript = "; ".join([
+        "import sys, time, json", "startTime = time.perf_counter()",
+        "sys.path[:0] = " + repr([repoFolder, os.path.join(repoFolder, "Helper Files")]),
+        "".join("import " + moduleName + "; " for moduleName in moduleNames).rstrip("; "),
+        "print(json.dumps([time.perf_counter() - startTime, [moduleName for moduleName in " + repr(lazyModules) + " if moduleName in sys.modules]]))",
+    ])
+    importTimes = []; startTimes = []
+    for repeatNum in range(numRepeats):
+        startTime = time.perf_counter()
+        importOutput = subprocess.run([sys.executable, "-c", importScript], capture_output = True, text = True, check = True, cwd = tempfile.gettempdir())
+        startTimes.append(time.perf_counter() - startTime)
+        importTime, lazyLoaded = json.loads(importOutput.stdout.strip().splitlines()[-1])
+        importTimes.append(importTime)
+
+    return {"importTime": min(importTimes), "startTime": min(startTimes), "lazyLoaded": lazyLoaded}
+
+def checkImports(importResults, importBudget, floorResult):
+    """
+    Prints Each Start Up Time Over the Bare numpy/scipy Start Up (floorResult).
+    Returns (the Targets That Loaded a Lazy Module, the Targets More Than importBudget Seconds Slower Than the Floor).
+    """
+    print("%-10s %9.4f s Import %9.4f s Start Up" % ("numpy+scipy", floorResult["importTime"], floorResult["startTime"]))
+    lazyTargets = []; slowTargets = []
+    for targetName, importResult in importResults.items():
+        extraTime = importResult["startTime"] - floorResult["startTime"]
+        isSlow = extraTime > importBudget
+        print("%-10s %9.4f s Import %9.4f s Start Up %+9.4f s%s" % (targetName, importResult["importTime"], importResult["startTime"], extraTime,
+              ("  LOADED " + ", ".join(importResult["lazyLoaded"]) if len(importResult["lazyLoaded"]) != 0 else "") + ("  OVER BUDGET" if isSlow else "")))
+        if len(importResult["lazyLoaded"]) != 0:
+            lazyTargets.append(targetName)
+        if isSlow:
+            slowTargets.append(targetName)
+
+    return lazyTargets, slowTargets
+
+def compareBenchmarks(benchmark, baselineBenchmark, tolerance, minTime):
+    """
+    Prints Each Stage's Time Against the Baseline. Returns the Stages That Slowed Down by More Than tolerance (a Fraction),
+    Ignoring Stages Faster Than minTime Seconds in Both Runs (Too Short to Time Reliably).
+    """
+    regressions = []
+    for datasetName, datasetResults in benchmark["datasets"].items():
+        if datasetName not in baselineBenchmark["datasets"]:
+            continue
+        baselineStages = baselineBenchmark["datasets"][datasetName]["stages"]
+        for stageName, stageResult in datasetResults["stages"].items():
+            if stageName not in baselineStages:
+                continue
+            newTime = stageResult["time"]; oldTime = baselineStages[stageName]["time"]
+            timeRatio = newTime/oldTime if oldTime > 0 else float("inf")
+            isRegression = timeRatio > 1 + tolerance and max(newTime, oldTime) >= minTime
+            print("%-10s %-9s %9.4f s -> %9.4f s (%5.2fx)%s" % (datasetName, stageName, oldTime, newTime, timeRatio, "  SLOWER" if isRegression else ""))
+            if isRegression:
+                regressions.append((datasetName, stageName, timeRatio))
+
+    return regressions
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(description = "Benchmark each stage of the UV-Vis analysis pipeline.")
+    parser.add_argument("--dataDirectory", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data"), help = "Folder of .tsv exports to benchmark (default: the bundled Data/)")
+    parser.add_argument("--synthSamples", type = int, default = 100, help = "Number of synthetic spectra (0 to skip)")
+    parser.add_argument("--synthPoints", type = int, default = 2641, help = "Points per synthetic spectrum")
+    parser.add_argument("--synthFiles", type = int, default = 4, help = "Number of files the synthetic spectra are split over")
+    parser.add_argument("--peakBounds", type = float, nargs = 2, default = [240, 320], metavar = ("MIN_NM", "MAX_NM"), help = "Only look for peaks between these wavelengths")
+    parser.add_argument("--repeats", type = int, default = 3, help = "Runs per dataset (the fastest is kept)")
+    parser.add_argument("--output", default = None, help = "JSON file to save the benchmark to (default: print it)")
+    parser.add_argument("--compare", default = None, metavar = "BASELINE_JSON", help = "Saved benchmark to compare against")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "Allowed slow down before a stage is flagged (0.2 = 20%%)")
+    parser.add_argument("--minTime", type = float, default = 0.01, help = "Stages faster than this (seconds) are never flagged")
+    parser.add_argument("--importBudget", type = float, default = 0.5, help = "Seconds a script or worker process may take to start beyond a bare 'import numpy, scipy.signal'")
+    parser.add_argument("--importRepeats", type = int, default = 3, help = "Fresh interpreters per start up timing (the fastest is kept; 0 to skip)")
+    return parser
+
+
+if __name__ == "__main__":
+    args = getArgumentParser().parse_args()
+    benchmark = {"machine": {"platform": platform.platform(), "python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__, "cpuCount": os.cpu_count()},
+                 "settings": vars(args), "datasets": {}, "imports": {}, "importFloor": None}
+
+    # Time the Start Up of Each Kind of Process
+    if args.importRepeats > 0:
+        print("Timing the Start Up of " + str(len(importTargets)) + " Scripts")
+        benchmark["importFloor"] = timeImports(importFloor, args.importRepeats)
+        benchmark["imports"] = {targetName: timeImports(moduleNames, args.importRepeats) for targetName, moduleNames in importTargets.items()}
+
+    # Benchmark the Bundled Exports
+    dataFiles = batchRunner.findDataFiles(args.dataDirectory)
+    if len(dataFiles) != 0:
+        print("Benchmarking " + str(len(dataFiles)) + " Files Under " + args.dataDirectory)
+        benchmark["datasets"]["data"] = benchmarkFiles(dataFiles, args.peakBounds, args.repeats)
+
+    # Benchmark Synthetic Spectra (Seeded, so Every Run Analyzes the Same Spectra)
+    if args.synthSamples > 0:
+        print("Benchmarking " + str(args.synthSamples) + " Synthetic Spectra of " + str(args.synthPoints) + " Points")
+        syntheticFolder = tempfile.mkdtemp(prefix = "uvVisSynthetic")
+        try:
+            randomState = np.random.RandomState(42)
+            syntheticFiles = []
+            for fileNum, fileSamples in enumerate(np.array_split(np.arange(args.synthSamples), max(1, args.synthFiles))):
+                syntheticFiles.append(os.path.join(syntheticFolder, "Synthetic " + str(fileNum) + ".tsv"))
+                writeSyntheticFile(syntheticFiles[-1], len(fileSamples), args.synthPoints, randomState)
+            benchmark["datasets"]["synthetic"] = benchmarkFiles(syntheticFiles, args.peakBounds, args.repeats)
+        finally:
+            shutil.rmtree(syntheticFolder)
+
+    # Print or Save the Benchmark
+    for datasetName, datasetResults in benchmark["datasets"].items():
+        for stageName, stageResult in datasetResults["stages"].items():
+            print("%-10s %-9s %9.4f s %10.1f Samples/s %8.2f MB" % (datasetName, stageName, stageResult["time"], stageResult["samplesPerSecond"] or 0, stageResult["peakMemory"]/1024**2))
+    if args.output != None:
+        with open(args.output, "w") as outputFile:
+            json.dump(benchmark, outputFile, indent = 2)
+    else:
+        print(json.dumps(benchmark, indent = 2))
+
+    # Flag Slow Start Ups and Regressions Against the Baseline
+    # Start Up Times Depend on the Machine, so Only Loading a Plotting/Excel Module Fails the Run
+    lazyTargets = []
+    if benchmark["importFloor"] != None:
+        lazyTargets, slowTargets = checkImports(benchmark["imports"], args.importBudget, benchmark["importFloor"])
+        if len(slowTargets) != 0:
+            print(str(len(slowTargets)) + " Scripts Take More Than " + str(args.importBudget) + " s Longer to Start Than numpy+scipy: " + ", ".join(slowTargets))
+        if len(lazyTargets) != 0:
+            print(str(len(lazyTargets)) + " Scripts Load Plotting/Excel Modules at Start Up: " + ", ".join(lazyTargets))
+    regressions = []
+    if args.compare != None:
+        with open(args.compare) as baselineFile:
+            baselineBenchmark = json.load(baselineFile)
+        regressions = compareBenchmarks(benchmark, baselineBenchmark, args.tolerance, args.minTime)
+        if len(regressions) != 0:
+            print(str(len(regressions)) + " Stages Got Slower Than the Baseline")
+    if len(lazyTargets) != 0 or len(regressions) != 0:
+        sys.exit(1)
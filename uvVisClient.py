@@ -0,0 +1,86 @@
+"""
+Analyze a File With a Running uvVisServer.py (Prints the Same Lines as uvVisAnalysis.py):
+    $ python uvVisClient.py "./Data/05-20-2022 DA MIP 5 Hours/UV-Vis 5_20_2022 11_50_05 AM.tsv" --peakBounds 240 320 --plots
+Re-Analyze Only Some Samples With --samples "Sample 3" "Sample 4", or Check the Server With --status.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import json
+import argparse
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import analysisClient
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(description = "Send a UV-Vis .tsv export to a running uvVisServer.py for analysis.")
+    parser.add_argument("dataFiles", nargs = "*", help = "The .tsv files to analyze")
+    parser.add_argument("--server", default = "http://127.0.0.1:8765", help = "The server's address")
+    parser.add_argument("--samples", nargs = "+", default = None, help = "Only analyze these samples")
+    parser.add_argument("--peakBounds", type = float, nargs = 2, default = None, metavar = ("MIN_NM", "MAX_NM"), help = "Only look for peaks between these wavelengths (default: the whole spectrum)")
+    parser.add_argument("--negativePeak", action = "store_true", help = "Look for a negative peak")
+    parser.add_argument("--cutoffFreq", type = float, default = analysisClient.defaultRequest["cutoffFreq"], help = "Butterworth low pass cutoff")
+    parser.add_argument("--savgolWindow", type = int, default = analysisClient.defaultRequest["savgolWindow"], help = "Savitzky-Golay window length (points)")
+    parser.add_argument("--savgolOrder", type = int, default = analysisClient.defaultRequest["savgolOrder"], help = "Savitzky-Golay polynomial order")
+    parser.add_argument("--calibrate", action = "store_true", help = "Apply each sample's //WLCalib header to its wavelengths")
+    parser.add_argument("--gridStep", type = float, default = None, metavar = "NM", help = "Resample the file onto a grid of this step")
+    parser.add_argument("--warmStart", action = "store_true", help = "Seed each sample's baseline search with the previous sample's (time series files)")
+    parser.add_argument("--plots", action = "store_true", help = "Save a plot of each analyzed sample")
+    parser.add_argument("--plotDPI", type = int, default = 300, help = "Resolution of the saved plots")
+    parser.add_argument("--thumbnails", action = "store_true", help = "Save small, low resolution plots")
+    parser.add_argument("--store", action = "store_true", help = "Append the results and spectra to 'Analysis/Results Store/' next to the file")
+    parser.add_argument("--excel", action = "store_true", help = "Also export the file's Excel report from the store")
+    parser.add_argument("--json", action = "store_true", help = "Print the server's full JSON responses")
+    parser.add_argument("--status", action = "store_true", help = "Print the server's counters")
+    parser.add_argument("--clear", action = "store_true", help = "Make the server forget its parsed files and analyses")
+    parser.add_argument("--shutdown", action = "store_true", help = "Stop the server")
+    return parser
+
+def getRequest(dataFile, args):
+    return {"dataFile": os.path.abspath(dataFile), "sampleNames": args.samples, "peakWavelengthBounds": args.peakBounds, "isPeakPositive": not args.negativePeak,
+            "cutoffFreq": args.cutoffFreq, "savgolWindow": args.savgolWindow, "savgolOrder": args.savgolOrder, "applyCalibration": args.calibrate, "gridStep": args.gridStep, "warmStart": args.warmStart, "makePlots": args.plots,
+            "plotDPI": args.plotDPI, "thumbnails": args.thumbnails, "store": args.store or args.excel, "excel": args.excel}
+
+
+if __name__ == "__main__":
+    args = getArgumentParser().parse_args()
+    failedRequests = 0
+    try:
+        for dataFile in args.dataFiles:
+            statusCode, response = analysisClient.callServer(args.server, "/analyze", getRequest(dataFile, args))
+            if args.json:
+                print(json.dumps(response, indent = 2))
+            elif statusCode != 200 or response["error"] != None:
+                print("Failed to Analyze " + dataFile + ": " + str(response["error"]))
+            else:
+                # Print the Results Like uvVisAnalysis.py
+                for sampleResult in response["results"]:
+                    if sampleResult["leftCutInd"] < 0:
+                        print("No Peak or Baseline Found in " + sampleResult["sampleName"] + " Data")
+                    else:
+                        print(sampleResult["sampleName"] + ": Peak at (" + str(sampleResult["peakWavelength"]) + ", " + str(round(sampleResult["peakHeight_Baseline"], 4)) + ")")
+                print("Analyzed " + str(len(response["results"])) + " Samples (" + str(response["numCached"]) + " Already Analyzed) in " + str(round(response["runTime"], 3)) + " s")
+            failedRequests += statusCode != 200 or response.get("error") != None
+
+        # Manage the Server
+        if args.clear:
+            analysisClient.callServer(args.server, "/clear", {})
+        if args.status or args.clear:
+            print(json.dumps(analysisClient.callServer(args.server, "/status")[1], indent = 2))
+        if args.shutdown:
+            analysisClient.callServer(args.server, "/shutdown", {})
+    except OSError as error:
+        print("Could Not Reach the Server at " + args.server + ": " + str(error))
+        sys.exit(2)
+
+    if failedRequests != 0:
+        sys.exit(1)
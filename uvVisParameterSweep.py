@@ -0,0 +1,92 @@
+"""
+Compare the Results of Different Analysis Settings Over a Folder of UV-Vis Exports:
+    $ python uvVisParameterSweep.py ./Data/ --cutoffFreq 0.05 0.1 0.2 --savgolWindow 11 15 21 --peakBounds 240 320 --peakBounds 260 300 --output "./Data/Parameter Sweep.csv"
+Every Combination of the Given Values is Analyzed (Settings Not Given Stay at uvVisAnalysis.py's Defaults). Each Stage
+is Only Re-Run When its Own Settings Change, so Sweeping the Peak Bounds or Baseline Thresholds Reuses the Filtered Spectra.
+The Output is a Tidy Table: One Row Per File, Combination, and Sample, With a Column Per Swept Setting (.csv or .xlsx).
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import csv
+import time
+import argparse
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import excelProcessing
+import batchRunner
+import parameterSweep
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(description = "Analyze every UV-Vis .tsv export under a folder with every combination of the given settings.")
+    parser.add_argument("rootDirectory", help = "Folder to search (recursively) for .tsv files")
+    parser.add_argument("--workers", type = int, default = None, help = "Number of worker processes (default: one per CPU)")
+    parser.add_argument("--cutoffFreq", type = float, nargs = "+", default = None, help = "Butterworth low pass cutoffs")
+    parser.add_argument("--filterOrder", type = int, nargs = "+", default = None, help = "Butterworth orders")
+    parser.add_argument("--savgolWindow", type = int, nargs = "+", default = None, help = "Savitzky-Golay window lengths (points)")
+    parser.add_argument("--savgolOrder", type = int, nargs = "+", default = None, help = "Savitzky-Golay polynomial orders")
+    parser.add_argument("--peakBounds", type = float, nargs = 2, action = "append", default = None, metavar = ("MIN_NM", "MAX_NM"), help = "Only look for peaks between these wavelengths (repeat to sweep)")
+    parser.add_argument("--unboundedPeak", action = "store_true", help = "Also look for peaks without bounds (when sweeping --peakBounds)")
+    parser.add_argument("--peakSign", choices = ["positive", "negative"], nargs = "+", default = None, help = "Look for positive and/or negative peaks")
+    parser.add_argument("--minLeftBoundaryInd", type = int, nargs = "+", default = None, help = "Points at the start of the spectrum a peak or tangent point cannot be in")
+    parser.add_argument("--minPeakDuration", type = int, nargs = "+", default = None, help = "Minimum number of points between the tangent points")
+    parser.add_argument("--warmStart", action = "store_true", help = "Seed each sample's baseline search with the previous sample's")
+    parser.add_argument("--output", default = None, metavar = "TABLE_FILE", help = "Save the table to this .csv or .xlsx file")
+    parser.add_argument("--metrics", default = None, metavar = "METRICS_FILE", help = "Record each stage's timings and counters (JSON lines)")
+    return parser
+
+def getParamGrid(args):
+    paramGrid = {}
+    for paramName in ["cutoffFreq", "filterOrder", "savgolWindow", "savgolOrder", "minLeftBoundaryInd", "minPeakDuration"]:
+        if getattr(args, paramName) != None:
+            paramGrid[paramName] = getattr(args, paramName)
+    if args.peakBounds != None:
+        paramGrid["peakWavelengthBounds"] = [list(peakBounds) for peakBounds in args.peakBounds] + ([None] if args.unboundedPeak else [])
+    if args.peakSign != None:
+        paramGrid["isPeakPositive"] = [peakSign == "positive" for peakSign in dict.fromkeys(args.peakSign)]
+    if args.warmStart:
+        paramGrid["warmStart"] = [True]
+    return paramGrid
+
+
+if __name__ == "__main__":
+    args = getArgumentParser().parse_args()
+
+    # Find the Files
+    dataFiles = batchRunner.findDataFiles(args.rootDirectory)
+    if len(dataFiles) == 0:
+        print("No TSV Files Found Under:", args.rootDirectory)
+        sys.exit(1)
+    paramGrid = getParamGrid(args)
+    print("Found " + str(len(dataFiles)) + " Files Under " + args.rootDirectory)
+
+    # Analyze Every Combination
+    startTime = time.time()
+    sweepTable, combinations, taskReports = parameterSweep.runSweep(dataFiles, paramGrid, args.workers, args.metrics)
+    parameterSweep.printSweepReport(taskReports, len(combinations), time.time() - startTime)
+
+    # Save the Table
+    if args.output != None:
+        headers, tableRows = parameterSweep.getTableRows(sweepTable, args.rootDirectory)
+        if args.output.endswith(".xlsx"):
+            outputFolder, outputName = os.path.split(os.path.abspath(args.output))
+            excelProcessing.saveData().saveData(tableRows, outputFolder + "/", outputName, headers = headers)
+        else:
+            with open(args.output, "w", newline = "") as outputFile:
+                tableWriter = csv.writer(outputFile)
+                tableWriter.writerow(headers)
+                tableWriter.writerows(tableRows)
+        print("Saved " + str(len(tableRows)) + " Rows to " + args.output)
+
+    # Flag the Sweep if Anything Failed
+    if any(len(taskReport["errors"]) != 0 for taskReport in taskReports):
+        sys.exit(1)
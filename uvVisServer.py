@@ -0,0 +1,55 @@
+"""
+Keep the UV-Vis Analysis Running in the Background, so Re-Analyzing a File Skips Python's Start Up, the Imports, the
+Filter Set Up, and (Until the File Changes) the Parsing:
+    $ python uvVisServer.py --workers 2 --port 8765
+Then Analyze From Any Terminal on This Computer With the Client (or POST JSON to http://127.0.0.1:8765/analyze):
+    $ python uvVisClient.py "./Data/05-20-2022 DA MIP 5 Hours/UV-Vis 5_20_2022 11_50_05 AM.tsv" --peakBounds 240 320
+The Server Only Listens on This Computer (127.0.0.1) Unless --host Says Otherwise.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import argparse
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import analysisServer
+import pipelineMetrics
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(description = "Serve the UV-Vis analysis over a local HTTP API, keeping it warm between requests.")
+    parser.add_argument("--host", default = "127.0.0.1", help = "Address to listen on (default: this computer only)")
+    parser.add_argument("--port", type = int, default = 8765, help = "Port to listen on")
+    parser.add_argument("--workers", type = int, default = 1, help = "Number of requests analyzed at once")
+    parser.add_argument("--maxQueued", type = int, default = 8, help = "Requests allowed to wait; more are turned away (HTTP 503)")
+    parser.add_argument("--maxCachedFiles", type = int, default = 32, help = "Parsed files (and analyses) kept in memory")
+    parser.add_argument("--cache", default = None, metavar = "CACHE_FOLDER", help = "Also reuse the on-disk result cache")
+    parser.add_argument("--metrics", default = None, metavar = "METRICS_FILE", help = "Record each stage's timings and counters (JSON lines)")
+    parser.add_argument("--logRequests", action = "store_true", help = "Print each HTTP request")
+    return parser
+
+
+if __name__ == "__main__":
+    args = getArgumentParser().parse_args()
+    if args.metrics != None:
+        pipelineMetrics.setSink(pipelineMetrics.jsonSink(args.metrics))
+
+    # Start the Workers, Then Listen
+    service = analysisServer.analysisService(args.workers, args.maxQueued, args.maxCachedFiles, args.cache)
+    server = analysisServer.makeServer(service, args.host, args.port, args.logRequests)
+    print("Serving the UV-Vis Analysis at http://" + args.host + ":" + str(server.server_address[1]) + " (" + str(args.workers) + " Workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    service.stop()
+    print("Stopped After " + str(service.serviceStats["requests"]) + " Requests")
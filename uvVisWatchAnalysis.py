@@ -0,0 +1,78 @@
+"""
+Analyze a UV-Vis Export While the Spectrometer is Still Writing it (e.g. a Time Series Run):
+    $ python uvVisWatchAnalysis.py "./Data/05-09-2022 DA MIP Time Analysis/UV-Vis 5_9_2022 1_07_51 PM.tsv" --peakBounds 240 320
+Every --interval Seconds, Only the Newly Appended Samples are Read and Analyzed, and Their Results and Spectra are
+Appended to the Results Store 'Analysis/Results Store/' Next to the File (--excel Also Writes 'Analysis/<File>/<File> Analysis.xlsx'
+From the Rows Kept in Memory, Without Re-Reading the Store: at Most Every --excelInterval Seconds While New Samples Arrive, and
+Once More on Exit). Stop With Ctrl+C (Any Unfinished Last Sample is Analyzed Then).
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Import Basic Modules
+import os
+import sys
+import time
+import argparse
+
+# Import Python Helper Files
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Helper Files'))  # Folder with All the Helper Files
+import batchProcessing
+import sampleStream
+import pipelineMetrics
+
+# ---------------------------------------------------------------------------#
+# ---------------------------------------------------------------------------#
+
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(description = "Analyze the new samples of a UV-Vis .tsv export as the spectrometer appends them.")
+    parser.add_argument("dataFile", help = "The .tsv file to follow")
+    parser.add_argument("--interval", type = float, default = 2, help = "Seconds between checks for new samples")
+    parser.add_argument("--peakBounds", type = float, nargs = 2, default = None, metavar = ("MIN_NM", "MAX_NM"), help = "Only look for peaks between these wavelengths (default: the whole spectrum)")
+    parser.add_argument("--negativePeak", action = "store_true", help = "Look for a negative peak")
+    parser.add_argument("--warmStart", action = "store_true", help = "Seed each sample's baseline search with the previous sample's")
+    parser.add_argument("--noPlots", "--no-plots", action = "store_true", help = "Only save the numerical results (no PNG per sample)")
+    parser.add_argument("--plotDPI", type = int, default = 300, help = "Resolution of the saved plots")
+    parser.add_argument("--thumbnails", action = "store_true", help = "Save small, low resolution plots")
+    parser.add_argument("--excel", action = "store_true", help = "Also write the file's Excel report (on exit, and while new samples arrive)")
+    parser.add_argument("--excelInterval", type = float, default = 60, help = "Least seconds between Excel report rewrites while watching")
+    parser.add_argument("--metrics", default = None, metavar = "METRICS_FILE", help = "Record each stage's timings and counters (JSON lines)")
+    parser.add_argument("--logMetrics", action = "store_true", help = "Print each stage's timings and counters")
+    parser.add_argument("--once", action = "store_true", help = "Analyze the samples already in the file and exit")
+    return parser
+
+
+if __name__ == "__main__":
+    args = getArgumentParser().parse_args()
+
+    # Record the Stage Timings
+    if args.metrics != None:
+        pipelineMetrics.setSink(pipelineMetrics.jsonSink(args.metrics))
+    elif args.logMetrics:
+        pipelineMetrics.setSink(pipelineMetrics.logSink())
+    pipelineMetrics.setContext(dataFile = args.dataFile)
+
+    # Keep the Pipeline, Plot, and Read Offset Between Checks
+    samplePipeline = batchProcessing.batchProcessing()
+    samplePipeline.warmStart = args.warmStart   # The Last Tangent Pair Carries Over Between Checks
+    sampleWatcher = sampleStream.sampleWatcher(args.dataFile, samplePipeline, list(args.peakBounds) if args.peakBounds != None else None, not args.negativePeak,
+                                               not args.noPlots, args.plotDPI, args.thumbnails, args.excel, args.excelInterval)
+
+    # Analyze New Samples as They Arrive
+    try:
+        while not args.once:
+            sampleWatcher.analyzeNewSamples()
+            sampleWatcher.updateReport()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    # The Run is Over: the Last Sample is Complete Even Without a Trailing Blank Row
+    try:
+        sampleWatcher.analyzeNewSamples(includeUnfinished = True)
+    finally:
+        sampleWatcher.exportReport()
+    print("Analyzed " + str(sampleWatcher.dataStream.numSamples) + " Samples From " + args.dataFile)
+    if samplePipeline.numWarmAttempted != 0:
+        print("Warm Started Baselines: " + str(samplePipeline.numWarmAccepted) + "/" + str(samplePipeline.numWarmAttempted) + " Accepted")